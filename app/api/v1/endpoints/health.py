@@ -0,0 +1,53 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Response
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import get_session
+from app.services.AI.executor import metricas_ejecutor
+from app.services.AI.backend import estado_modelos, usa_modelos
+from app.services.AI.resources import estado_recursos
+
+# Se monta en la raíz (sin /api/v1) y sin autenticación, para el balanceador
+router = APIRouter(prefix="/health", tags=["Salud"])
+
+TIMEOUT_BASE_DATOS_S = 2.0
+
+
+@router.get("/live", summary="Proceso vivo", description="Responde mientras el bucle de eventos del worker atiende peticiones.")
+async def live() -> dict:
+    return {"estado": "vivo"}
+
+
+async def _comprobar_base_datos(session: AsyncSession) -> dict:
+    try:
+        await asyncio.wait_for(session.exec(select(1)), TIMEOUT_BASE_DATOS_S)
+    except Exception as e:  # noqa: BLE001 - cualquier fallo deja el worker fuera de servicio
+        return {"ok": False, "error": str(e) or type(e).__name__}
+    return {"ok": True, "error": None}
+
+
+@router.get(
+    "/ready",
+    summary="Worker listo para recibir tráfico",
+    description="200 si todos los modelos están cargados y calentados, la base de datos responde y el ejecutor de IA tiene capacidad libre; 503 en caso contrario, con el detalle de cada comprobación y los núcleos e hilos de inferencia efectivos del worker.",
+)
+async def ready(response: Response, session: AsyncSession = Depends(get_session)) -> dict:
+    # Con AI_BACKEND=rapido no se carga ningún modelo que esperar
+    modelos = estado_modelos() if usa_modelos() else {}
+    clave = "caliente" if settings.AI_WARMUP else "estado"
+    modelos_ok = all(resumen[clave] in (True, "listo") for resumen in modelos.values())
+
+    base_datos = await _comprobar_base_datos(session)
+
+    metricas = metricas_ejecutor()
+    capacidad = metricas["max_workers"] + metricas["max_cola"]
+    ejecutor = {"ok": metricas["pendientes"] < capacidad, "pendientes": metricas["pendientes"], "capacidad": capacidad}
+
+    listo = modelos_ok and base_datos["ok"] and ejecutor["ok"]
+    if not listo:
+        response.status_code = 503
+    return {"listo": listo, "backend": settings.AI_BACKEND, "modelos": modelos, "base_datos": base_datos, "ejecutor": ejecutor,
+            "recursos": estado_recursos()}
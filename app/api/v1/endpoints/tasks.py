@@ -4,12 +4,12 @@ from datetime import datetime, timezone
 from typing import Dict, Any, Optional, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Query
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
 from sqlalchemy.orm import selectinload
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import desc, asc
+from sqlalchemy import desc, asc, case
 from sqlalchemy.sql.expression import func
 from app.db.session import get_session
 from app.models import CategoriaTarea, TaskTag, TaskAssignment, Tag, Room
@@ -18,6 +18,10 @@ from app.models.task import Task, TaskHistory, EstadoTarea
 from app.schemas.task import TaskCreate, TaskRead, TaskUpdate, TaskAssignmentCreate, TaskAssignmentRead
 from app.models.user import Usuario
 from app.services.task_assignment import TaskAssignmentService
+from app.services.AI.backend import usa_modelos
+from app.services.task_embeddings import actualizar_embedding_tarea
+from app.services.task_priority import actualizar_prioridad_tarea, invalidar_prioridad
+from app.services.task_rewrites import registrar_titulo_aceptado
 from app.schemas.responses import ERROR_BAD_REQUEST, ERROR_FORBIDDEN
 from app.schemas.history import TaskHistoryRead
 from pydantic import BaseModel, ValidationError
@@ -67,21 +71,29 @@ async def _fetch_tasks(
             Task.titulo.ilike(f"%{search}%") | Task.descripcion.ilike(f"%{search}%")
         )
 
-    if order_by in {"due_date", "peso", "created_at"}:
+    if order_by == "prioridad":
+        # Ascendente: alta, media, baja; las tareas aún sin prioridad siempre al final
+        rango = case({"alta": 0, "media": 1, "baja": 2}, value=Task.prioridad, else_=3)
+        order_clauses = [
+            asc(Task.prioridad.is_(None)),
+            desc(rango) if is_descending else asc(rango),
+            desc(Task.created_at),
+        ]
+    elif order_by in {"due_date", "peso", "created_at"}:
         order_attr = getattr(Task, order_by)
-        order_clause = desc(order_attr) if is_descending else asc(order_attr)
+        order_clauses = [desc(order_attr) if is_descending else asc(order_attr)]
     else:
-        order_clause = (
+        order_clauses = [
             desc(func.coalesce(Task.created_at, func.now()))
             if is_descending
             else asc(func.coalesce(Task.created_at, func.now()))
-        )
+        ]
 
     result = await session.exec(
         select(Task)
         .options(selectinload(Task.etiquetas).selectinload(TaskTag.etiqueta))
         .filter(*filters)
-        .order_by(order_clause)
+        .order_by(*order_clauses)
         .offset(skip)
         .limit(limit)
     )
@@ -95,7 +107,7 @@ async def get_tasks(
         desde: Optional[datetime] = Query(None),
         hasta: Optional[datetime] = Query(None),
         search: Optional[str] = Query(None),
-        order_by: Optional[str] = Query(None, description="due_date, peso o created_at"),
+        order_by: Optional[str] = Query(None, description="due_date, peso, created_at o prioridad"),
         is_descending: Optional[bool] = Query(False),
         tag_id: Optional[UUID] = Query(None),
         room_id: Optional[UUID] = Query(None),
@@ -132,7 +144,7 @@ async def get_tasks_by_room(
     desde: Optional[datetime] = Query(None),
     hasta: Optional[datetime] = Query(None),
     search: Optional[str] = Query(None),
-    order_by: Optional[str] = Query(None, description="due_date, peso o created_at"),
+    order_by: Optional[str] = Query(None, description="due_date, peso, created_at o prioridad"),
     is_descending: Optional[bool] = Query(False),
     skip: int = Query(0, ge=0),
     limit: int = Query(10, gt=0),
@@ -168,6 +180,7 @@ async def get_tasks_by_room(
 @router.post("", response_model=TaskRead, status_code=201, summary="Crear tarea", description="Crea una nueva tarea para el usuario actual.")
 async def create_task(
         payload: TaskCreate,
+        background_tasks: BackgroundTasks,
         session: AsyncSession = Depends(get_session),
         current_user: Usuario = Depends(get_current_user),
 ):
@@ -219,6 +232,13 @@ async def create_task(
 
     session.add(history)
     await session.commit()
+
+    # El embedding del título se calcula después de responder
+    # (con AI_BACKEND=rapido no hay modelos que calculen nada)
+    if usa_modelos():
+        background_tasks.add_task(actualizar_embedding_tarea, new_task.id)
+        # Se ejecuta después del embedding, que reutiliza
+        background_tasks.add_task(actualizar_prioridad_tarea, new_task.id)
     return new_task
 
 @router.post("/assign", response_model=TaskAssignmentRead, status_code=201, summary="Asignar tarea", description="Asigna una tarea a otro usuario.")
@@ -353,6 +373,7 @@ async def get_task(
 async def update_task(
         task_id: UUID,
         task_in: TaskUpdate,
+        background_tasks: BackgroundTasks,
         current_user: Usuario = Depends(get_current_user),
         session: AsyncSession = Depends(get_session),
 ):
@@ -379,6 +400,8 @@ async def update_task(
     if not changes:
         return task
 
+    if "titulo" in changes:
+        invalidar_prioridad(task)
     task.updated_at = datetime.now(timezone.utc)
     session.add(task)
 
@@ -394,6 +417,12 @@ async def update_task(
     await session.commit()
     await session.refresh(task)
 
+    if "titulo" in changes and usa_modelos():
+        background_tasks.add_task(actualizar_embedding_tarea, task.id)
+        background_tasks.add_task(actualizar_prioridad_tarea, task.id)
+        # Si el nuevo título es la reformulación sugerida, no se vuelve a reformular
+        background_tasks.add_task(registrar_titulo_aceptado, changes["titulo"]["old"], changes["titulo"]["new"])
+
     return task
 
 @router.delete("/{task_id}", status_code=204, summary="Eliminar tarea", description="Elimina una tarea específica del usuario actual. Devuelve un error 403 si el usuario no tiene permisos para eliminar la tarea.")
@@ -434,6 +463,7 @@ class UpdateTaskStatus(BaseModel):
 async def patch_task(
         task_id: UUID,
         payload: TaskUpdate,  # Usar esquema de validación
+        background_tasks: BackgroundTasks,
         session: AsyncSession = Depends(get_session),
         current_user: Usuario = Depends(get_current_user),
 ):
@@ -453,8 +483,11 @@ async def patch_task(
             raise HTTPException(status_code=404, detail="Tarea no encontrada.")
 
         update_data = payload.model_dump(exclude_unset=True)
+        titulo_anterior = task.titulo
         for key, value in update_data.items():
             setattr(task, key, value)
+        if "titulo" in update_data:
+            invalidar_prioridad(task)
 
         task.updated_at = datetime.now(timezone.utc)
 
@@ -471,6 +504,11 @@ async def patch_task(
         session.add(history)
         await session.commit()
 
+        if "titulo" in update_data and usa_modelos():
+            background_tasks.add_task(actualizar_embedding_tarea, task.id)
+            background_tasks.add_task(actualizar_prioridad_tarea, task.id)
+            background_tasks.add_task(registrar_titulo_aceptado, titulo_anterior, task.titulo)
+
         return task
     except ValidationError as e:
         raise HTTPException(status_code=422, detail=e.errors())
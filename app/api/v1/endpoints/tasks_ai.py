@@ -1,74 +1,192 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Response
 from sqlmodel.ext.asyncio.session import AsyncSession
 from sqlmodel import select
-from typing import List
-from app.db.session import get_session
+from typing import AsyncIterator, Dict, List, Optional, Set, Tuple, Union
+from uuid import UUID
+from app.db.session import async_session, get_session
+from app.api.v1.streaming import FormatoStream, respuesta_en_stream
 from app.schemas.task import GroupedTasks
 from app.models.task import Task
 from app.models.user import Usuario
 from app.schemas.task import (
+    BackendIA,
     PrioritizedTask,
     GroupedTasksResponse,
     TaskGroupRequest,
     TaskRewriteRequest,
     RewrittenTask,
+    RewriteJobStatus,
     PrioritySuggestRequest,
     PrioritySuggestion,
 )
 from app.services.auth import get_current_user
 from app.schemas.responses import PRIORITIZED_TASK_EXAMPLE, GROUPED_TASKS_EXAMPLE, REWRITTEN_TASK_EXAMPLE
-from app.services.AI.priority_classifier import clasificar_prioridad
-from app.services.AI.reformulator import reformular_titulo_con_traduccion
+from app.services.AI.backend import (
+    BACKEND_RAPIDO,
+    backend_de_peticion,
+    clasificar_prioridad_many,
+    metricas_reformulacion,
+    modelo_listo,
+    reformular_titulos,
+)
 from app.services.AI.task_organizer import agrupar_tareas_por_similitud
+from app.services.AI.executor import ColaInferenciaLlena, ejecutar_inferencia, metricas_ejecutor
+from app.services.AI.keywords import obtener_motor_palabras_clave
+from app.services.AI.microbatch import MicroLotes
+from app.core.config import settings
+from app.services.jobs import obtener_backend_trabajos, obtener_trabajo_de_usuario
+from app.services.degradation import (
+    NIVEL_CACHE,
+    NIVEL_MODELO,
+    Plazo,
+    agrupar_con_plazo,
+    nivel_prioridad,
+    plazo_de_peticion,
+    priorizar_con_plazo,
+    reescribir_con_plazo,
+)
+from app.services import intelligence
+from app.services.task_clusters import grupos_de_tareas
+from app.services.task_embeddings import asegurar_embeddings, obtener_embeddings
+from app.services.task_priority import MOTIVO_HEURISTICA, prioridad_heuristica, priorizar_tareas
 from datetime import datetime, timezone, timedelta
-import re
+from functools import lru_cache
 
 router = APIRouter(prefix="/tasks/ai", tags=["Tareas con IA"])
 
 
-PALABRAS_URGENCIA = ["urgente", "hoy", "mañana", "prioritario", "inmediato", "rápido", "entregar", "última hora"]
+def _ia_saturada() -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail="El servicio de IA está saturado. Inténtalo de nuevo en unos segundos.",
+        headers={"Retry-After": "1"},
+    )
 
-def contiene_palabra_clave(titulo: str) -> bool:
-    titulo_lower = titulo.lower()
-    return any(re.search(rf"\b{palabra}\b", titulo_lower) for palabra in PALABRAS_URGENCIA)
+async def _inferir(operacion: str, funcion, *args, **kwargs):
+    """Ejecuta la inferencia fuera del bucle de eventos; 503 si el ejecutor está saturado."""
+    try:
+        return await ejecutar_inferencia(operacion, funcion, *args, **kwargs)
+    except ColaInferenciaLlena:
+        raise _ia_saturada()
 
-def clasificar_prioridad_batch(tasks: List[Task]) -> List[PrioritizedTask]:
-    resultado = []
-    for task in tasks:
-        if contiene_palabra_clave(task.titulo):
-            prioridad = "alta"
-            motivo = "Palabra clave de urgencia detectada en el título."
-        else:
-            prioridad = clasificar_prioridad(task.titulo)
-            motivo = "IA personalizada basada en entrenamiento en tareas reales."
+@lru_cache(maxsize=1)
+def _lotes_sugerencia() -> MicroLotes[str, str]:
+    """Las sugerencias concurrentes se clasifican juntas en una sola llamada al modelo."""
+    async def procesar(titulos: List[str]) -> List[str]:
+        return await ejecutar_inferencia("sugerencia", clasificar_prioridad_many, titulos)
 
-        resultado.append(PrioritizedTask(
-            id=task.id,
-            titulo=task.titulo,
-            prioridad=prioridad,
-            motivo=motivo
-        ))
-        print(f"[PRIORITY-IA+H] '{task.titulo}' → {prioridad} ({motivo})")
-    return resultado
+    return MicroLotes(procesar, settings.AI_SUGGEST_BATCH_WINDOW_MS, settings.AI_SUGGEST_MAX_BATCH)
+
+async def _sugerir_con_modelo(titulo: str) -> str:
+    try:
+        return await _lotes_sugerencia().enviar(titulo)
+    except ColaInferenciaLlena:
+        raise _ia_saturada()
 
 
+STREAM_QUERY = Query(
+    None,
+    description="Devolver cada resultado en cuanto termine su lote: `ndjson` (una línea JSON por tarea) o `sse` (Server-Sent Events).",
+)
+
+def obtener_plazo(
+        deadline_ms: Optional[int] = Query(
+            None, ge=1,
+            description="Plazo de la respuesta en milisegundos: lo que el modelo no termine a tiempo se sirve de la caché o de una heurística (ver `nivel`). No aplica con `stream` ni `async`.",
+        ),
+        x_deadline_ms: Optional[int] = Header(None, ge=1, description="Alternativa a `deadline_ms` en cabecera."),
+) -> Optional[Plazo]:
+    return plazo_de_peticion(deadline_ms or x_deadline_ms)
+
+def obtener_backend(
+        backend: Optional[BackendIA] = Query(
+            None,
+            description="`rapido`: reglas de palabras clave y fechas, sin modelos (nivel `heuristica`); responde de inmediato, sin `async` ni `deadline_ms`. Por defecto, el de `AI_BACKEND`.",
+        ),
+) -> str:
+    return backend_de_peticion(backend)
+
+async def _iterar(elementos: list) -> AsyncIterator:
+    for elemento in elementos:
+        yield elemento
 
+def _lotes(elementos: list, tamano: int):
+    for inicio in range(0, len(elementos), tamano):
+        yield elementos[inicio:inicio + tamano]
 
-@router.post("/prioritize", response_model=List[PrioritizedTask], summary="Priorizar tareas", description="Prioriza las tareas del usuario autenticado según criterios específicos.",
+async def _priorizar_por_lotes(task_ids: List[UUID]) -> AsyncIterator[PrioritizedTask]:
+    for lote in _lotes(task_ids, settings.AI_BATCH_SIZE):
+        # Sesión propia: la de la petición se cierra antes de enviar el stream
+        async with async_session() as session:
+            tareas = {task.id: task for task in (await session.exec(select(Task).where(Task.id.in_(lote)))).all()}
+            encontradas = [tareas[task_id] for task_id in lote if task_id in tareas]
+            for priorizada in await priorizar_tareas(session, encontradas):
+                yield priorizada
+
+@router.post("/prioritize", response_model=List[PrioritizedTask], summary="Priorizar tareas", description="Prioriza las tareas del usuario autenticado según criterios específicos. Con `stream` envía cada tarea en cuanto se prioriza su lote. Con `deadline_ms` responde dentro del plazo y `nivel` indica qué escalón (modelo, caché o heurística) sirvió cada tarea. Con `backend=rapido` usa sólo reglas, sin modelos.",
               responses={200: {"description": "Ejemplo de respuesta", "content": {"application/json": {"example": PRIORITIZED_TASK_EXAMPLE}}}})
 async def prioritize(
+        stream: Optional[FormatoStream] = STREAM_QUERY,
+        plazo: Optional[Plazo] = Depends(obtener_plazo),
+        backend: str = Depends(obtener_backend),
         session: AsyncSession = Depends(get_session),
         current_user: Usuario = Depends(get_current_user),
 ):
-    result = await session.exec(select(Task).where(Task.user_id == current_user.id))
+    # Consulta simple sobre (user_id, prioridad): sólo las filas obsoletas pasan por el modelo
+    result = await session.exec(
+        select(Task).where(Task.user_id == current_user.id, Task.deleted_at.is_(None))
+    )
     tasks_list = result.all()
-    prioritized_tasks = clasificar_prioridad_batch(tasks_list)
-    return prioritized_tasks
+    if backend == BACKEND_RAPIDO:
+        priorizadas = intelligence.priorizar(tasks_list)
+        return respuesta_en_stream(_iterar(priorizadas), stream) if stream else priorizadas
+    if stream:
+        return respuesta_en_stream(_priorizar_por_lotes([task.id for task in tasks_list]), stream)
+
+    if plazo is not None:
+        task_ids = [task.id for task in tasks_list]
+        return await priorizar_con_plazo(tasks_list, plazo, lambda: _recoger(_priorizar_por_lotes(task_ids)))
+
+    try:
+        priorizadas = await priorizar_tareas(session, tasks_list)
+    except ColaInferenciaLlena:
+        raise _ia_saturada()
+    return [priorizada.model_copy(update={"nivel": nivel_prioridad(priorizada)}) for priorizada in priorizadas]
+
+async def _recoger(elementos: AsyncIterator) -> list:
+    return [elemento async for elemento in elementos]
 
-@router.post("/group", response_model=GroupedTasksResponse, summary="Agrupar tareas", description="Agrupa las tareas del usuario autenticado en categorías específicas.",
+async def _agrupar(
+        session: AsyncSession, tasks: List[Task], payload: TaskGroupRequest,
+) -> Tuple[Dict[str, List[Task]], Set[UUID]]:
+    """Los grupos y los ids servidos tal cual estaban guardados (``nivel`` caché)."""
+    if payload.modo == "incremental":
+        # Asignaciones guardadas al escribir cada tarea: sólo se calculan los
+        # embeddings ausentes u obsoletos, y esas tareas se asignan ahora
+        recalculadas = await asegurar_embeddings(session, tasks)
+        grupos, asignadas = await grupos_de_tareas(session, tasks)
+        return grupos, {task.id for task in tasks} - recalculadas - asignadas
+    # Los vectores se calcularon al escribir cada tarea; aquí sólo se leen
+    embeddings = await obtener_embeddings(session, tasks)
+    grupos = await ejecutar_inferencia(
+        "agrupacion", agrupar_tareas_por_similitud, tasks,
+        modo=payload.modo, embeddings=embeddings, max_tamano=payload.max_tamano_grupo, n_grupos=payload.n_grupos,
+    )
+    return grupos, set()
+
+async def _agrupar_en_sesion(task_ids: List[UUID], payload: TaskGroupRequest) -> Tuple[Dict[str, List[UUID]], Set[UUID]]:
+    # Sesión propia: si vence el plazo sigue guardando embeddings y grupos en segundo plano
+    async with async_session() as session:
+        tareas = {task.id: task for task in (await session.exec(select(Task).where(Task.id.in_(task_ids)))).all()}
+        grupos, guardadas = await _agrupar(session, [tareas[task_id] for task_id in task_ids if task_id in tareas], payload)
+        return {nombre: [task.id for task in tasks] for nombre, tasks in grupos.items()}, guardadas
+
+@router.post("/group", response_model=GroupedTasksResponse, summary="Agrupar tareas", description="Agrupa las tareas del usuario autenticado en categorías específicas. Con `deadline_ms` responde dentro del plazo y `nivel` indica qué escalón (modelo, caché o heurística) sirvió cada tarea. Con `backend=rapido` usa sólo reglas, sin modelos.",
               responses={200: {"description": "Ejemplo de respuesta", "content": {"application/json": {"example": GROUPED_TASKS_EXAMPLE}}}})
 async def group_tasks(
         payload: TaskGroupRequest,
+        plazo: Optional[Plazo] = Depends(obtener_plazo),
+        backend: str = Depends(obtener_backend),
         session: AsyncSession = Depends(get_session),
         current_user: Usuario = Depends(get_current_user),
 ):
@@ -80,10 +198,20 @@ async def group_tasks(
     if not tasks:
         raise HTTPException(status_code=404, detail="No se encontraron tareas.")
 
-    group = agrupar_tareas_por_similitud(tasks)
+    if backend == BACKEND_RAPIDO:
+        return {"grupos": intelligence.agrupar(tasks)}
+
+    if plazo is not None:
+        task_ids = [task.id for task in tasks]
+        return {"grupos": await agrupar_con_plazo(session, tasks, plazo, lambda: _agrupar_en_sesion(task_ids, payload))}
+
+    try:
+        group, guardadas = await _agrupar(session, tasks, payload)
+    except ColaInferenciaLlena:
+        raise _ia_saturada()
     response = {
         nombre_grupo: [
-            GroupedTasks(id=task.id, titulo=task.titulo)
+            GroupedTasks(id=task.id, titulo=task.titulo, nivel=NIVEL_CACHE if task.id in guardadas else NIVEL_MODELO)
             for task in tareas
         ]
         for nombre_grupo, tareas in group.items()
@@ -91,10 +219,27 @@ async def group_tasks(
     return {"grupos": response}
 
 
-@router.post("/rewrite", response_model=List[RewrittenTask], summary="Reescribir tareas", description="Reescribe las tareas del usuario autenticado para mejorar su claridad y enfoque.",
-              responses={200: {"description": "Ejemplo de respuesta", "content": {"application/json": {"example": REWRITTEN_TASK_EXAMPLE}}}})
+async def _reescribir_por_lotes(tareas: List[tuple]) -> AsyncIterator[RewrittenTask]:
+    for lote in _lotes(tareas, settings.AI_REWRITE_BATCH_SIZE):
+        resultados = await ejecutar_inferencia("reformulacion", reformular_titulos, [titulo for _, titulo in lote])
+        for (task_id, titulo), resultado in zip(lote, resultados):
+            yield RewrittenTask(
+                id=task_id,
+                original=titulo,
+                reformulada=resultado["reformulada"],
+                motivo=resultado["motivo"]
+            )
+
+@router.post("/rewrite", response_model=Union[List[RewrittenTask], RewriteJobStatus], summary="Reescribir tareas", description="Reescribe las tareas del usuario autenticado para mejorar su claridad y enfoque. Con `async=true` encola un trabajo y responde 202 con su id; con `stream` envía cada tarea en cuanto se reescribe su lote. Con `deadline_ms` responde dentro del plazo y `nivel` indica qué escalón (modelo, caché o heurística) sirvió cada tarea. Con `backend=rapido` usa sólo reglas, sin modelos.",
+              responses={200: {"description": "Ejemplo de respuesta", "content": {"application/json": {"example": REWRITTEN_TASK_EXAMPLE}}},
+                         202: {"description": "Trabajo encolado", "model": RewriteJobStatus}})
 async def rewrite_tasks(
         payload: TaskRewriteRequest,
+        response: Response,
+        asincrono: bool = Query(False, alias="async", description="Encolar la reescritura y consultar el resultado en /tasks/ai/jobs/{id}."),
+        stream: Optional[FormatoStream] = STREAM_QUERY,
+        plazo: Optional[Plazo] = Depends(obtener_plazo),
+        backend: str = Depends(obtener_backend),
         session: AsyncSession = Depends(get_session),
         current_user: Usuario = Depends(get_current_user),
 ):
@@ -106,14 +251,34 @@ async def rewrite_tasks(
     if not tasks:
         raise HTTPException(status_code=404, detail="No se encontraron tareas.")
 
+    if backend == BACKEND_RAPIDO:
+        reescritas = intelligence.reescribir([(task.id, task.titulo) for task in tasks])
+        return respuesta_en_stream(_iterar(reescritas), stream) if stream else reescritas
+
+    if asincrono:
+        # Cada lote del trabajo espera su turno en el ejecutor: encolar no se rechaza
+        trabajo = obtener_backend_trabajos().lanzar_reescritura(
+            current_user.id, [{"id": str(task.id), "titulo": task.titulo} for task in tasks]
+        )
+        response.status_code = 202
+        return RewriteJobStatus(**trabajo)
+
+    if stream:
+        return respuesta_en_stream(_reescribir_por_lotes([(task.id, task.titulo) for task in tasks]), stream)
+
+    if plazo is not None:
+        return await reescribir_con_plazo([(task.id, task.titulo) for task in tasks], plazo)
+
+    # Todas las tareas pasan por cada etapa del reformulador en lotes
+    resultados = await _inferir("reformulacion", reformular_titulos, [task.titulo for task in tasks])
     result = []
-    for task in tasks:
-        resultado =  reformular_titulo_con_traduccion(task.titulo)
+    for task, resultado in zip(tasks, resultados):
         result.append(RewrittenTask(
             id=task.id,
             original=task.titulo,
             reformulada=resultado["reformulada"],
-            motivo=resultado["motivo"]
+            motivo=resultado["motivo"],
+            nivel=NIVEL_MODELO,
         ))
     return result
 
@@ -122,13 +287,20 @@ async def rewrite_tasks(
     "/suggest",
     response_model=PrioritySuggestion,
     summary="Sugerir prioridad de una tarea",
-    description="Devuelve una prioridad sugerida para la tarea enviada.",
+    description="Devuelve una prioridad sugerida para la tarea enviada. Con `backend=rapido` usa sólo reglas, sin modelos.",
 )
-async def suggest_priority(payload: PrioritySuggestRequest) -> PrioritySuggestion:
+async def suggest_priority(
+        payload: PrioritySuggestRequest,
+        backend: str = Depends(obtener_backend),
+) -> PrioritySuggestion:
     texto = f"{payload.titulo} {payload.descripcion or ''}"
-    if contiene_palabra_clave(texto):
-        prioridad = "alta"
-        motivo = "Palabra clave de urgencia detectada."
+    if backend == BACKEND_RAPIDO:
+        [(prioridad, motivo)] = intelligence.priorizar_titulos([texto], [payload.due_date])
+        return PrioritySuggestion(prioridad=prioridad, motivo=motivo)
+    regla = obtener_motor_palabras_clave().buscar(texto)
+    if regla is not None:
+        prioridad = regla.prioridad
+        motivo = regla.motivo
     elif payload.due_date:
         limite = payload.due_date
         ahora = datetime.now(timezone.utc)
@@ -137,11 +309,41 @@ async def suggest_priority(payload: PrioritySuggestRequest) -> PrioritySuggestio
         if limite - ahora <= timedelta(days=1):
             prioridad = "alta"
             motivo = "La fecha límite está muy próxima."
+        elif not modelo_listo():
+            prioridad = prioridad_heuristica(payload.due_date)
+            motivo = MOTIVO_HEURISTICA
         else:
-            prioridad = clasificar_prioridad(payload.titulo)
+            prioridad = await _sugerir_con_modelo(payload.titulo)
             motivo = "IA personalizada basada en entrenamiento en tareas reales."
+    elif not modelo_listo():
+        prioridad = prioridad_heuristica()
+        motivo = MOTIVO_HEURISTICA
     else:
-        prioridad = clasificar_prioridad(payload.titulo)
+        prioridad = await _sugerir_con_modelo(payload.titulo)
         motivo = "IA personalizada basada en entrenamiento en tareas reales."
     return PrioritySuggestion(prioridad=prioridad, motivo=motivo)
 
+
+
+@router.get("/jobs/{job_id}", response_model=RewriteJobStatus, summary="Estado de un trabajo de IA", description="Progreso y resultados parciales o finales de un trabajo lanzado con `async=true`.")
+async def get_job(
+        job_id: str,
+        current_user: Usuario = Depends(get_current_user),
+):
+    trabajo = obtener_trabajo_de_usuario(job_id, current_user.id)
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado.")
+    return RewriteJobStatus(**trabajo)
+
+
+# Síncrona: con el servidor de inferencia los contadores del reformulador se piden por el socket
+@router.get(
+    "/metrics",
+    summary="Métricas del ejecutor de IA",
+    description="Llamadas, tiempo medio/máximo de espera en cola y de cómputo por operación de IA, ocupación de los micro-lotes y etapas del reformulador ejecutadas o evitadas.",
+)
+def inference_metrics(current_user: Usuario = Depends(get_current_user)) -> dict:
+    metricas = metricas_ejecutor()
+    metricas["microlotes"] = {"sugerencia": _lotes_sugerencia().metricas()}
+    metricas["reformulador"] = metricas_reformulacion()
+    return metricas
@@ -0,0 +1,47 @@
+"""
+Respuestas en streaming para los endpoints que procesan listas por lotes.
+
+Cada elemento se envía en cuanto su lote termina, como una línea JSON
+(``application/x-ndjson``) o como un evento ``data:`` de Server-Sent Events
+(``text/event-stream``). Un error a mitad de stream ya no puede cambiar el
+código HTTP: se emite como último mensaje (``{"error": ...}`` o un evento
+``error``) y el stream se cierra.
+"""
+import json
+import logging
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+logger = logging.getLogger(__name__)
+
+FormatoStream = Literal["ndjson", "sse"]
+
+TIPOS_MEDIO = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+
+def _mensaje(datos: str, formato: FormatoStream, evento: str = "") -> str:
+    if formato == "sse":
+        return (f"event: {evento}\n" if evento else "") + f"data: {datos}\n\n"
+    return f"{datos}\n"
+
+
+def respuesta_en_stream(elementos: AsyncIterator[BaseModel], formato: FormatoStream) -> StreamingResponse:
+    async def cuerpo() -> AsyncIterator[str]:
+        try:
+            async for elemento in elementos:
+                yield _mensaje(elemento.model_dump_json(), formato)
+        except Exception as e:  # noqa: BLE001 - las cabeceras ya se enviaron
+            logger.exception("Error durante una respuesta en streaming")
+            yield _mensaje(json.dumps({"error": str(e)}, ensure_ascii=False), formato, evento="error")
+
+    return StreamingResponse(
+        cuerpo(),
+        media_type=TIPOS_MEDIO[formato],
+        # Sin caché ni buffering en proxies: cada lote debe llegar al cliente al terminar
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,6 +1,7 @@
 from pydantic_settings import BaseSettings
 from pydantic import ConfigDict, field_validator
 import json
+from typing import Literal
 
 class Settings(BaseSettings):
     DATABASE_URL: str
@@ -8,6 +9,71 @@ class Settings(BaseSettings):
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
     CORS_ORIGINS: list[str] = ["http://localhost:5173", "http://localhost:5174"]
 
+    # ─── IA ───────────────────────────────────────────────────────────────
+    AI_BATCH_SIZE: int = 64
+    AI_REWRITE_BATCH_SIZE: int = 16
+    # Backend de los codificadores: PyTorch u ONNX Runtime (opcionalmente int8)
+    AI_ENCODER_BACKEND: Literal["torch", "onnx"] = "torch"
+    AI_ONNX_QUANTIZATION: Literal["none", "avx2", "avx512", "avx512_vnni", "arm64"] = "avx2"
+    AI_ONNX_DIR: str = "app/services/AI/modelos/onnx"
+    # Inferencias de calentamiento al arrancar; /health/ready espera a que terminen
+    AI_WARMUP: bool = True
+    # Ejecutor de inferencia: hilos dedicados y llamadas que pueden esperar en cola
+    AI_EXECUTOR_WORKERS: int = 2
+    AI_EXECUTOR_QUEUE: int = 32
+    # Núcleos de CPU de cada worker para la inferencia (0 = sin reparto): fija
+    # los hilos de PyTorch/ONNX y del ejecutor; con AI_CPU_PINNING cada worker
+    # se fija además a un bloque de núcleos propio (sólo Linux)
+    AI_CPU_CORES_PER_WORKER: int = 0
+    AI_CPU_PINNING: bool = False
+    # Reglas de palabras clave (JSON); vacío usa las reglas de urgencia por defecto
+    AI_URGENCY_RULES_PATH: str = ""
+    # Micro-lotes de /tasks/ai/suggest: espera máxima y tamaño máximo de lote
+    AI_SUGGEST_BATCH_WINDOW_MS: float = 5.0
+    AI_SUGGEST_MAX_BATCH: int = 32
+    # Caché de embeddings: ruta vacía desactiva el nivel en disco
+    AI_EMBEDDING_CACHE_PATH: str = "app/services/AI/modelos/embeddings.sqlite3"
+    AI_EMBEDDING_CACHE_MEMORY_ENTRIES: int = 10_000
+    AI_EMBEDDING_CACHE_DISK_ENTRIES: int = 200_000
+    AI_EMBEDDING_CACHE_DTYPE: Literal["float32", "float16"] = "float32"
+    # Grupos persistidos: similitud mínima con el centroide para entrar en un
+    # grupo existente y cada cuántos minutos reagrupa con k-means la propia API
+    # (0 = nunca: mejor un cron con python -m app.services.task_clusters). Con
+    # varios workers sólo reagrupa el que obtiene el cerrojo AI_RECLUSTER_LOCK_PATH
+    AI_GROUP_THRESHOLD: float = 0.4
+    AI_RECLUSTER_INTERVAL_MINUTES: float = 0
+    AI_RECLUSTER_LOCK_PATH: str = "/tmp/prioritask-reagrupacion.lock"
+    # Reformulación: decodificación determinista ("greedy" o "beam") y caché de resultados
+    AI_REWRITE_DECODING: Literal["greedy", "beam"] = "beam"
+    AI_REWRITE_NUM_BEAMS: int = 4
+    AI_REWRITE_CACHE_ENTRIES: int = 5_000
+    AI_REWRITE_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    # Puerta previa: títulos cortos o ya reformulados no pasan por los modelos
+    # y los que están en inglés se saltan la traducción ES→EN
+    AI_REWRITE_GATE: bool = True
+    AI_REWRITE_MIN_WORDS: int = 3
+    # Plazo por defecto de /prioritize, /group y /rewrite en ms (0 = sin plazo);
+    # lo que no termine a tiempo se sirve de la caché o de una heurística
+    AI_DEADLINE_MS: int = 0
+    # Backend de los endpoints de IA: los modelos ("modelo") o las reglas de
+    # palabras clave de app.services.intelligence ("rapido", sin cargar modelos).
+    # Con "modelo" cada petición puede pedir el rápido con ?backend=rapido
+    AI_BACKEND: Literal["modelo", "rapido"] = "modelo"
+    # Dónde se ejecutan los modelos: en cada worker ("local") o en el servidor
+    # de inferencia ("remote", python -m app.services.AI.inference_server)
+    AI_INFERENCE_MODE: Literal["local", "remote"] = "local"
+    AI_INFERENCE_SOCKET: str = "/tmp/prioritask-inferencia.sock"
+    AI_INFERENCE_TIMEOUT_SECONDS: float = 120.0
+    # Micro-lotes del servidor de inferencia: espera máxima y nº máximo de peticiones por lote
+    AI_INFERENCE_BATCH_WINDOW_MS: float = 2.0
+    AI_INFERENCE_MAX_BATCH: int = 32
+
+    # ─── Trabajos asíncronos ──────────────────────────────────────────────
+    JOBS_BACKEND: Literal["memory", "filesystem", "celery"] = "memory"
+    JOBS_DIR: str = "jobs"
+    CELERY_BROKER_URL: str = "redis://localhost:6379/0"
+    CELERY_RESULT_BACKEND: str = "redis://localhost:6379/1"
+
     @field_validator("CORS_ORIGINS", mode="before")
     def split_origins(cls, v):
         if isinstance(v, str):
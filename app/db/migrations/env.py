@@ -10,6 +10,8 @@ from app.models.room import Room # noqa: F401
 from app.models.user import Usuario  # noqa: F401
 from app.models.task import Task  # noqa: F401
 from app.models.task_assignment import TaskAssignment  # noqa: F401
+from app.models.task_cluster import TaskCluster  # noqa: F401
+from app.models.task_embedding import TaskEmbedding  # noqa: F401
 
 target_metadata = SQLModel.metadata
 
@@ -0,0 +1,40 @@
+"""add taskembedding table
+
+Revision ID: 5cef6fac2ab3
+Revises: f6c1d85f6e56
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5cef6fac2ab3'
+down_revision: Union[str, None] = 'f6c1d85f6e56'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('taskembedding',
+    sa.Column('task_id', sa.Uuid(), nullable=False),
+    sa.Column('modelo', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('clave', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('dim', sa.Integer(), nullable=False),
+    sa.Column('vector', sa.LargeBinary(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['task_id'], ['task.id'], ),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index(op.f('ix_taskembedding_modelo'), 'taskembedding', ['modelo'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_taskembedding_modelo'), table_name='taskembedding')
+    op.drop_table('taskembedding')
@@ -0,0 +1,39 @@
+"""add persisted priority columns to task
+
+Revision ID: 9b1e4d7a2c60
+Revises: 5cef6fac2ab3
+Create Date: 2026-10-18 14:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b1e4d7a2c60'
+down_revision: Union[str, None] = '5cef6fac2ab3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('prioridad', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('prioridad_motivo', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('prioridad_modelo', sqlmodel.sql.sqltypes.AutoString(), nullable=True))
+        batch_op.add_column(sa.Column('prioridad_calculada_at', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_task_user_prioridad', ['user_id', 'prioridad'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('task', schema=None) as batch_op:
+        batch_op.drop_index('ix_task_user_prioridad')
+        batch_op.drop_column('prioridad_calculada_at')
+        batch_op.drop_column('prioridad_modelo')
+        batch_op.drop_column('prioridad_motivo')
+        batch_op.drop_column('prioridad')
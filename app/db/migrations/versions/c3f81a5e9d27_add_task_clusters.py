@@ -0,0 +1,51 @@
+"""add per-user task clusters
+
+Revision ID: c3f81a5e9d27
+Revises: 9b1e4d7a2c60
+Create Date: 2026-10-18 16:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3f81a5e9d27'
+down_revision: Union[str, None] = '9b1e4d7a2c60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('taskcluster',
+    sa.Column('id', sa.Uuid(), nullable=False),
+    sa.Column('user_id', sa.Uuid(), nullable=False),
+    sa.Column('numero', sa.Integer(), nullable=False),
+    sa.Column('modelo', sqlmodel.sql.sqltypes.AutoString(), nullable=False),
+    sa.Column('dim', sa.Integer(), nullable=False),
+    sa.Column('suma', sa.LargeBinary(), nullable=False),
+    sa.Column('n_tareas', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['usuario.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('user_id', 'numero', name='uq_taskcluster_user_numero')
+    )
+    op.create_index(op.f('ix_taskcluster_user_id'), 'taskcluster', ['user_id'], unique=False)
+    with op.batch_alter_table('taskembedding', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('cluster_id', sa.Uuid(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_taskembedding_cluster_id'), ['cluster_id'], unique=False)
+        batch_op.create_foreign_key('fk_taskembedding_cluster_id', 'taskcluster', ['cluster_id'], ['id'])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.batch_alter_table('taskembedding', schema=None) as batch_op:
+        batch_op.drop_constraint('fk_taskembedding_cluster_id', type_='foreignkey')
+        batch_op.drop_index(batch_op.f('ix_taskembedding_cluster_id'))
+        batch_op.drop_column('cluster_id')
+    op.drop_index(op.f('ix_taskcluster_user_id'), table_name='taskcluster')
+    op.drop_table('taskcluster')
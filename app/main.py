@@ -1,8 +1,52 @@
+import asyncio
+from contextlib import asynccontextmanager, suppress
 from fastapi import FastAPI
 from app.api.v1 import api_router
+from app.api.v1.endpoints import health
+from app.core.config import settings
+from app.services.AI.backend import modelos_en_proceso
+from app.services.AI.executor import cerrar_ejecutor
+from app.services.AI.keywords import obtener_motor_palabras_clave
+from app.services.AI.model_manager import calentar_modelos, iniciar_carga_modelos
+from app.services.AI.resources import configurar_recursos
+from app.services.task_clusters import reagrupar_periodicamente
 from fastapi.middleware.cors import CORSMiddleware
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Los modelos de IA se cargan en segundo plano: la API atiende peticiones
+    # CRUD desde el primer momento y los endpoints de IA usan heurísticas
+    # hasta que cada modelo esté listo. Con AI_INFERENCE_MODE=remote los
+    # modelos viven en el servidor de inferencia y con AI_BACKEND=rapido no
+    # se usan: en ambos casos aquí no se carga ninguno.
+    en_proceso = modelos_en_proceso()
+    # Hilos y núcleos de este worker (AI_CPU_CORES_PER_WORKER), antes de cargar nada
+    configurar_recursos(usar_torch=en_proceso)
+    if en_proceso:
+        iniciar_carga_modelos()
+    # Cada modelo, al terminar de cargar, hace unas inferencias de prueba en el
+    # ejecutor: /health/ready no da el worker por listo hasta entonces
+    calentamiento = asyncio.create_task(calentar_modelos()) if en_proceso and settings.AI_WARMUP else None
+    # Las reglas de palabras clave se compilan (y validan) una sola vez al arrancar
+    obtener_motor_palabras_clave()
+    # Reagrupación periódica de los grupos de tareas persistidos (desactivada
+    # por defecto): en cada ciclo sólo reagrupa el worker que toma el cerrojo
+    reagrupacion = (
+        asyncio.create_task(reagrupar_periodicamente())
+        if settings.AI_RECLUSTER_INTERVAL_MINUTES > 0 else None
+    )
+    yield
+    for tarea in (calentamiento, reagrupacion):
+        if tarea is not None:
+            tarea.cancel()
+            with suppress(asyncio.CancelledError):
+                await tarea
+    cerrar_ejecutor()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Prioritask API",
     version="1.0",
     description="Gestión inteligente de tareas con IA. Esta API permite a los usuarios gestionar tareas de manera eficiente, incluyendo la creación, actualización, eliminación y asignación de tareas. Además, ofrece funcionalidades avanzadas como la priorización, agrupación y reformulación de tareas utilizando inteligencia artificial.",
@@ -27,4 +71,5 @@ app.add_middleware(
 
 # Aquí sí cargamos el router de la API
 app.include_router(api_router, prefix="/api/v1")
+app.include_router(health.router)
 
@@ -5,8 +5,10 @@ from .task import TaskHistory, CategoriaTarea, EstadoTarea
 from .tag import Tag
 from .task_tag import TaskTag
 from .task_assignment import TaskAssignment
+from .task_embedding import TaskEmbedding
+from .task_cluster import TaskCluster
 
 
 
-__all__ = ['Usuario', 'Room', 'Task','TaskHistory', 'CategoriaTarea',  'EstadoTarea', 'Tag', 'TaskTag', 'TaskAssignment']
+__all__ = ['Usuario', 'Room', 'Task','TaskHistory', 'CategoriaTarea',  'EstadoTarea', 'Tag', 'TaskTag', 'TaskAssignment', 'TaskEmbedding', 'TaskCluster']
 
@@ -12,10 +12,13 @@ from .task_assignment import TaskAssignment
 if TYPE_CHECKING:
     from .task_tag import TaskTag
     from .tag import Tag
+    from .task_embedding import TaskEmbedding
 
 class Task(SQLModel, table=True):
     __table_args__ = (
         sa.UniqueConstraint("user_id", "titulo", name="unique_user_task_title"),
+        # /tasks/ai/prioritize y el listado ordenado por prioridad
+        sa.Index("ix_task_user_prioridad", "user_id", "prioridad"),
     )
 
     id: UUID = Field(default_factory=uuid4, primary_key=True)
@@ -30,12 +33,19 @@ class Task(SQLModel, table=True):
     updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
     deleted_at: Optional[datetime] = None
 
+    # Prioridad calculada por IA (reglas o modelo); None si falta o quedó obsoleta
+    prioridad: Optional[str] = None
+    prioridad_motivo: Optional[str] = None
+    prioridad_modelo: Optional[str] = None
+    prioridad_calculada_at: Optional[datetime] = None
+
     user_id: UUID = Field(foreign_key="usuario.id")
     room_id: UUID = Field(foreign_key="room.id", nullable=False)
     usuario: Optional["Usuario"] = Relationship(back_populates="tasks")
     history: List["TaskHistory"] = Relationship(back_populates="task", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
     colaboradores: List["TaskAssignment"] = Relationship(back_populates="task")
     etiquetas: List["TaskTag"] = Relationship(back_populates="tarea", sa_relationship_kwargs={"cascade": "all, delete-orphan"})
+    embedding: Optional["TaskEmbedding"] = Relationship(back_populates="tarea", sa_relationship_kwargs={"cascade": "all, delete-orphan", "uselist": False})
 
     @property
     def tags(self) -> List["Tag"]:
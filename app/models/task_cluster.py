@@ -0,0 +1,25 @@
+from sqlmodel import SQLModel, Field
+from uuid import UUID, uuid4
+from datetime import datetime, timezone
+import sqlalchemy as sa
+
+
+class TaskCluster(SQLModel, table=True):
+    """Grupo de tareas similares de un usuario, mantenido al escribir cada tarea."""
+
+    __table_args__ = (
+        sa.UniqueConstraint("user_id", "numero", name="uq_taskcluster_user_numero"),
+    )
+
+    id: UUID = Field(default_factory=uuid4, primary_key=True)
+    user_id: UUID = Field(foreign_key="usuario.id", index=True)
+    # "Grupo N": se conserva mientras el grupo exista, también al reagrupar
+    numero: int
+    # Modelo de los embeddings que contiene
+    modelo: str
+    dim: int
+    # Suma (sin normalizar) de los embeddings de sus tareas: el centroide es
+    # suma / n_tareas, y añadir o quitar una tarea es exacto
+    suma: bytes = Field(sa_column=sa.Column(sa.LargeBinary, nullable=False))
+    n_tareas: int = 0
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
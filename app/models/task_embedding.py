@@ -0,0 +1,25 @@
+from sqlmodel import SQLModel, Field, Relationship
+from typing import Optional, TYPE_CHECKING
+from uuid import UUID
+from datetime import datetime, timezone
+import sqlalchemy as sa
+
+if TYPE_CHECKING:
+    from app.models.task import Task
+
+
+class TaskEmbedding(SQLModel, table=True):
+    """Embedding del título de una tarea, calculado al escribir la tarea."""
+
+    task_id: UUID = Field(foreign_key="task.id", primary_key=True)
+    # Nombre/versión del modelo que generó el vector
+    modelo: str = Field(index=True)
+    # Hash de (modelo, título normalizado): si no coincide, el vector está obsoleto
+    clave: str
+    dim: int
+    vector: bytes = Field(sa_column=sa.Column(sa.LargeBinary, nullable=False))
+    updated_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    # Grupo del usuario al que se asignó este vector (ver services/task_clusters)
+    cluster_id: Optional[UUID] = Field(default=None, foreign_key="taskcluster.id", index=True)
+
+    tarea: Optional["Task"] = Relationship(back_populates="embedding")
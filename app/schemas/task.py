@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict, Field, field_validator
-from typing import Optional, List, Dict
+from pydantic import BaseModel, ConfigDict, Field, field_validator, model_validator
+from typing import Optional, List, Dict, Literal
 from uuid import UUID
 from datetime import datetime
 from app.models.enums import CategoriaTarea, EstadoTarea
@@ -28,6 +28,8 @@ class TaskRead(BaseModel):
     room_id: UUID | None = Field(default=None, description="Hogar asociado", json_schema_extra={"example": None})
     deleted_at: Optional[datetime] = Field(default=None, description="Fecha de eliminación de la tarea, si aplica.", json_schema_extra={"example": None})
     tags: List[TagRead] = Field(default_factory=list, description="Etiquetas asociadas a la tarea")
+    prioridad: Optional[str] = Field(default=None, description="Prioridad calculada por IA; vacía hasta que se calcula.", json_schema_extra={"example": "alta"})
+    prioridad_motivo: Optional[str] = Field(default=None, description="Motivo de la prioridad calculada.", json_schema_extra={"example": "Palabra clave de urgencia detectada en el título."})
 
     @field_validator("due_date", mode="before")
     def validate_due_date(cls, value):
@@ -82,19 +84,35 @@ class TaskAssignmentRead(BaseModel):
 class TaskPrioritizeRequest(BaseModel):
     task_ids: Optional[List[UUID]] = None
 
+NivelIA = Literal["modelo", "cache", "heuristica"]
+NIVEL_DESCRIPCION = "Qué escalón sirvió el resultado: el modelo, un resultado guardado o la heurística (modelo cargando, plazo agotado o backend rápido)."
+BackendIA = Literal["modelo", "rapido"]
+
 class PrioritizedTask(BaseModel):
     id : UUID
     titulo: str
     prioridad : str
     motivo : str
+    nivel: Optional[NivelIA] = Field(default=None, description=NIVEL_DESCRIPCION)
     model_config = ConfigDict(from_attributes=True)
 
 class TaskGroupRequest(BaseModel):
     task_ids: Optional[List[UUID]] = None
+    modo: Literal["incremental", "voraz", "componentes", "kmeans"] = Field(default="incremental", description="incremental lee los grupos guardados, que se mantienen al escribir cada tarea y conservan su número; el resto agrupa al vuelo: voraz por orden de aparición, componentes une cadenas de tareas similares y kmeans (k-means por mini-lotes) escala a decenas de miles de tareas sin depender del orden.")
+    max_tamano_grupo: Optional[int] = Field(default=None, ge=1, description="Sólo al agrupar al vuelo: los grupos más grandes se dividen hasta no superar este tamaño.")
+    n_grupos: Optional[int] = Field(default=None, ge=1, description="Sólo en modo kmeans: nº de grupos (por defecto √(n/2)).")
+
+    @model_validator(mode="after")
+    def validar_modo(self):
+        # Los grupos guardados conservan su número: no se dividen ni se recalculan aquí
+        if self.modo == "incremental" and (self.max_tamano_grupo is not None or self.n_grupos is not None):
+            raise ValueError("max_tamano_grupo y n_grupos sólo se aplican al agrupar al vuelo (modo distinto de incremental).")
+        return self
 
 class GroupedTasks (BaseModel):
     id : UUID
     titulo: str
+    nivel: Optional[NivelIA] = Field(default=None, description=NIVEL_DESCRIPCION)
 
 class GroupedTasksResponse(BaseModel):
     grupos: Dict[str, List[GroupedTasks]]
@@ -107,6 +125,15 @@ class RewrittenTask(BaseModel):
     original : str
     reformulada : str
     motivo: str
+    nivel: Optional[NivelIA] = Field(default=None, description=NIVEL_DESCRIPCION)
+
+class RewriteJobStatus(BaseModel):
+    id: str = Field(description="Identificador del trabajo.")
+    estado: Literal["pendiente", "en_curso", "completado", "error"]
+    procesadas: int = Field(description="Tareas ya reescritas.")
+    total: int = Field(description="Tareas incluidas en el trabajo.")
+    resultados: List[RewrittenTask] = Field(default_factory=list, description="Resultados parciales o finales.")
+    error: Optional[str] = None
 
 class PrioritySuggestRequest(BaseModel):
     titulo: str
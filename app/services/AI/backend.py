@@ -0,0 +1,71 @@
+"""
+Funciones de inferencia que usa el resto de la aplicación, resueltas según
+``AI_INFERENCE_MODE``:
+
+- ``local``: los modelos se cargan y ejecutan en el propio worker.
+- ``remote``: se delegan en el servidor de inferencia
+  (``app.services.AI.inference_server``) a través de su socket Unix.
+
+Las firmas son las mismas en ambos casos; los llamadores importan de aquí y
+no de los módulos de cada modelo. Con ``AI_BACKEND=rapido`` los endpoints de
+IA no usan ningún modelo (``app.services.intelligence``) y no se cargan.
+"""
+from typing import Optional
+
+from app.core.config import settings
+
+if settings.AI_INFERENCE_MODE == "remote":
+    from app.services.AI.inference_client import (
+        calcular_embeddings,
+        clasificar_embeddings,
+        clasificar_prioridad_many,
+        estado_modelos,
+        metricas_reformulacion,
+        modelo_listo,
+        reformular_desde_cache,
+        reformular_titulos,
+        registrar_aceptadas,
+    )
+else:
+    from app.services.AI.model_manager import estado_modelos
+    from app.services.AI.priority_classifier import clasificar_embeddings, clasificar_prioridad_many, modelo_listo
+    from app.services.AI.reformulator import reformular_desde_cache, reformular_titulos, registrar_aceptadas
+    from app.services.AI.rewrite_gate import metricas_reformulacion
+    from app.services.AI.sentence_encoder import calcular_embeddings
+
+
+BACKEND_MODELO = "modelo"
+BACKEND_RAPIDO = "rapido"
+
+
+def usa_modelos() -> bool:
+    """Si este despliegue sirve la IA con modelos (``AI_BACKEND=modelo``)."""
+    return settings.AI_BACKEND == BACKEND_MODELO
+
+
+def backend_de_peticion(pedido: Optional[str]) -> str:
+    """El backend que pide la petición; en un despliegue rápido, siempre el rápido."""
+    return BACKEND_RAPIDO if not usa_modelos() or pedido == BACKEND_RAPIDO else BACKEND_MODELO
+
+
+def modelos_en_proceso() -> bool:
+    """Si este proceso carga los modelos (y por tanto los precarga y calienta)."""
+    return usa_modelos() and settings.AI_INFERENCE_MODE == "local"
+
+
+__all__ = [
+    "BACKEND_MODELO",
+    "BACKEND_RAPIDO",
+    "backend_de_peticion",
+    "calcular_embeddings",
+    "clasificar_embeddings",
+    "clasificar_prioridad_many",
+    "estado_modelos",
+    "metricas_reformulacion",
+    "modelo_listo",
+    "modelos_en_proceso",
+    "reformular_desde_cache",
+    "reformular_titulos",
+    "registrar_aceptadas",
+    "usa_modelos",
+]
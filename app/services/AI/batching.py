@@ -0,0 +1,42 @@
+"""Utilidades para ejecutar modelos sobre listas de textos por lotes."""
+from typing import Callable, List, Sequence, TypeVar, Union
+
+R = TypeVar("R")
+
+
+def ejecutar_por_lotes(
+        funcion: Callable[[List[str]], Sequence[R]],
+        textos: Sequence[str],
+        tamano_lote: int,
+) -> List[Union[R, Exception]]:
+    """
+    Aplica ``funcion`` a ``textos`` en lotes de hasta ``tamano_lote`` elementos.
+
+    Los textos se ordenan por longitud antes de trocearlos, de modo que cada
+    lote agrupa entradas de tamaño parecido y el relleno (padding) es mínimo.
+    Si un lote falla se reintenta elemento a elemento: el error de un texto
+    se devuelve en su posición como excepción y no afecta al resto.
+    Los resultados se devuelven en el orden original de ``textos``.
+    """
+    resultados: List[Union[R, Exception, None]] = [None] * len(textos)
+    orden = sorted(range(len(textos)), key=lambda i: len(textos[i]))
+    tamano_lote = max(1, tamano_lote)
+
+    for inicio in range(0, len(orden), tamano_lote):
+        indices = orden[inicio:inicio + tamano_lote]
+        lote = [textos[i] for i in indices]
+        try:
+            salidas = list(funcion(lote))
+            if len(salidas) != len(lote):
+                raise ValueError("El modelo devolvió un número de resultados distinto al de entradas.")
+        except Exception:  # noqa: BLE001 - se aísla el fallo reintentando uno a uno
+            salidas = []
+            for texto in lote:
+                try:
+                    salidas.append(list(funcion([texto]))[0])
+                except Exception as e:  # noqa: BLE001
+                    salidas.append(e)
+        for i, salida in zip(indices, salidas):
+            resultados[i] = salida
+
+    return resultados
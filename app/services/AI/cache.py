@@ -0,0 +1,75 @@
+"""Cachés en memoria compartidas por los servicios de IA."""
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def normalizar_titulo(titulo: str) -> str:
+    """Forma canónica del título: Unicode NFC y espacios colapsados."""
+    return " ".join(unicodedata.normalize("NFC", titulo).split())
+
+
+class CacheLRU(Generic[K, V]):
+    """
+    LRU acotada por número de entradas, segura entre hilos y con contadores.
+
+    Con ``ttl`` (segundos) cada entrada caduca ese tiempo después de guardarse.
+    """
+
+    def __init__(self, max_entradas: int, ttl: Optional[float] = None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._datos: "OrderedDict[K, Tuple[V, Optional[float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self.caducadas = 0
+
+    def obtener(self, clave: K) -> Optional[V]:
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.fallos += 1
+                return None
+            valor, expira = entrada
+            if expira is not None and expira <= time.monotonic():
+                del self._datos[clave]
+                self.caducadas += 1
+                self.fallos += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.aciertos += 1
+            return valor
+
+    def guardar(self, clave: K, valor: V) -> None:
+        if self.max_entradas <= 0:
+            return
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+
+    def limpiar(self) -> None:
+        with self._lock:
+            self._datos.clear()
+
+    def estadisticas(self) -> Dict[str, int]:
+        return {
+            "aciertos": self.aciertos,
+            "fallos": self.fallos,
+            "expulsiones": self.expulsiones,
+            "caducadas": self.caducadas,
+            "entradas": len(self._datos),
+        }
+
+    def __len__(self) -> int:
+        return len(self._datos)
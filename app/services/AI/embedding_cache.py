@@ -0,0 +1,204 @@
+"""
+Caché de embeddings de títulos en dos niveles.
+
+1. LRU en memoria del proceso.
+2. Tabla SQLite en disco, compartida entre reinicios y workers.
+
+La clave es un hash de (nombre del modelo, título normalizado), así que sólo
+los títulos nuevos o editados llegan al codificador.
+"""
+import hashlib
+import sqlite3
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.AI.cache import CacheLRU, normalizar_titulo
+
+
+def clave_embedding(modelo: str, titulo: str) -> str:
+    return hashlib.sha256(f"{modelo}\x00{normalizar_titulo(titulo)}".encode("utf-8")).hexdigest()
+
+
+class AlmacenEmbeddingsSQLite:
+    """
+    Nivel persistente: una fila por embedding con la fecha del último acceso.
+
+    Al superar ``max_filas`` se expulsan las filas usadas hace más tiempo hasta
+    quedar en el 90 % del límite, para no purgar en cada escritura.
+
+    Cada fila guarda su dimensión; al leer, un vector cuyo tamaño no
+    corresponde a ``dim`` elementos de ``dtype`` (se guardó con otro tipo)
+    cuenta como fallo.
+    """
+
+    def __init__(self, ruta: str | Path, max_filas: int, dtype: str = "float32"):
+        self.ruta = Path(ruta)
+        self.max_filas = max_filas
+        self.dtype = np.dtype(dtype)
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+        self._lock = threading.Lock()
+        self.ruta.parent.mkdir(parents=True, exist_ok=True)
+        self._conexion = sqlite3.connect(str(self.ruta), check_same_thread=False)
+        self._conexion.execute("PRAGMA journal_mode=WAL")
+        self._conexion.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " clave TEXT PRIMARY KEY,"
+            " dim INTEGER NOT NULL,"
+            " vector BLOB NOT NULL,"
+            " ultimo_acceso REAL NOT NULL)"
+        )
+        self._conexion.execute(
+            "CREATE INDEX IF NOT EXISTS ix_embeddings_ultimo_acceso ON embeddings (ultimo_acceso)"
+        )
+        self._conexion.commit()
+
+    def obtener_varios(self, claves: Sequence[str]) -> Dict[str, np.ndarray]:
+        encontrados: Dict[str, np.ndarray] = {}
+        if not claves:
+            return encontrados
+        ahora = time.time()
+        with self._lock:
+            # SQLite limita el nº de parámetros por consulta
+            for inicio in range(0, len(claves), 500):
+                lote = list(claves[inicio:inicio + 500])
+                marcadores = ",".join("?" * len(lote))
+                filas = self._conexion.execute(
+                    f"SELECT clave, dim, vector FROM embeddings WHERE clave IN ({marcadores})", lote
+                ).fetchall()
+                leidas = []
+                for clave, dim, vector in filas:
+                    # Guardada con otro AI_EMBEDDING_CACHE_DTYPE: fallo, se recalcula y se sobrescribe
+                    if len(vector) != dim * self.dtype.itemsize:
+                        continue
+                    encontrados[clave] = np.frombuffer(vector, dtype=self.dtype).astype(np.float32)
+                    leidas.append(clave)
+                self._conexion.executemany(
+                    "UPDATE embeddings SET ultimo_acceso = ? WHERE clave = ?",
+                    [(ahora, clave) for clave in leidas],
+                )
+            self._conexion.commit()
+        self.aciertos += len(encontrados)
+        self.fallos += len(claves) - len(encontrados)
+        return encontrados
+
+    def guardar_varios(self, vectores: Dict[str, np.ndarray]) -> None:
+        if not vectores or self.max_filas <= 0:
+            return
+        ahora = time.time()
+        filas = [
+            (clave, int(vector.shape[-1]), np.asarray(vector, dtype=self.dtype).tobytes(), ahora)
+            for clave, vector in vectores.items()
+        ]
+        with self._lock:
+            self._conexion.executemany(
+                "INSERT OR REPLACE INTO embeddings (clave, dim, vector, ultimo_acceso) VALUES (?, ?, ?, ?)",
+                filas,
+            )
+            total = self._conexion.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+            if total > self.max_filas:
+                sobrantes = total - int(self.max_filas * 0.9)
+                self._conexion.execute(
+                    "DELETE FROM embeddings WHERE clave IN ("
+                    " SELECT clave FROM embeddings ORDER BY ultimo_acceso ASC LIMIT ?)",
+                    (sobrantes,),
+                )
+                self.expulsiones += sobrantes
+            self._conexion.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conexion.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+    def cerrar(self) -> None:
+        with self._lock:
+            self._conexion.close()
+
+
+class CacheEmbeddings:
+    def __init__(self, memoria: CacheLRU[str, np.ndarray], disco: Optional[AlmacenEmbeddingsSQLite] = None):
+        self.memoria = memoria
+        self.disco = disco
+        self.codificados = 0
+
+    def obtener_o_calcular(
+            self,
+            modelo: str,
+            titulos: Sequence[str],
+            codificar: Callable[[List[str]], np.ndarray],
+    ) -> np.ndarray:
+        """
+        Devuelve una matriz (len(titulos), dim) en el orden de ``titulos``.
+
+        Los títulos que no están en ningún nivel se codifican con una sola
+        llamada a ``codificar`` (sin duplicados) y se guardan en ambos niveles.
+        """
+        claves = [clave_embedding(modelo, titulo) for titulo in titulos]
+        vectores: Dict[str, np.ndarray] = {}
+
+        for clave in dict.fromkeys(claves):
+            vector = self.memoria.obtener(clave)
+            if vector is not None:
+                vectores[clave] = vector
+
+        sin_memoria = [clave for clave in dict.fromkeys(claves) if clave not in vectores]
+        if sin_memoria and self.disco is not None:
+            for clave, vector in self.disco.obtener_varios(sin_memoria).items():
+                vectores[clave] = vector
+                self.memoria.guardar(clave, vector)
+
+        pendientes: Dict[str, str] = {}
+        for clave, titulo in zip(claves, titulos):
+            if clave not in vectores:
+                pendientes.setdefault(clave, titulo)
+
+        if pendientes:
+            calculados = np.asarray(codificar(list(pendientes.values())), dtype=np.float32)
+            self.codificados += len(pendientes)
+            nuevos = dict(zip(pendientes.keys(), calculados))
+            for clave, vector in nuevos.items():
+                self.memoria.guardar(clave, vector)
+            if self.disco is not None:
+                self.disco.guardar_varios(nuevos)
+            vectores.update(nuevos)
+
+        if not claves:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.stack([vectores[clave] for clave in claves])
+
+    def estadisticas(self) -> Dict[str, int]:
+        datos = {
+            "memoria_aciertos": self.memoria.aciertos,
+            "memoria_fallos": self.memoria.fallos,
+            "memoria_expulsiones": self.memoria.expulsiones,
+            "memoria_entradas": len(self.memoria),
+            "codificados": self.codificados,
+        }
+        if self.disco is not None:
+            datos.update({
+                "disco_aciertos": self.disco.aciertos,
+                "disco_fallos": self.disco.fallos,
+                "disco_expulsiones": self.disco.expulsiones,
+                "disco_entradas": len(self.disco),
+            })
+        return datos
+
+
+@lru_cache(maxsize=1)
+def obtener_cache_embeddings() -> CacheEmbeddings:
+    """Instancia compartida configurada desde ``settings``."""
+    disco = None
+    if settings.AI_EMBEDDING_CACHE_PATH:
+        disco = AlmacenEmbeddingsSQLite(
+            settings.AI_EMBEDDING_CACHE_PATH,
+            max_filas=settings.AI_EMBEDDING_CACHE_DISK_ENTRIES,
+            dtype=settings.AI_EMBEDDING_CACHE_DTYPE,
+        )
+    return CacheEmbeddings(CacheLRU(settings.AI_EMBEDDING_CACHE_MEMORY_ENTRIES), disco)
@@ -0,0 +1,64 @@
+"""
+Carga de los codificadores de frases según el backend configurado.
+
+- ``torch``: ``SentenceTransformer`` tal cual, en precisión completa.
+- ``onnx``: el codificador se exporta una vez a ONNX (en ``AI_ONNX_DIR``) y se
+  ejecuta con ONNX Runtime. Con ``AI_ONNX_QUANTIZATION`` distinto de ``none``
+  se usa además una copia con cuantización dinámica int8 para esa familia de
+  CPU (``avx2``, ``avx512``, ``avx512_vnni`` o ``arm64``).
+
+Las exportaciones se reutilizan entre arranques; requieren
+``pip install "sentence-transformers[onnx]"``.
+"""
+from pathlib import Path
+from typing import Optional
+
+from app.core.config import settings
+from app.services.AI.resources import opciones_onnx
+
+
+def identificador_encoder(nombre: str) -> str:
+    """
+    Nombre del modelo más su backend, para las claves de caché: los vectores
+    de ONNX cuantizado no son idénticos a los de PyTorch. Con ``torch`` se
+    conserva el nombre tal cual para no invalidar embeddings ya guardados.
+    """
+    if settings.AI_ENCODER_BACKEND == "torch":
+        return nombre
+    if settings.AI_ONNX_QUANTIZATION == "none":
+        return f"{nombre}@onnx"
+    return f"{nombre}@onnx-qint8-{settings.AI_ONNX_QUANTIZATION}"
+
+
+def _directorio_exportacion(origen: str) -> Path:
+    return Path(settings.AI_ONNX_DIR) / origen.strip("/").replace("/", "--")
+
+
+def cargar_encoder(origen: str, destino: Optional[Path] = None):
+    """
+    Devuelve un ``SentenceTransformer`` para ``origen`` (id del Hub o ruta local)
+    con el backend de ``settings.AI_ENCODER_BACKEND``.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    if settings.AI_ENCODER_BACKEND == "torch":
+        return SentenceTransformer(origen)
+
+    destino = Path(destino or _directorio_exportacion(origen))
+    if not (destino / "onnx" / "model.onnx").exists():
+        # Exporta el modelo a ONNX y lo guarda junto a su tokenizador y pooling
+        SentenceTransformer(origen, backend="onnx").save_pretrained(str(destino))
+
+    if settings.AI_ONNX_QUANTIZATION == "none":
+        return SentenceTransformer(str(destino), backend="onnx", model_kwargs=opciones_onnx())
+
+    fichero = f"onnx/model_qint8_{settings.AI_ONNX_QUANTIZATION}.onnx"
+    if not (destino / fichero).exists():
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+
+        export_dynamic_quantized_onnx_model(
+            SentenceTransformer(str(destino), backend="onnx"),
+            settings.AI_ONNX_QUANTIZATION,
+            str(destino),
+        )
+    return SentenceTransformer(str(destino), backend="onnx", model_kwargs={"file_name": fichero, **opciones_onnx()})
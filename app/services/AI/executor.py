@@ -0,0 +1,156 @@
+"""
+Ejecutor dedicado para la inferencia de los modelos.
+
+La inferencia con PyTorch es síncrona: llamarla directamente desde un
+``async def`` bloquea el bucle de eventos y congela todas las peticiones del
+worker. Todas las llamadas a modelos pasan por aquí, se ejecutan en un pool
+de hilos acotado y se esperan con ``await``.
+"""
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Dict, TypeVar
+
+from app.core.config import settings
+from app.services.AI.resources import hilos_ejecutor
+
+T = TypeVar("T")
+
+
+class ColaInferenciaLlena(RuntimeError):
+    """Se supera la capacidad del ejecutor (hilos ocupados + cola de espera)."""
+
+
+class _MetricasOperacion:
+    __slots__ = ("llamadas", "errores", "espera_total", "espera_max", "computo_total", "computo_max")
+
+    def __init__(self):
+        self.llamadas = 0
+        self.errores = 0
+        self.espera_total = 0.0
+        self.espera_max = 0.0
+        self.computo_total = 0.0
+        self.computo_max = 0.0
+
+    def registrar(self, espera: float, computo: float, error: bool) -> None:
+        self.llamadas += 1
+        self.errores += int(error)
+        self.espera_total += espera
+        self.espera_max = max(self.espera_max, espera)
+        self.computo_total += computo
+        self.computo_max = max(self.computo_max, computo)
+
+    def resumen(self) -> Dict[str, float]:
+        llamadas = max(self.llamadas, 1)
+        return {
+            "llamadas": self.llamadas,
+            "errores": self.errores,
+            "espera_media_ms": 1000 * self.espera_total / llamadas,
+            "espera_max_ms": 1000 * self.espera_max,
+            "computo_medio_ms": 1000 * self.computo_total / llamadas,
+            "computo_max_ms": 1000 * self.computo_max,
+        }
+
+
+class EjecutorInferencia:
+    """
+    Pool de ``max_workers`` hilos con una cola de espera de ``max_cola``
+    llamadas como máximo. Si ambos están llenos, ``ejecutar`` lanza
+    ``ColaInferenciaLlena`` en lugar de acumular trabajo sin límite.
+    """
+
+    def __init__(self, max_workers: int, max_cola: int):
+        self.max_workers = max_workers
+        self.max_cola = max_cola
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="inferencia")
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self.rechazadas = 0
+        self._metricas: Dict[str, _MetricasOperacion] = {}
+
+    @property
+    def pendientes(self) -> int:
+        return self._pendientes
+
+    def _liberar(self, _future) -> None:
+        with self._lock:
+            self._pendientes -= 1
+
+    def _registrar(self, operacion: str, espera: float, computo: float, error: bool) -> None:
+        with self._lock:
+            self._metricas.setdefault(operacion, _MetricasOperacion()).registrar(espera, computo, error)
+
+    def enviar(self, operacion: str, funcion: Callable[..., T], *args: Any, **kwargs: Any) -> Future:
+        """
+        Encola ``funcion(*args, **kwargs)`` sin esperar su resultado.
+
+        Lanza ``ColaInferenciaLlena`` de inmediato si no queda capacidad.
+        """
+        with self._lock:
+            if self._pendientes >= self.max_workers + self.max_cola:
+                self.rechazadas += 1
+                raise ColaInferenciaLlena(
+                    f"Ejecutor de inferencia saturado ({self._pendientes} llamadas pendientes)."
+                )
+            self._pendientes += 1
+
+        encolada = time.perf_counter()
+
+        def tarea() -> T:
+            inicio = time.perf_counter()
+            error = False
+            try:
+                return funcion(*args, **kwargs)
+            except BaseException:
+                error = True
+                raise
+            finally:
+                self._registrar(operacion, inicio - encolada, time.perf_counter() - inicio, error)
+
+        try:
+            future = self._pool.submit(tarea)
+        except BaseException:
+            self._liberar(None)
+            raise
+        # El hueco se libera al terminar (o cancelarse) la tarea, no al dejar de esperarla
+        future.add_done_callback(self._liberar)
+        return future
+
+    async def ejecutar(self, operacion: str, funcion: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Ejecuta ``funcion(*args, **kwargs)`` en el pool y espera su resultado."""
+        return await asyncio.wrap_future(self.enviar(operacion, funcion, *args, **kwargs))
+
+    def metricas(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_cola": self.max_cola,
+                "pendientes": self._pendientes,
+                "rechazadas": self.rechazadas,
+                "operaciones": {nombre: m.resumen() for nombre, m in self._metricas.items()},
+            }
+
+    def cerrar(self, esperar: bool = True) -> None:
+        self._pool.shutdown(wait=esperar, cancel_futures=not esperar)
+
+
+@lru_cache(maxsize=1)
+def obtener_ejecutor() -> EjecutorInferencia:
+    # Con AI_CPU_CORES_PER_WORKER, no más hilos que núcleos
+    return EjecutorInferencia(hilos_ejecutor(), settings.AI_EXECUTOR_QUEUE)
+
+
+def cerrar_ejecutor() -> None:
+    if obtener_ejecutor.cache_info().currsize:
+        obtener_ejecutor().cerrar(esperar=False)
+        obtener_ejecutor.cache_clear()
+
+
+async def ejecutar_inferencia(operacion: str, funcion: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    return await obtener_ejecutor().ejecutar(operacion, funcion, *args, **kwargs)
+
+
+def metricas_ejecutor() -> Dict[str, Any]:
+    return obtener_ejecutor().metricas()
@@ -0,0 +1,197 @@
+"""
+Cliente del servidor de inferencia (``AI_INFERENCE_MODE=remote``).
+
+Expone las mismas funciones síncronas que los módulos en proceso, así que los
+llamadores las siguen ejecutando en el ejecutor de inferencia del worker.
+Cada hilo abre su propia conexión al socket y la reutiliza entre llamadas.
+
+``modelo_listo`` y ``estado_modelos`` se consultan desde el bucle de eventos:
+devuelven el último estado conocido, que un hilo refresca cada segundo, en
+lugar de preguntar al servidor en cada llamada.
+"""
+import itertools
+import logging
+import socket
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.AI.executor import ColaInferenciaLlena
+from app.services.AI.protocol import (
+    ESTADO_OK,
+    ESTADO_SATURADO,
+    OP_EMBEDDINGS,
+    OP_ESTADO,
+    OP_PRIORIDAD,
+    OP_PRIORIDAD_EMBEDDINGS,
+    OP_REFORMULACIONES_ACEPTADAS,
+    OP_REFORMULAR,
+    OP_REFORMULAR_CACHE,
+    codificar_peticion,
+    decodificar_respuesta,
+    leer_trama,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class ServidorInferenciaNoDisponible(ColaInferenciaLlena):
+    """Sin conexión con el servidor de inferencia: se responde 503, igual que con el ejecutor saturado."""
+
+
+class ClienteInferencia:
+    INTERVALO_ESTADO_S = 1.0
+
+    def __init__(self, ruta: str, timeout: float):
+        self.ruta = ruta
+        self.timeout = timeout
+        self._local = threading.local()
+        self._ids = itertools.count(1)
+        self._estado: Dict[str, Any] = {
+            "modelo_listo": False,
+            "modelos": {},
+            "error": "Aún no se ha consultado el servidor de inferencia.",
+        }
+        self._sondeo: Optional[threading.Thread] = None
+        self._candado = threading.Lock()
+
+    def _conexion(self) -> socket.socket:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            conexion.settimeout(self.timeout)
+            try:
+                conexion.connect(self.ruta)
+            except OSError:
+                conexion.close()
+                raise
+            self._local.conexion = conexion
+        return conexion
+
+    def _cerrar(self) -> None:
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is not None:
+            conexion.close()
+            self._local.conexion = None
+
+    def _intercambiar(self, operacion: int, peticion_id: int, valor: Any):
+        # Una conexión reutilizada puede haberse cerrado (p. ej. el servidor se
+        # reinició): se reintenta una vez con una nueva. Las operaciones son
+        # inferencias sin efectos, repetirlas es seguro.
+        reutilizada = getattr(self._local, "conexion", None) is not None
+        try:
+            conexion = self._conexion()
+            conexion.sendall(codificar_peticion(operacion, peticion_id, valor))
+            return decodificar_respuesta(leer_trama(conexion))
+        except (ConnectionError, BrokenPipeError):
+            self._cerrar()
+            if not reutilizada:
+                raise
+        conexion = self._conexion()
+        conexion.sendall(codificar_peticion(operacion, peticion_id, valor))
+        return decodificar_respuesta(leer_trama(conexion))
+
+    def llamar(self, operacion: int, valor: Any) -> Any:
+        peticion_id = next(self._ids) & 0xFFFFFFFF
+        try:
+            respuesta_id, estado, resultado = self._intercambiar(operacion, peticion_id, valor)
+        except OSError as e:
+            self._cerrar()
+            raise ServidorInferenciaNoDisponible(f"Servidor de inferencia no disponible en {self.ruta}: {e}") from e
+        if respuesta_id != peticion_id:
+            self._cerrar()
+            raise ServidorInferenciaNoDisponible("Respuesta desincronizada del servidor de inferencia.")
+        if estado == ESTADO_SATURADO:
+            raise ColaInferenciaLlena(resultado)
+        if estado != ESTADO_OK:
+            raise RuntimeError(f"Error en el servidor de inferencia: {resultado}")
+        return resultado
+
+    def actualizar_estado(self) -> Dict[str, Any]:
+        try:
+            self._estado = self.llamar(OP_ESTADO, None)
+        except Exception as e:  # noqa: BLE001 - el estado refleja el fallo
+            self._estado = {"modelo_listo": False, "modelos": {}, "error": str(e)}
+        return self._estado
+
+    def _sondear(self) -> None:
+        while True:
+            self.actualizar_estado()
+            time.sleep(self.INTERVALO_ESTADO_S)
+
+    def estado(self) -> Dict[str, Any]:
+        """Último estado conocido del servidor; la primera llamada arranca el sondeo."""
+        if self._sondeo is None:
+            with self._candado:
+                if self._sondeo is None:
+                    self._sondeo = threading.Thread(target=self._sondear, name="sondeo-inferencia", daemon=True)
+                    self._sondeo.start()
+        return self._estado
+
+
+@lru_cache(maxsize=1)
+def obtener_cliente() -> ClienteInferencia:
+    return ClienteInferencia(settings.AI_INFERENCE_SOCKET, settings.AI_INFERENCE_TIMEOUT_SECONDS)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Mismas firmas que las funciones en proceso. ``batch_size`` se ignora: los
+# lotes los decide el servidor.
+# ─────────────────────────────────────────────────────────────────────────────
+def calcular_embeddings(titulos: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+    if not titulos:
+        return np.empty((0, 0), dtype=np.float32)
+    return obtener_cliente().llamar(OP_EMBEDDINGS, list(titulos))
+
+
+def clasificar_prioridad_many(titulos: Sequence[str], batch_size: Optional[int] = None) -> List[str]:
+    if not titulos:
+        return []
+    return obtener_cliente().llamar(OP_PRIORIDAD, list(titulos))
+
+
+def clasificar_embeddings(embeddings: np.ndarray) -> List[str]:
+    if len(embeddings) == 0:
+        return []
+    return obtener_cliente().llamar(OP_PRIORIDAD_EMBEDDINGS, np.asarray(embeddings))
+
+
+def reformular_titulos(titulos: Sequence[str], batch_size: Optional[int] = None) -> List[dict]:
+    if not titulos:
+        return []
+    return obtener_cliente().llamar(OP_REFORMULAR, list(titulos))
+
+
+def reformular_desde_cache(titulos: Sequence[str]) -> List[Optional[dict]]:
+    if not titulos:
+        return []
+    return obtener_cliente().llamar(OP_REFORMULAR_CACHE, list(titulos))
+
+
+def registrar_aceptadas(cambios: Sequence[Sequence[str]]) -> List[bool]:
+    if not cambios:
+        return []
+    return obtener_cliente().llamar(OP_REFORMULACIONES_ACEPTADAS, [list(cambio) for cambio in cambios])
+
+
+def metricas_reformulacion() -> Dict[str, Any]:
+    """Contadores de la puerta del reformulador, que corre en el servidor."""
+    estado = obtener_cliente().actualizar_estado()
+    if estado.get("error"):
+        return {"error": estado["error"]}
+    return estado["reformulador"]
+
+
+def modelo_listo() -> bool:
+    return bool(obtener_cliente().estado().get("modelo_listo"))
+
+
+def estado_modelos() -> Dict[str, Dict[str, Any]]:
+    estado = obtener_cliente().estado()
+    if estado.get("error"):
+        return {"servidor_inferencia": {"estado": "error", "caliente": False, "calentamiento_ms": None, "error": estado["error"]}}
+    return estado["modelos"]
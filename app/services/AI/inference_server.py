@@ -0,0 +1,214 @@
+"""
+Servidor de inferencia local: un proceso aparte que carga los modelos de
+``app/services/AI`` y los sirve por un socket Unix (``AI_INFERENCE_SOCKET``)
+con el protocolo de ``app.services.AI.protocol``.
+
+    python -m app.services.AI.inference_server [--socket RUTA]
+
+Con ``AI_INFERENCE_MODE=remote`` los workers de la API no cargan ningún
+modelo y le envían sus inferencias: hay una sola copia de los pesos por
+máquina sea cual sea el nº de workers, y reiniciar la API no obliga a
+recargarlos. Las peticiones concurrentes de una misma operación, vengan del
+worker que vengan, se agrupan en micro-lotes (``AI_INFERENCE_BATCH_WINDOW_MS``,
+``AI_INFERENCE_MAX_BATCH``) y se ejecutan en el ejecutor de inferencia con
+una sola llamada al modelo.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import stat
+from contextlib import suppress
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.AI.executor import ColaInferenciaLlena, cerrar_ejecutor, ejecutar_inferencia
+from app.services.AI.microbatch import MicroLotes
+from app.services.AI.model_manager import calentar_modelos, estado_modelos, iniciar_carga_modelos
+from app.services.AI.priority_classifier import clasificar_embeddings, clasificar_prioridad_many, modelo_listo
+from app.services.AI.protocol import (
+    ESTADO_ERROR,
+    ESTADO_OK,
+    ESTADO_SATURADO,
+    OP_EMBEDDINGS,
+    OP_ESTADO,
+    OP_PRIORIDAD,
+    OP_PRIORIDAD_EMBEDDINGS,
+    OP_REFORMULACIONES_ACEPTADAS,
+    OP_REFORMULAR,
+    OP_REFORMULAR_CACHE,
+    codificar_respuesta,
+    decodificar_peticion,
+    leer_trama_async,
+)
+from app.services.AI.reformulator import reformular_desde_cache, reformular_titulos, registrar_aceptadas
+from app.services.AI.resources import configurar_recursos, estado_recursos
+from app.services.AI.rewrite_gate import metricas_reformulacion
+from app.services.AI.sentence_encoder import NOMBRE_MODELO, calcular_embeddings
+
+logger = logging.getLogger(__name__)
+
+# Operación del protocolo → (operación del ejecutor, función en proceso)
+OPERACIONES: Dict[int, Tuple[str, Callable]] = {
+    OP_EMBEDDINGS: ("embeddings", calcular_embeddings),
+    OP_PRIORIDAD: ("prioridad", clasificar_prioridad_many),
+    OP_PRIORIDAD_EMBEDDINGS: ("prioridad_embeddings", clasificar_embeddings),
+    OP_REFORMULAR: ("reformulacion", reformular_titulos),
+}
+# Operaciones sin modelo: se responden en el bucle de eventos, sin esperar en
+# la cola del ejecutor detrás de las inferencias
+OPERACIONES_DIRECTAS: Dict[int, Callable] = {
+    OP_REFORMULAR_CACHE: reformular_desde_cache,
+    OP_REFORMULACIONES_ACEPTADAS: registrar_aceptadas,
+}
+
+
+class ServidorInferencia:
+    """
+    Atiende las conexiones de los workers. Cada conexión envía una petición
+    y espera su respuesta antes de la siguiente (el cliente abre una por
+    hilo), así que el lote se forma entre conexiones.
+    """
+
+    def __init__(self, ventana_ms: Optional[float] = None, max_lote: Optional[int] = None):
+        ventana_ms = settings.AI_INFERENCE_BATCH_WINDOW_MS if ventana_ms is None else ventana_ms
+        max_lote = max_lote or settings.AI_INFERENCE_MAX_BATCH
+        self.lotes: Dict[int, MicroLotes] = {
+            operacion: MicroLotes(self._procesador(operacion), ventana_ms, max_lote) for operacion in OPERACIONES
+        }
+        self._servidor: Optional[asyncio.AbstractServer] = None
+        self._atendiendo: Set[asyncio.Task] = set()
+        self._escritores: Set[asyncio.StreamWriter] = set()
+
+    @property
+    def conexiones(self) -> int:
+        return len(self._escritores)
+
+    @staticmethod
+    def _procesador(operacion: int):
+        nombre, funcion = OPERACIONES[operacion]
+
+        async def procesar(partes: List[Any]) -> List[Any]:
+            longitudes = [len(parte) for parte in partes]
+            if operacion == OP_PRIORIDAD_EMBEDDINGS:
+                entrada = np.concatenate(partes)
+            else:
+                entrada = [texto for parte in partes for texto in parte]
+            salida = await ejecutar_inferencia(nombre, funcion, entrada)
+
+            resultados, inicio = [], 0
+            for longitud in longitudes:
+                resultados.append(salida[inicio:inicio + longitud])
+                inicio += longitud
+            return resultados
+
+        return procesar
+
+    def estado(self) -> Dict[str, Any]:
+        return {
+            "modelo_listo": modelo_listo(),
+            "nombre_modelo": NOMBRE_MODELO,
+            "modelos": estado_modelos(),
+            "conexiones": self.conexiones,
+            "lotes": {OPERACIONES[op][0]: lotes.metricas() for op, lotes in self.lotes.items()},
+            "reformulador": metricas_reformulacion(),
+            "recursos": estado_recursos(),
+        }
+
+    async def _responder(self, operacion: int, valor: Any) -> Tuple[int, Any]:
+        if operacion == OP_ESTADO:
+            return ESTADO_OK, self.estado()
+        if operacion in OPERACIONES_DIRECTAS:
+            try:
+                return ESTADO_OK, OPERACIONES_DIRECTAS[operacion](valor)
+            except Exception as e:  # noqa: BLE001 - el error se devuelve al worker que lo pidió
+                return ESTADO_ERROR, f"{type(e).__name__}: {e}"
+        if operacion not in self.lotes:
+            return ESTADO_ERROR, f"Operación desconocida: {operacion}"
+        try:
+            return ESTADO_OK, await self.lotes[operacion].enviar(valor)
+        except ColaInferenciaLlena as e:
+            return ESTADO_SATURADO, str(e)
+        except Exception as e:  # noqa: BLE001 - el error se devuelve al worker que lo pidió
+            logger.exception("Error en la operación %s", operacion)
+            return ESTADO_ERROR, f"{type(e).__name__}: {e}"
+
+    async def atender(self, lector: asyncio.StreamReader, escritor: asyncio.StreamWriter) -> None:
+        tarea = asyncio.current_task()
+        self._atendiendo.add(tarea)
+        self._escritores.add(escritor)
+        try:
+            while True:
+                try:
+                    cuerpo = await leer_trama_async(lector)
+                except asyncio.IncompleteReadError:
+                    break
+                operacion, peticion_id, valor = decodificar_peticion(cuerpo)
+                estado, resultado = await self._responder(operacion, valor)
+                escritor.write(codificar_respuesta(peticion_id, estado, resultado))
+                await escritor.drain()
+        except Exception:  # noqa: BLE001 - una conexión rota no debe tumbar el servidor
+            logger.exception("Conexión con un worker cerrada por error")
+        finally:
+            self._escritores.discard(escritor)
+            self._atendiendo.discard(tarea)
+            escritor.close()
+            with suppress(Exception):
+                await escritor.wait_closed()
+
+    async def servir(self, ruta: str) -> asyncio.AbstractServer:
+        """Escucha en ``ruta`` (sustituye un socket huérfano de una ejecución anterior)."""
+        if os.path.exists(ruta) and stat.S_ISSOCK(os.stat(ruta).st_mode):
+            os.unlink(ruta)
+        self._servidor = await asyncio.start_unix_server(self.atender, path=ruta)
+        # Sólo el usuario y el grupo del servidor pueden conectarse
+        os.chmod(ruta, 0o660)
+        return self._servidor
+
+    async def cerrar(self) -> None:
+        """Deja de aceptar conexiones y cierra las abiertas (los workers reconectan al volver)."""
+        if self._servidor is not None:
+            self._servidor.close()
+        for escritor in list(self._escritores):
+            escritor.close()
+        if self._atendiendo:
+            await asyncio.gather(*self._atendiendo, return_exceptions=True)
+        if self._servidor is not None:
+            await self._servidor.wait_closed()
+
+
+async def ejecutar_servidor(ruta: str) -> None:
+    """Carga los modelos en segundo plano y atiende peticiones hasta que se cancele."""
+    configurar_recursos()
+    iniciar_carga_modelos()
+    calentamiento = asyncio.create_task(calentar_modelos()) if settings.AI_WARMUP else None
+    servidor = ServidorInferencia()
+    escucha = await servidor.servir(ruta)
+    logger.info("Servidor de inferencia escuchando en %s (pid %s)", ruta, os.getpid())
+    try:
+        await escucha.serve_forever()
+    finally:
+        await servidor.cerrar()
+        if calentamiento is not None:
+            calentamiento.cancel()
+            with suppress(asyncio.CancelledError):
+                await calentamiento
+        cerrar_ejecutor()
+        with suppress(FileNotFoundError):
+            os.unlink(ruta)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Servidor de inferencia local para los workers de la API.")
+    parser.add_argument("--socket", default=settings.AI_INFERENCE_SOCKET, help="Ruta del socket Unix")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    with suppress(KeyboardInterrupt):
+        asyncio.run(ejecutar_servidor(args.socket))
+
+
+if __name__ == "__main__":
+    main()
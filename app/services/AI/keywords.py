@@ -0,0 +1,120 @@
+"""
+Reglas de palabras clave que fijan la prioridad sin pasar por el modelo.
+
+Todas las palabras de todas las reglas se compilan una sola vez en una única
+expresión regular (una alternancia) sobre texto en minúsculas y sin tildes,
+de modo que "Mañana", "manana" y "MAÑANA" coinciden igual. ``buscar_varios``
+recorre una lista de títulos con una sola pasada del motor.
+
+Las reglas se leen de un JSON (``AI_URGENCY_RULES_PATH``) con esta forma:
+
+    [{"nombre": "urgencia", "palabras": ["urgente", "hoy"], "prioridad": "alta",
+      "motivo": "Palabra clave de urgencia detectada en el título."}]
+
+Si varias reglas coinciden con un mismo texto, gana la primera de la lista.
+El motor sirve para cualquier lista de reglas con ``palabras``: el backend
+rápido (``app.services.intelligence``) lo usa también para los grupos.
+"""
+import re
+import unicodedata
+from bisect import bisect_right
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Generic, List, Literal, Optional, Protocol, Sequence, TypeVar
+
+from pydantic import BaseModel, Field, TypeAdapter
+
+from app.core.config import settings
+
+
+class ReglaPalabraClave(BaseModel):
+    nombre: str
+    palabras: List[str] = Field(min_length=1)
+    prioridad: Literal["alta", "media", "baja"]
+    motivo: str
+
+
+REGLAS_POR_DEFECTO = [
+    ReglaPalabraClave(
+        nombre="urgencia",
+        palabras=["urgente", "hoy", "mañana", "prioritario", "inmediato", "rápido", "entregar", "última hora"],
+        prioridad="alta",
+        motivo="Palabra clave de urgencia detectada en el título.",
+    ),
+]
+
+class _ConPalabras(Protocol):
+    palabras: List[str]
+
+
+R = TypeVar("R", bound=_ConPalabras)
+
+# Separa los textos en buscar_varios: no es carácter de palabra ni espacio
+_SEPARADOR = "\x00"
+
+
+def plegar(texto: str) -> str:
+    """Minúsculas y sin marcas diacríticas ("Última" → "ultima")."""
+    descompuesto = unicodedata.normalize("NFD", texto.casefold())
+    return "".join(c for c in descompuesto if not unicodedata.combining(c))
+
+
+def _clave_frase(texto: str) -> str:
+    return " ".join(plegar(texto).split())
+
+
+class MotorPalabrasClave(Generic[R]):
+    def __init__(self, reglas: Sequence[R]):
+        self.reglas = list(reglas)
+        # Frase plegada → índice de la primera regla que la contiene
+        self._regla_de: Dict[str, int] = {}
+        for indice, regla in enumerate(self.reglas):
+            for palabra in regla.palabras:
+                self._regla_de.setdefault(_clave_frase(palabra), indice)
+
+        # Las frases más largas primero, para que "ultima hora" gane a "hora"
+        frases = sorted((f for f in self._regla_de if f), key=len, reverse=True)
+        alternativas = "|".join(r"\s+".join(map(re.escape, frase.split())) for frase in frases)
+        self._patron = re.compile(rf"\b(?:{alternativas})\b") if frases else None
+
+    def _reglas_en(self, texto_plegado: str) -> List[int]:
+        return [self._regla_de[" ".join(m.group().split())] for m in self._patron.finditer(texto_plegado)]
+
+    def buscar(self, texto: str) -> Optional[R]:
+        """Regla que aplica a ``texto`` o ``None`` si no contiene ninguna palabra clave."""
+        if self._patron is None:
+            return None
+        indices = self._reglas_en(plegar(texto))
+        return self.reglas[min(indices)] if indices else None
+
+    def buscar_varios(self, textos: Sequence[str]) -> List[Optional[R]]:
+        """Como ``buscar`` para cada texto, con una sola pasada sobre todos ellos."""
+        if self._patron is None or not textos:
+            return [None] * len(textos)
+
+        plegados = [plegar(texto).replace(_SEPARADOR, " ") for texto in textos]
+        inicios, posicion = [], 0
+        for plegado in plegados:
+            inicios.append(posicion)
+            posicion += len(plegado) + 1
+
+        mejores: List[Optional[int]] = [None] * len(textos)
+        for m in self._patron.finditer(_SEPARADOR.join(plegados)):
+            i = bisect_right(inicios, m.start()) - 1
+            indice = self._regla_de[" ".join(m.group().split())]
+            if mejores[i] is None or indice < mejores[i]:
+                mejores[i] = indice
+        return [self.reglas[indice] if indice is not None else None for indice in mejores]
+
+
+def cargar_reglas(ruta: Optional[str] = None) -> List[ReglaPalabraClave]:
+    ruta = settings.AI_URGENCY_RULES_PATH if ruta is None else ruta
+    if not ruta:
+        return list(REGLAS_POR_DEFECTO)
+    return TypeAdapter(List[ReglaPalabraClave]).validate_json(Path(ruta).read_text(encoding="utf-8"))
+
+
+@lru_cache(maxsize=1)
+def obtener_motor_palabras_clave() -> MotorPalabrasClave[ReglaPalabraClave]:
+    """Motor compartido; se construye en el arranque de la aplicación."""
+    return MotorPalabrasClave(cargar_reglas())
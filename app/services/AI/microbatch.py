@@ -0,0 +1,89 @@
+"""
+Agrupador de peticiones en micro-lotes.
+
+Muchas peticiones concurrentes de un solo elemento (p. ej. ``/tasks/ai/suggest``
+mientras el usuario escribe) se acumulan durante ``ventana_ms`` o hasta
+``max_lote`` elementos y se procesan con una única llamada al modelo. Cada
+llamador recibe su propio resultado (o la excepción del lote).
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Generic, List, Optional, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class MicroLotes(Generic[T, R]):
+    """
+    ``procesar`` recibe la lista de elementos del lote y devuelve sus
+    resultados en el mismo orden. Debe ser asíncrona: la inferencia en sí se
+    delega en el ejecutor de IA.
+    """
+
+    def __init__(self, procesar: Callable[[List[T]], Awaitable[List[R]]], ventana_ms: float, max_lote: int):
+        self.procesar = procesar
+        self.ventana = ventana_ms / 1000
+        self.max_lote = max(1, max_lote)
+        self._pendientes: List[Tuple[T, asyncio.Future]] = []
+        self._temporizador: Optional[asyncio.TimerHandle] = None
+        # Referencias a los lotes en curso para que no los recoja el GC
+        self._en_curso: Set[asyncio.Task] = set()
+        self.lotes = 0
+        self.elementos = 0
+        self.lotes_llenos = 0
+        self.errores = 0
+
+    async def enviar(self, elemento: T) -> R:
+        loop = asyncio.get_running_loop()
+        futuro = loop.create_future()
+        self._pendientes.append((elemento, futuro))
+        if len(self._pendientes) >= self.max_lote:
+            self._despachar()
+        elif self._temporizador is None:
+            self._temporizador = loop.call_later(self.ventana, self._despachar)
+        return await futuro
+
+    def _despachar(self) -> None:
+        if self._temporizador is not None:
+            self._temporizador.cancel()
+            self._temporizador = None
+        lote, self._pendientes = self._pendientes, []
+        # Los llamadores que ya se cancelaron no ocupan sitio en el lote
+        lote = [(elemento, futuro) for elemento, futuro in lote if not futuro.done()]
+        if not lote:
+            return
+        self.lotes += 1
+        self.elementos += len(lote)
+        self.lotes_llenos += int(len(lote) >= self.max_lote)
+        tarea = asyncio.ensure_future(self._procesar_lote(lote))
+        self._en_curso.add(tarea)
+        tarea.add_done_callback(self._en_curso.discard)
+
+    async def _procesar_lote(self, lote: List[Tuple[T, asyncio.Future]]) -> None:
+        try:
+            resultados = await self.procesar([elemento for elemento, _ in lote])
+            if len(resultados) != len(lote):
+                raise RuntimeError(f"El lote devolvió {len(resultados)} resultados para {len(lote)} elementos.")
+        except Exception as e:  # noqa: BLE001 - se propaga a cada llamador
+            self.errores += 1
+            for _, futuro in lote:
+                if not futuro.done():
+                    futuro.set_exception(e)
+            return
+        for (_, futuro), resultado in zip(lote, resultados):
+            if not futuro.done():
+                futuro.set_result(resultado)
+
+    def metricas(self) -> Dict[str, Any]:
+        lotes = max(self.lotes, 1)
+        return {
+            "ventana_ms": 1000 * self.ventana,
+            "max_lote": self.max_lote,
+            "lotes": self.lotes,
+            "elementos": self.elementos,
+            "tamano_medio": self.elementos / lotes,
+            # Ocupación media de los lotes respecto a max_lote (1.0 = siempre llenos)
+            "tasa_llenado": self.elementos / (lotes * self.max_lote),
+            "lotes_llenos": self.lotes_llenos,
+            "errores": self.errores,
+        }
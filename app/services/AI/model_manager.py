@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class ModeloNoDisponible(RuntimeError):
+    """Se lanza al pedir un modelo que todavía no ha terminado de cargarse."""
+
+    def __init__(self, nombre: str, estado: str):
+        super().__init__(f"El modelo '{nombre}' no está disponible (estado: {estado}).")
+        self.nombre = nombre
+        self.estado = estado
+
+
+class GestorModelo:
+    """
+    Carga (o entrena) un modelo en un hilo en segundo plano y expone su estado.
+
+    La carga no empieza al importar el módulo: se lanza con ``iniciar()`` desde
+    el lifespan de la aplicación o, como último recurso, al pedir el modelo con
+    ``obtener(esperar=True)``.
+
+    ``calentamiento`` recibe el modelo ya cargado y hace alguna inferencia
+    pequeña para que la primera petición real no pague la inicialización
+    perezosa (kernels, tokenizador, reservas de memoria). Se ejecuta aparte,
+    con ``calentar()``, para poder hacerlo en cada worker tras el fork.
+    """
+
+    PENDIENTE = "pendiente"
+    CARGANDO = "cargando"
+    LISTO = "listo"
+    ERROR = "error"
+
+    def __init__(self, nombre: str, cargador: Callable[[], Any], calentamiento: Optional[Callable[[Any], Any]] = None):
+        self.nombre = nombre
+        self._cargador = cargador
+        self._calentamiento = calentamiento
+        self._caliente = False
+        self._error_calentamiento: Optional[BaseException] = None
+        self.calentamiento_ms: Optional[float] = None
+        self._modelo: Any = None
+        self._estado = self.PENDIENTE
+        self._error: Optional[BaseException] = None
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._terminado = threading.Event()
+
+    @property
+    def estado(self) -> str:
+        return self._estado
+
+    @property
+    def listo(self) -> bool:
+        return self._estado == self.LISTO
+
+    @property
+    def error(self) -> Optional[BaseException]:
+        return self._error
+
+    @property
+    def caliente(self) -> bool:
+        """Cargado y con el calentamiento hecho (o sin calentamiento definido)."""
+        return self.listo and (self._caliente or self._calentamiento is None)
+
+    def iniciar(self) -> None:
+        """Lanza la carga en segundo plano. Es idempotente."""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._estado = self.CARGANDO
+            self._hilo = threading.Thread(
+                target=self._cargar, name=f"carga-modelo-{self.nombre}", daemon=True
+            )
+            self._hilo.start()
+
+    def _cargar(self) -> None:
+        logger.info("Cargando modelo '%s' en segundo plano", self.nombre)
+        try:
+            modelo = self._cargador()
+        except Exception as e:  # noqa: BLE001 - el error se expone vía estado
+            logger.exception("Error al cargar el modelo '%s'", self.nombre)
+            self._error = e
+            self._estado = self.ERROR
+        else:
+            self._modelo = modelo
+            self._estado = self.LISTO
+            logger.info("Modelo '%s' listo", self.nombre)
+        finally:
+            self._terminado.set()
+
+    def esperar(self, timeout: Optional[float] = None) -> bool:
+        """Bloquea hasta que termine la carga. Devuelve ``True`` si el modelo está listo."""
+        self._terminado.wait(timeout)
+        return self.listo
+
+    def obtener(self, esperar: bool = False) -> Any:
+        """
+        Devuelve el modelo cargado.
+
+        Con ``esperar=True`` inicia la carga si hace falta y bloquea hasta que
+        termine; si no, lanza ``ModeloNoDisponible`` cuando aún no está listo.
+        """
+        if esperar and not self.listo:
+            self.iniciar()
+            self.esperar()
+        if not self.listo:
+            raise ModeloNoDisponible(self.nombre, self._estado)
+        return self._modelo
+
+    def calentar(self) -> bool:
+        """
+        Ejecuta el calentamiento una sola vez (bloqueante). Devuelve ``True``
+        si el modelo queda caliente; un fallo se registra y se expone en
+        ``resumen()``, y el siguiente intento lo repite.
+        """
+        if not self.listo:
+            return False
+        with self._lock:
+            if self.caliente:
+                return True
+            inicio = time.perf_counter()
+            try:
+                self._calentamiento(self._modelo)
+            except Exception as e:  # noqa: BLE001 - el error se expone vía resumen
+                logger.exception("Error al calentar el modelo '%s'", self.nombre)
+                self._error_calentamiento = e
+                return False
+            self.calentamiento_ms = 1000 * (time.perf_counter() - inicio)
+            self._error_calentamiento = None
+            self._caliente = True
+        logger.info("Modelo '%s' calentado en %.0f ms", self.nombre, self.calentamiento_ms)
+        return True
+
+    def resumen(self) -> Dict[str, Any]:
+        error = self._error or self._error_calentamiento
+        return {
+            "estado": self._estado,
+            "caliente": self.caliente,
+            "calentamiento_ms": self.calentamiento_ms,
+            "error": str(error) if error else None,
+        }
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Registro global de modelos
+# ─────────────────────────────────────────────────────────────────────────────
+_gestores: Dict[str, GestorModelo] = {}
+
+
+def registrar_gestor(gestor: GestorModelo) -> GestorModelo:
+    _gestores[gestor.nombre] = gestor
+    return gestor
+
+
+def obtener_gestores() -> Dict[str, GestorModelo]:
+    return dict(_gestores)
+
+
+def iniciar_carga_modelos() -> None:
+    """Lanza en segundo plano la carga de todos los modelos registrados."""
+    for gestor in _gestores.values():
+        gestor.iniciar()
+
+
+def estado_modelos() -> Dict[str, Dict[str, Any]]:
+    return {nombre: gestor.resumen() for nombre, gestor in _gestores.items()}
+
+
+async def calentar_modelos() -> None:
+    """
+    Espera a que cargue cada modelo y lo calienta en el ejecutor de
+    inferencia, que es donde se ejecutarán las peticiones. Se lanza desde el
+    lifespan de la aplicación; los que no cargan se quedan sin calentar.
+    """
+    from app.services.AI.executor import ColaInferenciaLlena, ejecutar_inferencia
+
+    for gestor in list(_gestores.values()):
+        # Espera por tramos cortos: cancelar la tarea no deja un hilo bloqueado
+        while gestor.estado in (GestorModelo.PENDIENTE, GestorModelo.CARGANDO):
+            await asyncio.to_thread(gestor.esperar, 1.0)
+        while gestor.listo and not gestor.caliente:
+            try:
+                if not await ejecutar_inferencia("calentamiento", gestor.calentar):
+                    break
+            except ColaInferenciaLlena:
+                await asyncio.sleep(1.0)
@@ -0,0 +1,70 @@
+"""
+Precarga de modelos en el proceso maestro para despliegues con varios workers.
+
+Con ``gunicorn -c gunicorn.conf.py app.main:app`` (``preload_app = True``) la
+aplicación se importa una vez en el maestro, ``precargar_modelos`` carga ahí
+todos los modelos registrados y después gunicorn hace ``fork`` de los
+workers. Los pesos quedan en páginas compartidas copy-on-write: mientras los
+workers sólo los lean (inferencia), el sistema no los duplica.
+
+Tras el ``fork`` cada worker llama a ``reiniciar_tras_fork`` para no heredar
+recursos que no sobreviven a él: hilos del ejecutor de inferencia, la
+conexión SQLite de la caché de embeddings, las conexiones a la base de datos
+y las del servidor de inferencia.
+El calentamiento de los modelos no se hace aquí sino en el lifespan de cada
+worker, para que los hilos de cómputo se creen después del ``fork``.
+"""
+import gc
+import logging
+import os
+from typing import Iterable, Optional
+
+from app.services.AI.model_manager import ModeloNoDisponible, obtener_gestores
+
+logger = logging.getLogger(__name__)
+
+
+def precargar_modelos(
+        nombres: Optional[Iterable[str]] = None,
+        timeout: Optional[float] = None,
+        congelar_gc: bool = True,
+) -> None:
+    """
+    Carga de forma síncrona los modelos registrados (o sólo ``nombres``).
+
+    Lanza ``ModeloNoDisponible`` si alguno falla: es preferible que el
+    maestro no arranque a que cada worker cargue su propia copia.
+    """
+    # Los tokenizadores rápidos crean hilos propios que no sobreviven al fork
+    os.environ.setdefault("TOKENIZERS_PARALLELISM", "false")
+
+    gestores = obtener_gestores()
+    seleccion = [gestores[nombre] for nombre in nombres] if nombres is not None else list(gestores.values())
+    for gestor in seleccion:
+        gestor.iniciar()
+    for gestor in seleccion:
+        if not gestor.esperar(timeout):
+            raise ModeloNoDisponible(gestor.nombre, gestor.estado)
+        logger.info("Modelo '%s' precargado en el proceso maestro (pid %s)", gestor.nombre, os.getpid())
+
+    if congelar_gc:
+        # Los objetos ya creados pasan a la generación permanente: el GC de
+        # los workers no los recorre ni escribe en sus cabeceras, lo que
+        # evitaría copiar esas páginas en cada worker.
+        gc.collect()
+        gc.freeze()
+
+
+def reiniciar_tras_fork() -> None:
+    """Descarta los recursos heredados del maestro; cada worker crea los suyos al usarlos."""
+    from app.db.session import engine
+    from app.services.AI.embedding_cache import obtener_cache_embeddings
+    from app.services.AI.executor import obtener_ejecutor
+    from app.services.AI.inference_client import obtener_cliente
+
+    obtener_ejecutor.cache_clear()
+    # Las conexiones al servidor de inferencia y su hilo de sondeo tampoco
+    obtener_cliente.cache_clear()
+    obtener_cache_embeddings.cache_clear()
+    # Las conexiones del pool pertenecen al maestro: no se cierran, se olvidan
+    engine.sync_engine.dispose(close=False)
@@ -1,38 +1,87 @@
-from setfit import SetFitModel, Trainer
-from datasets import Dataset
+import logging
 from pathlib import Path
+from typing import List, Optional, Sequence
 
-# Ruta para guardar/cargar modelo
-MODELO_PATH = Path("app/services/AI/modelos/prioridad")
+import numpy as np
+
+from app.core.config import settings
+from app.services.AI.model_manager import GestorModelo, registrar_gestor
+from app.services.AI.sentence_encoder import NOMBRE_MODELO, calcular_embeddings, gestor_encoder
+
+# Ruta para guardar/cargar la cabeza de clasificación. El cuerpo es el
+# codificador compartido (sentence_encoder), que no se reentrena.
+CABEZA_PATH = Path("app/services/AI/modelos/prioridad_cabeza.joblib")
+# Modelo SetFit de versiones anteriores: ya no se carga
+SETFIT_PATH = Path("app/services/AI/modelos/prioridad")
+
+logger = logging.getLogger(__name__)
+
+# Dataset de ejemplo inicial
+EJEMPLOS = [
+    {"text": "Enviar informe urgente", "label": "alta"},
+    {"text": "Comprar pan", "label": "baja"},
+    {"text": "Estudiar para el examen de mañana", "label": "alta"},
+    {"text": "Llamar a mamá", "label": "media"},
+    {"text": "Revisar correo electrónico", "label": "media"},
+    {"text": "Pagar el alquiler hoy", "label": "alta"},
+    {"text": "Sacar la basura", "label": "baja"},
+]
+
+def entrenar_cabeza():
+    # Importaciones pesadas dentro del cargador: importar este módulo no debe
+    # arrastrar scikit-learn ni bloquear el arranque de la API.
+    from sklearn.linear_model import LogisticRegression
+
+    # Regresión logística sobre los embeddings del codificador compartido
+    embeddings = calcular_embeddings([e["text"] for e in EJEMPLOS])
+    return LogisticRegression(max_iter=1000).fit(embeddings, [e["label"] for e in EJEMPLOS])
 
 def cargar_o_entrenar_modelo():
-    if MODELO_PATH.exists():
-        return SetFitModel.from_pretrained(str(MODELO_PATH))
-
-    # Dataset de ejemplo inicial
-    ejemplos = [
-        {"text": "Enviar informe urgente", "label": "alta"},
-        {"text": "Comprar pan", "label": "baja"},
-        {"text": "Estudiar para el examen de mañana", "label": "alta"},
-        {"text": "Llamar a mamá", "label": "media"},
-        {"text": "Revisar correo electrónico", "label": "media"},
-        {"text": "Pagar el alquiler hoy", "label": "alta"},
-        {"text": "Sacar la basura", "label": "baja"},
-    ]
-    texts = [e["text"] for e in ejemplos]
-    labels = [e["label"] for e in ejemplos]
-    dataset = Dataset.from_dict({"text": texts, "label": labels})
-
-    # Entrenamiento
-    model = SetFitModel.from_pretrained("sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
-    trainer = Trainer(model=model, train_dataset=dataset, eval_dataset=dataset, metric="accuracy")
-    trainer.train()
-
-    model.save_pretrained(str(MODELO_PATH))
-    return model
-
-# Cargar modelo una vez al importar
-_modelo = cargar_o_entrenar_modelo()
+    import joblib
+
+    if CABEZA_PATH.exists():
+        guardado = joblib.load(CABEZA_PATH)
+        # Una cabeza entrenada con otro codificador no sirve para estos embeddings
+        if guardado.get("encoder") == NOMBRE_MODELO:
+            return guardado["cabeza"]
+    elif SETFIT_PATH.exists():
+        logger.warning(
+            "Se ignora el modelo SetFit de %s: el clasificador de prioridad es ahora una cabeza "
+            "sobre el codificador compartido y se entrena con los ejemplos incluidos. Si ese "
+            "modelo estaba ajustado con datos propios, reentrena la cabeza (%s).",
+            SETFIT_PATH, CABEZA_PATH,
+        )
+
+    cabeza = entrenar_cabeza()
+    CABEZA_PATH.parent.mkdir(parents=True, exist_ok=True)
+    joblib.dump({"encoder": NOMBRE_MODELO, "cabeza": cabeza}, CABEZA_PATH)
+    return cabeza
+
+# El modelo se carga en segundo plano desde el lifespan de la aplicación
+def calentar_cabeza(cabeza) -> None:
+    cabeza.predict(np.zeros((1, cabeza.n_features_in_), dtype=np.float32))
+
+gestor_prioridad = registrar_gestor(GestorModelo("prioridad", cargar_o_entrenar_modelo, calentar_cabeza))
+
+def modelo_listo() -> bool:
+    return gestor_prioridad.listo and gestor_encoder.listo
+
+def clasificar_embeddings(embeddings: np.ndarray) -> List[str]:
+    """Clasifica embeddings ya calculados (p. ej. los guardados para /group) sin pasar por el codificador."""
+    if len(embeddings) == 0:
+        return []
+    cabeza = gestor_prioridad.obtener(esperar=True)
+    return [str(etiqueta) for etiqueta in cabeza.predict(np.asarray(embeddings, dtype=np.float32))]
+
+def clasificar_prioridad_many(titulos: Sequence[str], batch_size: Optional[int] = None) -> List[str]:
+    """
+    Clasifica varios títulos: los codifica una sola vez con el codificador
+    compartido (en lotes de ``batch_size``, por defecto ``settings.AI_BATCH_SIZE``)
+    y aplica la cabeza sobre todos a la vez.
+    """
+    if not titulos:
+        return []
+    return clasificar_embeddings(calcular_embeddings(list(titulos), batch_size=batch_size or settings.AI_BATCH_SIZE))
 
 def clasificar_prioridad(titulo: str) -> str:
-    return _modelo.predict([titulo])[0]
+    return clasificar_prioridad_many([titulo])[0]
@@ -0,0 +1,137 @@
+"""
+Protocolo binario entre los workers de la API y el servidor de inferencia.
+
+Cada mensaje viaja en una trama ``longitud (u32) + cuerpo``, con enteros en
+orden de red. El cuerpo de una petición es ``operación (u8) + id (u32) +
+valor`` y el de una respuesta ``id (u32) + estado (u8) + valor``. Los valores
+empiezan por una etiqueta de un byte:
+
+- ``S``: lista de textos (u32 nº de textos y, por cada uno, u32 longitud + UTF-8)
+- ``M``: matriz float32 (u32 filas, u32 columnas y los datos en orden C)
+- ``J``: JSON UTF-8, para resultados pequeños con estructura (reformulaciones, estado)
+
+Los embeddings, que son la mayor parte del tráfico, viajan como bytes crudos
+sin serializar número a número.
+"""
+import asyncio
+import json
+import socket
+import struct
+from typing import Any, Tuple
+
+import numpy as np
+
+OP_EMBEDDINGS = 1
+OP_PRIORIDAD = 2
+OP_PRIORIDAD_EMBEDDINGS = 3
+OP_REFORMULAR = 4
+OP_ESTADO = 5
+OP_REFORMULAR_CACHE = 6
+OP_REFORMULACIONES_ACEPTADAS = 7
+
+ESTADO_OK = 0
+ESTADO_ERROR = 1
+ESTADO_SATURADO = 2
+
+# Límite defensivo: una trama mayor indica un cliente roto, no una petición real
+MAX_TRAMA = 256 * 1024 * 1024
+
+_U32 = struct.Struct("!I")
+_MATRIZ = struct.Struct("!II")
+_PETICION = struct.Struct("!BI")
+_RESPUESTA = struct.Struct("!IB")
+
+
+class ErrorProtocolo(ValueError):
+    """Trama mal formada o demasiado grande."""
+
+
+def codificar_valor(valor: Any) -> bytes:
+    if isinstance(valor, np.ndarray):
+        matriz = np.ascontiguousarray(valor, dtype=np.float32)
+        if matriz.ndim != 2:
+            raise ErrorProtocolo(f"Sólo se envían matrices 2D (recibida de {matriz.ndim} dimensiones).")
+        return b"M" + _MATRIZ.pack(*matriz.shape) + matriz.tobytes()
+    if isinstance(valor, (list, tuple)) and all(isinstance(texto, str) for texto in valor):
+        partes = [b"S", _U32.pack(len(valor))]
+        for texto in valor:
+            datos = texto.encode("utf-8")
+            partes += [_U32.pack(len(datos)), datos]
+        return b"".join(partes)
+    return b"J" + json.dumps(valor, ensure_ascii=False).encode("utf-8")
+
+
+def decodificar_valor(datos: bytes, inicio: int = 0) -> Any:
+    etiqueta = datos[inicio:inicio + 1]
+    posicion = inicio + 1
+    if etiqueta == b"M":
+        filas, columnas = _MATRIZ.unpack_from(datos, posicion)
+        return np.frombuffer(
+            datos, dtype=np.float32, count=filas * columnas, offset=posicion + _MATRIZ.size,
+        ).reshape(filas, columnas)
+    if etiqueta == b"S":
+        (total,) = _U32.unpack_from(datos, posicion)
+        posicion += _U32.size
+        textos = []
+        for _ in range(total):
+            (longitud,) = _U32.unpack_from(datos, posicion)
+            posicion += _U32.size
+            textos.append(bytes(datos[posicion:posicion + longitud]).decode("utf-8"))
+            posicion += longitud
+        return textos
+    if etiqueta == b"J":
+        return json.loads(bytes(datos[posicion:]).decode("utf-8"))
+    raise ErrorProtocolo(f"Etiqueta de valor desconocida: {etiqueta!r}")
+
+
+def _trama(cuerpo: bytes) -> bytes:
+    if len(cuerpo) > MAX_TRAMA:
+        raise ErrorProtocolo(f"Trama de {len(cuerpo)} bytes (máximo {MAX_TRAMA}).")
+    return _U32.pack(len(cuerpo)) + cuerpo
+
+
+def codificar_peticion(operacion: int, peticion_id: int, valor: Any) -> bytes:
+    return _trama(_PETICION.pack(operacion, peticion_id) + codificar_valor(valor))
+
+
+def decodificar_peticion(cuerpo: bytes) -> Tuple[int, int, Any]:
+    operacion, peticion_id = _PETICION.unpack_from(cuerpo)
+    return operacion, peticion_id, decodificar_valor(cuerpo, _PETICION.size)
+
+
+def codificar_respuesta(peticion_id: int, estado: int, valor: Any) -> bytes:
+    return _trama(_RESPUESTA.pack(peticion_id, estado) + codificar_valor(valor))
+
+
+def decodificar_respuesta(cuerpo: bytes) -> Tuple[int, int, Any]:
+    peticion_id, estado = _RESPUESTA.unpack_from(cuerpo)
+    return peticion_id, estado, decodificar_valor(cuerpo, _RESPUESTA.size)
+
+
+def _longitud(cabecera: bytes) -> int:
+    (longitud,) = _U32.unpack(cabecera)
+    if longitud > MAX_TRAMA:
+        raise ErrorProtocolo(f"Trama de {longitud} bytes (máximo {MAX_TRAMA}).")
+    return longitud
+
+
+def _recibir_exacto(conexion: socket.socket, n: int) -> bytes:
+    datos = bytearray(n)
+    vista = memoryview(datos)
+    recibidos = 0
+    while recibidos < n:
+        leidos = conexion.recv_into(vista[recibidos:])
+        if not leidos:
+            raise ConnectionError("El servidor de inferencia cerró la conexión.")
+        recibidos += leidos
+    return bytes(datos)
+
+
+def leer_trama(conexion: socket.socket) -> bytes:
+    """Lee una trama completa de un socket bloqueante (lado cliente)."""
+    return _recibir_exacto(conexion, _longitud(_recibir_exacto(conexion, _U32.size)))
+
+
+async def leer_trama_async(lector: asyncio.StreamReader) -> bytes:
+    """Lee una trama completa de un stream de asyncio (lado servidor)."""
+    return await lector.readexactly(_longitud(await lector.readexactly(_U32.size)))
@@ -1,39 +1,264 @@
-from transformers import pipeline
+import hashlib
+import json
+from functools import lru_cache
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, Union
 
-# Cargar modelos
-traductor_es_en = pipeline("translation", model="Helsinki-NLP/opus-mt-es-en")
-traductor_en_es = pipeline("translation", model="Helsinki-NLP/opus-mt-en-es")
-parafraseador_en = pipeline("text2text-generation", model="humarin/chatgpt_paraphraser_on_T5_base")
+from app.core.config import settings
+from app.services.AI.batching import ejecutar_por_lotes
+from app.services.AI.cache import CacheLRU, normalizar_titulo
+from app.services.AI.model_manager import GestorModelo, ModeloNoDisponible, registrar_gestor
+from app.services.AI.rewrite_gate import (
+    COMPLETO,
+    CORTO,
+    SIN_TRADUCCION,
+    YA_REFORMULADO,
+    ContadoresReformulacion,
+    contadores_reformulacion,
+    decidir,
+    registrar_reformulacion_aceptada,
+)
 
-def reformular_titulo_con_traduccion(titulo: str) -> dict:
-    try:
-        # ES → EN
-        traducido_en = traductor_es_en(titulo, max_length=100)[0]["translation_text"]
-
-        # Parafrasear en inglés
-        prompt = f"paraphrase: {traducido_en}"
-        parafraseado_en = parafraseador_en(prompt, max_length=100, do_sample=True)[0]["generated_text"].strip()
-
-        # EN → ES
-        reformulado_es = traductor_en_es(parafraseado_en, max_length=100)[0]["translation_text"].strip()
-
-        # Validación mínima
-        if reformulado_es.lower() == titulo.strip().lower():
-            return {
-                "reformulada": reformulado_es,
-                "cambio": False,
-                "motivo": "No se sugirieron cambios por la IA (traducción y reformulación)."
-            }
-        else:
-            return {
-                "reformulada": reformulado_es,
-                "cambio": True,
-                "motivo": "Reformulación generada mediante traducción y IA."
-            }
+MODELOS = {
+    "es_en": "Helsinki-NLP/opus-mt-es-en",
+    "en_es": "Helsinki-NLP/opus-mt-en-es",
+    "parafraseo": "humarin/chatgpt_paraphraser_on_T5_base",
+}
+
+def cargar_pipelines() -> Dict[str, Callable]:
+    from transformers import pipeline
+
+    # Cargar modelos
+    return {
+        "es_en": pipeline("translation", model=MODELOS["es_en"]),
+        "en_es": pipeline("translation", model=MODELOS["en_es"]),
+        "parafraseo": pipeline("text2text-generation", model=MODELOS["parafraseo"]),
+    }
+
+def calentar_pipelines(modelos: Dict[str, Callable]) -> None:
+    # Un título por las tres etapas, sin pasar por la caché de reformulaciones
+    _reformular(modelos, ["Comprar pan para la cena"], 1, parametros_decodificacion())
+
+gestor_reformulador = registrar_gestor(GestorModelo("reformulador", cargar_pipelines, calentar_pipelines))
+
+# (pipeline, clave de salida, preparación de la entrada, parámetros de generación)
+ETAPAS = [
+    # ES → EN
+    ("es_en", "translation_text", lambda texto: texto, {"max_length": 100}),
+    # Parafrasear en inglés
+    ("parafraseo", "generated_text", lambda texto: f"paraphrase: {texto}", {"max_length": 100}),
+    # EN → ES
+    ("en_es", "translation_text", lambda texto: texto, {"max_length": 100}),
+]
+# Etapa por la que empieza cada decisión de la puerta
+INICIO_ETAPA = {COMPLETO: 0, SIN_TRADUCCION: 1}
+
+MOTIVOS_PUERTA = {
+    CORTO: "Título breve: la reformulación no lo mejoraría.",
+    YA_REFORMULADO: "El título ya es una reformulación sugerida por la IA.",
+}
 
-    except Exception as e:
+def parametros_decodificacion() -> dict:
+    """
+    Decodificación sin muestreo: el mismo título produce siempre la misma
+    reformulación, lo que permite cachear el resultado.
+    """
+    if settings.AI_REWRITE_DECODING == "greedy":
+        return {"do_sample": False, "num_beams": 1}
+    return {"do_sample": False, "num_beams": settings.AI_REWRITE_NUM_BEAMS, "early_stopping": True}
+
+def clave_reformulacion(titulo: str, decodificacion: Optional[dict] = None, inicio: int = 0) -> str:
+    """Hash de (título normalizado, modelos, parámetros de decodificación y etapa inicial)."""
+    partes = [normalizar_titulo(titulo), MODELOS, decodificacion or parametros_decodificacion()]
+    if inicio:
+        partes.append(inicio)
+    contenido = json.dumps(partes, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(contenido.encode("utf-8")).hexdigest()
+
+@lru_cache(maxsize=1)
+def obtener_cache_reformulaciones() -> CacheLRU[str, str]:
+    return CacheLRU(settings.AI_REWRITE_CACHE_ENTRIES, ttl=settings.AI_REWRITE_CACHE_TTL_SECONDS)
+
+def _resultado(titulo: str, reformulado_es: str, decision: str = COMPLETO) -> dict:
+    # Validación mínima
+    if reformulado_es.lower() == titulo.strip().lower():
         return {
-            "reformulada": titulo,
+            "reformulada": reformulado_es,
             "cambio": False,
-            "motivo": f"Error durante la reformulación: {e}"
+            "motivo": "No se sugirieron cambios por la IA (traducción y reformulación)."
         }
+    return {
+        "reformulada": reformulado_es,
+        "cambio": True,
+        "motivo": (
+            "Reformulación generada mediante IA (título en inglés, sin traducción previa)."
+            if decision == SIN_TRADUCCION else "Reformulación generada mediante traducción y IA."
+        )
+    }
+
+def _sin_cambios(titulo: str, decision: str) -> dict:
+    return {"reformulada": titulo.strip(), "cambio": False, "motivo": MOTIVOS_PUERTA[decision]}
+
+def _error(titulo: str, error: Exception) -> dict:
+    return {
+        "reformulada": titulo,
+        "cambio": False,
+        "motivo": f"Error durante la reformulación: {error}"
+    }
+
+def _ejecutar_etapa(pipe: Callable, textos: List[str], clave: str, tamano_lote: int, **kwargs) -> list:
+    def aplicar(lote: List[str]) -> List[str]:
+        salidas = pipe(lote, batch_size=len(lote), **kwargs)
+        # Los pipelines devuelven un dict por entrada (o una lista de un elemento)
+        return [(salida[0] if isinstance(salida, list) else salida)[clave].strip() for salida in salidas]
+
+    return ejecutar_por_lotes(aplicar, textos, tamano_lote)
+
+def _reformular(
+        modelos: Dict[str, Callable],
+        textos: List[str],
+        tamano_lote: int,
+        decodificacion: dict,
+        inicios: Optional[List[int]] = None,
+        contadores: Optional[ContadoresReformulacion] = None,
+) -> List[Union[str, Exception]]:
+    """
+    Pasa ``textos`` por las tres etapas, cada uno desde su etapa de
+    ``inicios`` (por defecto la primera); cada posición acaba en texto o en
+    excepción.
+    """
+    salidas: List[Union[str, Exception]] = list(textos)
+    inicios = inicios or [0] * len(textos)
+    # Textos que siguen en el pipeline: índice → texto de la etapa actual
+    actuales = dict(enumerate(textos))
+
+    for etapa, (nombre, clave, preparar, parametros) in enumerate(ETAPAS):
+        indices = [i for i in actuales if inicios[i] <= etapa]
+        if not indices:
+            continue
+        if contadores is not None:
+            contadores.registrar_etapa(nombre, len(indices))
+        resultados = _ejecutar_etapa(
+            modelos[nombre], [preparar(actuales[i]) for i in indices], clave, tamano_lote,
+            **parametros, **decodificacion,
+        )
+        for i, resultado in zip(indices, resultados):
+            if isinstance(resultado, Exception):
+                salidas[i] = resultado
+                del actuales[i]
+            else:
+                actuales[i] = resultado
+
+    for i, texto in actuales.items():
+        salidas[i] = texto
+    return salidas
+
+def reformular_titulos(titulos: Sequence[str], batch_size: Optional[int] = None) -> List[dict]:
+    """
+    Reformula varios títulos pasando cada etapa (ES→EN, paráfrasis, EN→ES)
+    por lotes de títulos de longitud parecida. Un título que falla en una
+    etapa devuelve su error y no continúa, sin afectar al resto del lote.
+
+    Los títulos ya reformulados con los mismos modelos y parámetros se sirven
+    desde la caché sin cargar ni ejecutar ningún modelo; los errores no se cachean.
+
+    Con ``AI_REWRITE_GATE`` cada título pasa antes por la puerta de
+    ``rewrite_gate``: los cortos o ya reformulados se devuelven sin cambios
+    y los que están en inglés se saltan la traducción ES→EN.
+    """
+    if not titulos:
+        return []
+    tamano_lote = batch_size or settings.AI_REWRITE_BATCH_SIZE
+    decodificacion = parametros_decodificacion()
+    cache = obtener_cache_reformulaciones()
+    contadores = contadores_reformulacion
+    contadores.registrar_titulos(len(titulos), len(ETAPAS))
+
+    decisiones = [decidir(titulo) if settings.AI_REWRITE_GATE else COMPLETO for titulo in titulos]
+    claves: List[Optional[str]] = []
+    salidas: Dict[str, Union[str, Exception]] = {}
+    # clave → (título normalizado, etapa inicial)
+    pendientes: Dict[str, Tuple[str, int]] = {}
+    for titulo, decision in zip(titulos, decisiones):
+        contadores.registrar_decision(decision)
+        if decision not in INICIO_ETAPA:
+            claves.append(None)
+            continue
+        inicio = INICIO_ETAPA[decision]
+        clave = clave_reformulacion(titulo, decodificacion, inicio)
+        claves.append(clave)
+        if clave in salidas or clave in pendientes:
+            continue
+        reformulado = cache.obtener(clave)
+        if reformulado is None:
+            pendientes[clave] = (normalizar_titulo(titulo), inicio)
+        else:
+            contadores.registrar_cache()
+            salidas[clave] = reformulado
+
+    if pendientes:
+        try:
+            modelos = gestor_reformulador.obtener(esperar=True)
+        except ModeloNoDisponible as e:
+            nuevas = [e] * len(pendientes)
+        else:
+            textos, inicios = zip(*pendientes.values())
+            nuevas = _reformular(modelos, list(textos), tamano_lote, decodificacion, list(inicios), contadores)
+        for clave, salida in zip(pendientes, nuevas):
+            salidas[clave] = salida
+            if not isinstance(salida, Exception):
+                cache.guardar(clave, salida)
+
+    resultados = []
+    for clave, titulo, decision in zip(claves, titulos, decisiones):
+        if clave is None:
+            resultados.append(_sin_cambios(titulo, decision))
+            continue
+        salida = salidas[clave]
+        resultados.append(
+            _error(titulo, salida) if isinstance(salida, Exception) else _resultado(titulo, salida, decision)
+        )
+    return resultados
+
+def reformular_desde_cache(titulos: Sequence[str]) -> List[Optional[dict]]:
+    """
+    Resultados que no necesitan ningún modelo: los que resuelve la puerta y
+    los que están en la caché. ``None`` para el resto. Es el nivel "caché"
+    cuando vence el plazo de una petición.
+    """
+    decodificacion = parametros_decodificacion()
+    cache = obtener_cache_reformulaciones()
+    resultados: List[Optional[dict]] = []
+    for titulo in titulos:
+        decision = decidir(titulo) if settings.AI_REWRITE_GATE else COMPLETO
+        if decision not in INICIO_ETAPA:
+            resultados.append(_sin_cambios(titulo, decision))
+            continue
+        reformulado = cache.obtener(clave_reformulacion(titulo, decodificacion, INICIO_ETAPA[decision]))
+        resultados.append(None if reformulado is None else _resultado(titulo, reformulado, decision))
+    return resultados
+
+def registrar_aceptadas(cambios: Sequence[Sequence[str]]) -> List[bool]:
+    """
+    Recibe los cambios de título ``(anterior, nuevo)`` que guardó el usuario y
+    marca como aceptados los que coinciden con la sugerencia en caché para el
+    título anterior: ``decidir`` ya no los vuelve a reformular. Devuelve si se
+    aceptó cada uno.
+
+    La sugerencia se busca en la caché de este proceso; con varios workers
+    locales sólo se reconoce en el que la sugirió (con el servidor de
+    inferencia la caché es común).
+    """
+    sugerencias = reformular_desde_cache([anterior for anterior, _ in cambios])
+    aceptadas = []
+    for (_, nuevo), sugerencia in zip(cambios, sugerencias):
+        aceptada = (
+            sugerencia is not None and sugerencia["cambio"]
+            and normalizar_titulo(sugerencia["reformulada"]).lower() == normalizar_titulo(nuevo).lower()
+        )
+        if aceptada:
+            registrar_reformulacion_aceptada(nuevo)
+        aceptadas.append(aceptada)
+    return aceptadas
+
+def reformular_titulo_con_traduccion(titulo: str) -> dict:
+    return reformular_titulos([titulo])[0]
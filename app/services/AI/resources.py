@@ -0,0 +1,153 @@
+"""
+Reparto de los núcleos de CPU entre los workers que hacen inferencia.
+
+PyTorch usa por defecto todos los núcleos de la máquina en cada operación
+(hilos intra-op) y los tokenizadores rápidos crean además sus propios hilos:
+con varios workers en la misma máquina hay muchos más hilos que núcleos y el
+rendimiento se desploma. Con ``AI_CPU_CORES_PER_WORKER`` cada proceso se
+ajusta a su presupuesto al arrancar (``configurar_recursos``):
+
+- el ejecutor de inferencia tiene como mucho un hilo por núcleo
+  (``AI_EXECUTOR_WORKERS`` pasa a ser el máximo);
+- cada hilo del ejecutor usa ``núcleos // hilos`` hilos intra-op de PyTorch,
+  OpenMP/MKL y ONNX Runtime, y uno inter-op;
+- se desactiva el paralelismo de los tokenizadores.
+
+Con ``AI_CPU_PINNING`` el proceso se fija además (``os.sched_setaffinity``,
+sólo Linux) al primer bloque de núcleos que no tenga otro worker. El bloque
+se reserva con un cerrojo de fichero que el sistema libera al morir el
+proceso, así que un worker que gunicorn reinicia ocupa el hueco del anterior.
+
+Con presupuesto 0 no se toca nada y cada librería usa sus valores por
+defecto. ``/health/ready`` muestra la configuración efectiva.
+"""
+import logging
+import os
+import sys
+import tempfile
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Fichero del bloque de núcleos reservado: mientras siga abierto, es nuestro
+_cerrojo = None
+
+
+def cpus_disponibles() -> List[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def presupuesto() -> int:
+    """Núcleos de este proceso; 0 si no hay reparto."""
+    if settings.AI_CPU_CORES_PER_WORKER <= 0:
+        return 0
+    return min(settings.AI_CPU_CORES_PER_WORKER, len(cpus_disponibles()))
+
+
+def hilos_ejecutor() -> int:
+    nucleos = presupuesto()
+    return max(1, min(settings.AI_EXECUTOR_WORKERS, nucleos)) if nucleos else settings.AI_EXECUTOR_WORKERS
+
+
+def hilos_intra_op() -> Optional[int]:
+    """Hilos por inferencia que caben en el presupuesto; ``None`` sin reparto."""
+    nucleos = presupuesto()
+    return max(1, nucleos // hilos_ejecutor()) if nucleos else None
+
+
+def opciones_onnx() -> Dict[str, Any]:
+    """``model_kwargs`` para ONNX Runtime con los hilos del presupuesto (vacío sin reparto)."""
+    hilos = hilos_intra_op()
+    if hilos is None:
+        return {}
+    import onnxruntime
+
+    opciones = onnxruntime.SessionOptions()
+    opciones.intra_op_num_threads = hilos
+    opciones.inter_op_num_threads = 1
+    return {"session_options": opciones}
+
+
+def _reservar_bloque(nucleos: int) -> Optional[List[int]]:
+    global _cerrojo
+    import fcntl
+
+    cpus = cpus_disponibles()
+    for indice in range(len(cpus) // nucleos):
+        fichero = open(os.path.join(tempfile.gettempdir(), f"prioritask-cpu-{indice}.lock"), "w")
+        try:
+            fcntl.flock(fichero, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fichero.close()
+            continue
+        _cerrojo = fichero
+        return cpus[indice * nucleos:(indice + 1) * nucleos]
+    return None
+
+
+def _fijar_nucleos(nucleos: int) -> None:
+    if _cerrojo is not None:
+        return
+    if not hasattr(os, "sched_setaffinity"):
+        logger.warning("AI_CPU_PINNING no está disponible en esta plataforma; se ignora.")
+        return
+    bloque = _reservar_bloque(nucleos)
+    if bloque is None:
+        logger.warning("No queda ningún bloque libre de %s núcleos; el proceso no se fija.", nucleos)
+        return
+    os.sched_setaffinity(0, bloque)
+    logger.info("Proceso %s fijado a los núcleos %s", os.getpid(), bloque)
+
+
+def _configurar_torch(hilos: int) -> None:
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(hilos)
+    try:
+        torch.set_num_interop_threads(1)
+    except RuntimeError:
+        # Sólo se puede fijar una vez y antes del primer trabajo inter-op
+        logger.warning("PyTorch ya había iniciado sus hilos inter-op; se mantienen %s.", torch.get_num_interop_threads())
+
+
+def configurar_recursos(usar_torch: bool = True) -> Dict[str, Any]:
+    """
+    Aplica el presupuesto de ``AI_CPU_CORES_PER_WORKER`` a este proceso. Se
+    llama al arrancar cada worker (después del ``fork``) antes de cargar los
+    modelos; con ``usar_torch=False`` no importa PyTorch.
+    """
+    nucleos = presupuesto()
+    if nucleos:
+        if settings.AI_CPU_PINNING:
+            _fijar_nucleos(nucleos)
+        hilos = hilos_intra_op()
+        os.environ["TOKENIZERS_PARALLELISM"] = "false"
+        for variable in ("OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+            os.environ[variable] = str(hilos)
+        if usar_torch:
+            _configurar_torch(hilos)
+    configuracion = estado_recursos()
+    logger.info("Recursos de inferencia: %s", configuracion)
+    return configuracion
+
+
+def estado_recursos() -> Dict[str, Any]:
+    """Configuración efectiva de este proceso."""
+    # Sólo si ya está importado: consultar no debe cargar PyTorch
+    torch = sys.modules.get("torch")
+    return {
+        "nucleos_por_worker": presupuesto() or None,
+        "cpus": cpus_disponibles(),
+        "fijado": _cerrojo is not None,
+        "hilos_ejecutor": hilos_ejecutor(),
+        "hilos_intra_op": torch.get_num_threads() if torch is not None else hilos_intra_op(),
+        "hilos_inter_op": torch.get_num_interop_threads() if torch is not None else None,
+        "tokenizers_parallelism": os.environ.get("TOKENIZERS_PARALLELISM"),
+        "omp_num_threads": os.environ.get("OMP_NUM_THREADS"),
+    }
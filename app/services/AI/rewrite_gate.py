@@ -0,0 +1,129 @@
+"""
+Puerta previa al reformulador: decide, sin ejecutar ningún modelo, qué
+títulos necesitan el pipeline completo (ES→EN, paráfrasis, EN→ES).
+
+- Títulos cortos (menos de ``AI_REWRITE_MIN_WORDS`` palabras, p. ej.
+  "Comprar pan") o sin letras: el pipeline no puede aclararlos y se
+  devuelven tal cual.
+- Títulos que son una reformulación que el usuario aceptó (guardó la
+  sugerencia como título de la tarea): reformularlos otra vez sólo los
+  deformaría. Una sugerencia que el usuario no guarda no cuenta.
+- Títulos en inglés: se saltan la traducción ES→EN y empiezan en la paráfrasis.
+
+La identificación de idioma cuenta palabras funcionales y rasgos ortográficos
+de cada idioma: basta para títulos de tarea y cuesta microsegundos. Ante la
+duda el título sigue el pipeline completo.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+from app.core.config import settings
+from app.services.AI.cache import CacheLRU, normalizar_titulo
+
+# Decisiones de la puerta
+COMPLETO = "completo"
+SIN_TRADUCCION = "sin_traduccion"
+CORTO = "corto"
+YA_REFORMULADO = "ya_reformulado"
+
+_PALABRAS_ES = frozenset(
+    "el la los las lo del de para con por que y o en un una unos unas mi mis tu tus su sus al se es".split()
+)
+_PALABRAS_EN = frozenset(
+    "the to and or for of with my your his her our their in on at is are be it this that from an".split()
+)
+_RASGOS_ES = re.compile(r"[ñáéíóúü¿¡]")
+_PALABRA = re.compile(r"[^\W\d_]+")
+
+
+def detectar_idioma(titulo: str) -> Optional[str]:
+    """``"es"``, ``"en"`` o ``None`` si no hay indicios suficientes."""
+    texto = titulo.lower()
+    palabras = _PALABRA.findall(texto)
+    es = sum(palabra in _PALABRAS_ES for palabra in palabras) + 2 * len(_RASGOS_ES.findall(texto))
+    en = sum(palabra in _PALABRAS_EN for palabra in palabras) + sum(
+        len(palabra) > 4 and palabra.endswith("ing") for palabra in palabras
+    )
+    if es > en:
+        return "es"
+    if en > es:
+        return "en"
+    return None
+
+
+@lru_cache(maxsize=1)
+def obtener_reformulaciones_aceptadas() -> CacheLRU[str, bool]:
+    """
+    Títulos (normalizados) que el usuario guardó tal como los sugirió el
+    reformulador de este proceso (``reformulator.registrar_aceptadas``).
+    """
+    return CacheLRU(settings.AI_REWRITE_CACHE_ENTRIES, ttl=settings.AI_REWRITE_CACHE_TTL_SECONDS)
+
+
+def registrar_reformulacion_aceptada(titulo: str) -> None:
+    obtener_reformulaciones_aceptadas().guardar(normalizar_titulo(titulo).lower(), True)
+
+
+def decidir(titulo: str) -> str:
+    """Qué parte del pipeline necesita ``titulo``."""
+    if len(_PALABRA.findall(titulo)) < settings.AI_REWRITE_MIN_WORDS:
+        return CORTO
+    if obtener_reformulaciones_aceptadas().obtener(normalizar_titulo(titulo).lower()):
+        return YA_REFORMULADO
+    if detectar_idioma(titulo) == "en":
+        return SIN_TRADUCCION
+    return COMPLETO
+
+
+class ContadoresReformulacion:
+    """Cuántos títulos resolvió cada atajo y cuántos textos pasaron por cada etapa."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self) -> None:
+        with self._lock:
+            self.titulos = 0
+            self.cache = 0
+            self.decisiones: Dict[str, int] = {CORTO: 0, YA_REFORMULADO: 0, SIN_TRADUCCION: 0, COMPLETO: 0}
+            self.etapas: Dict[str, int] = {}
+            self.etapas_posibles = 0
+
+    def registrar_titulos(self, titulos: int, etapas_por_titulo: int) -> None:
+        with self._lock:
+            self.titulos += titulos
+            self.etapas_posibles += titulos * etapas_por_titulo
+
+    def registrar_decision(self, decision: str) -> None:
+        with self._lock:
+            self.decisiones[decision] += 1
+
+    def registrar_cache(self) -> None:
+        with self._lock:
+            self.cache += 1
+
+    def registrar_etapa(self, nombre: str, textos: int) -> None:
+        with self._lock:
+            self.etapas[nombre] = self.etapas.get(nombre, 0) + textos
+
+    def resumen(self) -> Dict[str, Any]:
+        with self._lock:
+            ejecutadas = sum(self.etapas.values())
+            return {
+                "titulos": self.titulos,
+                "cache": self.cache,
+                "decisiones": dict(self.decisiones),
+                "etapas": dict(self.etapas),
+                # Ejecuciones de etapa ahorradas por la puerta, la caché y los duplicados
+                "etapas_evitadas": self.etapas_posibles - ejecutadas,
+            }
+
+
+contadores_reformulacion = ContadoresReformulacion()
+
+
+def metricas_reformulacion() -> Dict[str, Any]:
+    return contadores_reformulacion.resumen()
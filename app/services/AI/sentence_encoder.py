@@ -0,0 +1,48 @@
+"""
+Codificador de frases compartido por todos los servicios de IA.
+
+El agrupador y el clasificador de prioridad usan el mismo MiniLM: se carga
+una sola vez por proceso (en segundo plano, vía el registro de modelos) y
+cada título se codifica una sola vez. Sus embeddings sirven tanto para la
+similitud como de entrada a la cabeza de clasificación de prioridad.
+"""
+from typing import List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.services.AI.embedding_cache import obtener_cache_embeddings
+from app.services.AI.encoders import cargar_encoder, identificador_encoder
+from app.services.AI.model_manager import GestorModelo, registrar_gestor
+
+MODELO_BASE = "paraphrase-multilingual-MiniLM-L12-v2"
+# Incluye el backend: cambiarlo invalida los embeddings guardados
+NOMBRE_MODELO = identificador_encoder(MODELO_BASE)
+
+def calentar_encoder(modelo) -> None:
+    # Un título suelto y un lote completo, directamente al modelo (sin caché)
+    frases = ["Comprar pan", "Pagar la factura de la luz antes del viernes"]
+    modelo.encode(frases[:1], convert_to_numpy=True, normalize_embeddings=True)
+    modelo.encode(
+        [frases[i % 2] for i in range(settings.AI_BATCH_SIZE)],
+        batch_size=settings.AI_BATCH_SIZE,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    )
+
+gestor_encoder = registrar_gestor(GestorModelo("encoder", lambda: cargar_encoder(MODELO_BASE), calentar_encoder))
+
+def encoder_listo() -> bool:
+    return gestor_encoder.listo
+
+def calcular_embeddings(titulos: List[str], batch_size: Optional[int] = None) -> np.ndarray:
+    """Embeddings normalizados; sólo los títulos que no estén en caché llegan al modelo."""
+    def codificar(pendientes: List[str]) -> np.ndarray:
+        return gestor_encoder.obtener(esperar=True).encode(
+            pendientes,
+            batch_size=batch_size or settings.AI_BATCH_SIZE,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+        )
+
+    return obtener_cache_embeddings().obtener_o_calcular(NOMBRE_MODELO, titulos, codificar)
@@ -0,0 +1,242 @@
+"""
+Agrupación de tareas a partir de sus embeddings.
+
+La matriz de similitud coseno se calcula con productos de matrices sobre
+embeddings normalizados, por bloques de filas para acotar la memoria cuando
+hay miles de tareas. Nunca se materializa la matriz n×n completa.
+
+Para decenas de miles de tareas el modo ``kmeans`` (k-means esférico por
+mini-lotes) evita comparar todas las tareas entre sí: sólo compara cada una
+con los centros, y no depende del orden de las tareas ni de un umbral fijo.
+"""
+import math
+from typing import Iterator, List, Literal, Optional, Sequence, Tuple
+
+import numpy as np
+
+ModoAgrupacion = Literal["voraz", "componentes", "kmeans"]
+
+# Nº máximo de similitudes (float32) calculadas a la vez: 2**24 ≈ 64 MB
+MAX_ELEMENTOS_BLOQUE = 1 << 24
+
+
+def normalizar(embeddings) -> np.ndarray:
+    """Convierte a float32 y normaliza cada fila a norma L2 unitaria."""
+    matriz = np.asarray(embeddings, dtype=np.float32)
+    if matriz.ndim != 2:
+        raise ValueError("Se esperaba una matriz de embeddings de dos dimensiones.")
+    normas = np.linalg.norm(matriz, axis=1, keepdims=True)
+    normas[normas == 0] = 1.0
+    return matriz / normas
+
+
+def _filas_por_bloque(n: int, max_elementos: int) -> int:
+    return max(1, min(n, max_elementos // max(n, 1)))
+
+
+def _bloques(n: int, filas: int) -> Iterator[Tuple[int, int]]:
+    for inicio in range(0, n, filas):
+        yield inicio, min(inicio + filas, n)
+
+
+def agrupar_voraz(
+        embeddings,
+        umbral: float = 0.4,
+        max_elementos_bloque: int = MAX_ELEMENTOS_BLOQUE,
+) -> List[List[int]]:
+    """
+    Agrupación voraz por orden de aparición.
+
+    Cada tarea aún libre abre un grupo y se lleva todas las tareas posteriores
+    libres cuya similitud con ella sea ``>= umbral``. Devuelve listas de índices.
+    """
+    normalizados = normalizar(embeddings)
+    n = normalizados.shape[0]
+    usados = np.zeros(n, dtype=bool)
+    grupos: List[List[int]] = []
+
+    for inicio, fin in _bloques(n, _filas_por_bloque(n, max_elementos_bloque)):
+        if usados[inicio:fin].all():
+            continue
+        similares = (normalizados[inicio:fin] @ normalizados.T) >= umbral
+        for i in range(inicio, fin):
+            if usados[i]:
+                continue
+            miembros = similares[i - inicio] & ~usados
+            miembros[: i + 1] = False
+            indices = np.flatnonzero(miembros)
+            usados[i] = True
+            usados[indices] = True
+            grupos.append([i, *indices.tolist()])
+
+    return grupos
+
+
+def agrupar_componentes(
+        embeddings,
+        umbral: float = 0.4,
+        max_elementos_bloque: int = MAX_ELEMENTOS_BLOQUE,
+) -> List[List[int]]:
+    """
+    Componentes conexas del grafo ``similitud >= umbral``.
+
+    A diferencia del modo voraz no depende del orden de las tareas: dos tareas
+    quedan juntas si existe una cadena de tareas similares entre ellas.
+    """
+    normalizados = normalizar(embeddings)
+    n = normalizados.shape[0]
+    etiquetas = np.full(n, -1, dtype=np.int64)
+    filas = _filas_por_bloque(n, max_elementos_bloque)
+    componente = 0
+
+    for semilla in range(n):
+        if etiquetas[semilla] >= 0:
+            continue
+        etiquetas[semilla] = componente
+        frontera = np.array([semilla])
+        # Recorrido en anchura: cada tarea entra en la frontera una sola vez
+        while frontera.size:
+            nuevos = []
+            for inicio, fin in _bloques(frontera.size, filas):
+                vecinos = ((normalizados[frontera[inicio:fin]] @ normalizados.T) >= umbral).any(axis=0)
+                indices = np.flatnonzero(vecinos & (etiquetas < 0))
+                etiquetas[indices] = componente
+                nuevos.append(indices)
+            frontera = np.concatenate(nuevos)
+        componente += 1
+
+    return _grupos_de_etiquetas(etiquetas)
+
+
+def _grupos_de_etiquetas(etiquetas: np.ndarray) -> List[List[int]]:
+    """Índices por etiqueta, ordenados y con los grupos por su primer índice."""
+    if not etiquetas.size:
+        return []
+    orden = np.argsort(etiquetas, kind="stable")
+    cortes = np.flatnonzero(np.diff(etiquetas[orden])) + 1
+    return sorted((grupo.tolist() for grupo in np.split(orden, cortes)), key=lambda grupo: grupo[0])
+
+
+def _centros_iniciales(datos: np.ndarray, k: int, rng: np.random.Generator, tamano_muestra: int) -> np.ndarray:
+    """k-means++ sobre una muestra de las filas (distancia coseno)."""
+    muestra = datos[rng.choice(len(datos), size=min(len(datos), tamano_muestra), replace=False)]
+    centros = [muestra[rng.integers(len(muestra))]]
+    distancias = np.maximum(1.0 - muestra @ centros[0], 0.0)
+    for _ in range(1, k):
+        pesos = distancias ** 2
+        total = float(pesos.sum())
+        # Si todas las filas coinciden con algún centro no hay a dónde repartir
+        if total <= 0:
+            break
+        centros.append(muestra[rng.choice(len(muestra), p=pesos / total)])
+        distancias = np.minimum(distancias, np.maximum(1.0 - muestra @ centros[-1], 0.0))
+    return np.stack(centros)
+
+
+def _asignar(datos: np.ndarray, centros: np.ndarray, max_elementos_bloque: int) -> np.ndarray:
+    """Centro más similar de cada fila, por bloques de filas."""
+    etiquetas = np.empty(len(datos), dtype=np.int64)
+    filas = max(1, min(len(datos), max_elementos_bloque // max(len(centros), 1)))
+    for inicio, fin in _bloques(len(datos), filas):
+        etiquetas[inicio:fin] = np.argmax(datos[inicio:fin] @ centros.T, axis=1)
+    return etiquetas
+
+
+def agrupar_kmeans(
+        embeddings,
+        n_grupos: Optional[int] = None,
+        tamano_lote: int = 1024,
+        iteraciones: int = 100,
+        semilla: int = 0,
+        max_elementos_bloque: int = MAX_ELEMENTOS_BLOQUE,
+) -> List[List[int]]:
+    """
+    K-means esférico por mini-lotes (Sculley, 2010) sobre embeddings normalizados.
+
+    Cada iteración sólo mira ``tamano_lote`` filas al azar, así que el coste y
+    la memoria no dependen del nº de tareas salvo en la asignación final, que
+    va por bloques. Por defecto ``n_grupos`` es √(n/2). Los grupos vacíos se
+    descartan; el resultado es determinista para una misma ``semilla``.
+    """
+    datos = normalizar(embeddings)
+    n = datos.shape[0]
+    if n == 0:
+        return []
+    k = min(n, n_grupos or max(1, round(math.sqrt(n / 2))))
+    rng = np.random.default_rng(semilla)
+
+    centros = _centros_iniciales(datos, k, rng, max(10 * k, tamano_lote))
+    vistos = np.zeros(len(centros))
+    for _ in range(iteraciones):
+        lote = datos[rng.integers(0, n, size=min(tamano_lote, n))]
+        pertenencia = np.zeros((len(lote), len(centros)), dtype=np.float32)
+        pertenencia[np.arange(len(lote)), np.argmax(lote @ centros.T, axis=1)] = 1.0
+        cuentas = pertenencia.sum(axis=0)
+        sumas = pertenencia.T @ lote
+        vistos += cuentas
+        # Tasa de aprendizaje por centro: 1 / nº de filas que ha visto
+        tasa = (cuentas / np.maximum(vistos, 1))[:, None]
+        medias = sumas / np.maximum(cuentas, 1)[:, None]
+        nuevos = normalizar(centros + tasa * (medias - centros))
+        desplazamiento = float(np.max(np.abs(nuevos - centros)))
+        centros = nuevos
+        if desplazamiento < 1e-4:
+            break
+
+    return _grupos_de_etiquetas(_asignar(datos, centros, max_elementos_bloque))
+
+
+def limitar_tamano(
+        embeddings,
+        grupos: Sequence[Sequence[int]],
+        max_tamano: int,
+        semilla: int = 0,
+        max_elementos_bloque: int = MAX_ELEMENTOS_BLOQUE,
+) -> List[List[int]]:
+    """
+    Divide con k-means los grupos de más de ``max_tamano`` tareas hasta que
+    ninguno lo supere. Si las tareas de un grupo son indistinguibles se
+    reparten por orden.
+    """
+    if max_tamano < 1:
+        raise ValueError("El tamaño máximo de grupo debe ser al menos 1.")
+    datos = normalizar(embeddings)
+    resultado: List[List[int]] = []
+    pendientes = [list(grupo) for grupo in grupos]
+    while pendientes:
+        grupo = pendientes.pop()
+        if len(grupo) <= max_tamano:
+            resultado.append(grupo)
+            continue
+        k = math.ceil(len(grupo) / max_tamano)
+        # Pocos centros: bastan unas pocas iteraciones
+        subgrupos = agrupar_kmeans(datos[grupo], k, iteraciones=20, semilla=semilla, max_elementos_bloque=max_elementos_bloque)
+        if len(subgrupos) > 1:
+            pendientes.extend([grupo[i] for i in subgrupo] for subgrupo in subgrupos)
+        else:
+            resultado.extend(grupo[i:i + max_tamano] for i in range(0, len(grupo), max_tamano))
+    return sorted((sorted(grupo) for grupo in resultado), key=lambda grupo: grupo[0])
+
+
+def agrupar_indices(
+        embeddings,
+        umbral: float = 0.4,
+        modo: ModoAgrupacion = "voraz",
+        max_elementos_bloque: int = MAX_ELEMENTOS_BLOQUE,
+        max_tamano: Optional[int] = None,
+        n_grupos: Optional[int] = None,
+) -> List[List[int]]:
+    """``umbral`` se usa en ``voraz`` y ``componentes``; ``n_grupos`` sólo en ``kmeans``."""
+    if len(embeddings) == 0:
+        return []
+    if modo == "voraz":
+        grupos = agrupar_voraz(embeddings, umbral, max_elementos_bloque)
+    elif modo == "componentes":
+        grupos = agrupar_componentes(embeddings, umbral, max_elementos_bloque)
+    elif modo == "kmeans":
+        grupos = agrupar_kmeans(embeddings, n_grupos, max_elementos_bloque=max_elementos_bloque)
+    else:
+        raise ValueError(f"Modo de agrupación desconocido: {modo}")
+    if max_tamano is not None:
+        grupos = limitar_tamano(embeddings, grupos, max_tamano, max_elementos_bloque=max_elementos_bloque)
+    return grupos
@@ -1,42 +1,33 @@
 from collections import defaultdict
-from typing import List, Dict
-from sentence_transformers import SentenceTransformer, util
+from typing import List, Dict, Optional
+import numpy as np
 from app.models.task import Task
-
-model = SentenceTransformer("paraphrase-multilingual-MiniLM-L12-v2")
-
-def agrupar_tareas_por_similitud(tareas: List[Task], umbral: float = 0.4) -> Dict[str, List[Task]]:
+from app.services.AI.sentence_encoder import NOMBRE_MODELO, calcular_embeddings  # noqa: F401 - reexportados
+from app.services.AI.similarity import ModoAgrupacion, agrupar_indices
+
+def agrupar_tareas_por_similitud(
+        tareas: List[Task],
+        umbral: float = 0.4,
+        modo: ModoAgrupacion = "voraz",
+        embeddings: Optional[np.ndarray] = None,
+        max_tamano: Optional[int] = None,
+        n_grupos: Optional[int] = None,
+) -> Dict[str, List[Task]]:
     if not tareas:
         return {}
 
-    # Convertir títulos a una lista de textos
-    titulos = [t.titulo for t in tareas]
+    if embeddings is None:
+        # Convertir títulos a una lista de textos
+        titulos = [t.titulo for t in tareas]
 
-    # Calcular embeddings
-    embeddings = model.encode(titulos, convert_to_tensor=True)
+        # Embeddings ya normalizados: la similitud coseno es un producto escalar
+        embeddings = calcular_embeddings(titulos)
 
-    grupos = defaultdict(list)
-    usados = set()
-    grupo_idx = 1
-
-    for i, tarea in enumerate(tareas):
-        if i in usados:
-            continue
-        grupo_actual = [tarea]
-        usados.add(i)
-
-        for j in range(i + 1, len(tareas)):
-            if j in usados:
-                continue
-            similitud = util.cos_sim(embeddings[i], embeddings[j]).item()
-            if similitud >= umbral:
-                grupo_actual.append(tareas[j])
-                usados.add(j)
-
-        grupos[f"Grupo {grupo_idx}"] = grupo_actual
-        grupo_idx += 1
-
-    return grupos
+    grupos = agrupar_indices(embeddings, umbral=umbral, modo=modo, max_tamano=max_tamano, n_grupos=n_grupos)
+    return {
+        f"Grupo {grupo_idx}": [tareas[i] for i in indices]
+        for grupo_idx, indices in enumerate(grupos, start=1)
+    }
 
 
 
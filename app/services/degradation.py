@@ -0,0 +1,202 @@
+"""
+Plazo por petición para los endpoints de IA y escalera de degradación.
+
+Con ``deadline_ms`` (query) o ``X-Deadline-Ms`` (cabecera), o
+``AI_DEADLINE_MS`` por defecto, ``/prioritize``, ``/group`` y ``/rewrite``
+responden dentro del plazo. Lo que el modelo no termine a tiempo baja por la
+escalera
+
+    modelo → caché → heurística (``app.services.intelligence``)
+
+y cada elemento indica en ``nivel`` qué escalón lo sirvió. La inferencia no
+se puede interrumpir a mitad: el trabajo que vence el plazo termina en
+segundo plano y su resultado queda en las cachés y en la base de datos para
+la siguiente petición.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple
+from uuid import UUID
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models.task import Task
+from app.schemas.task import GroupedTasks, PrioritizedTask, RewrittenTask
+from app.services.AI.backend import reformular_desde_cache, reformular_titulos
+from app.services.AI.executor import ColaInferenciaLlena, ejecutar_inferencia
+from app.services.intelligence import detectar_grupos, priorizar, reescribir_titulos
+from app.services.task_clusters import grupos_guardados
+from app.services.task_priority import MOTIVO_HEURISTICA, prioridad_vigente, version_prioridad
+
+logger = logging.getLogger(__name__)
+
+NIVEL_MODELO = "modelo"
+NIVEL_CACHE = "cache"
+NIVEL_HEURISTICA = "heuristica"
+
+MOTIVO_PLAZO = "Plazo agotado: resultado estimado por heurística."
+
+# Trabajo del modelo que sigue en curso tras vencer el plazo (evita que el GC lo recoja)
+_en_segundo_plano: Set[asyncio.Task] = set()
+
+
+class Plazo:
+    """Instante límite de una petición (reloj monótono)."""
+
+    def __init__(self, segundos: float):
+        self.limite = time.monotonic() + segundos
+
+    def restante(self) -> float:
+        return max(0.0, self.limite - time.monotonic())
+
+
+def plazo_de_peticion(deadline_ms: Optional[int]) -> Optional[Plazo]:
+    """El plazo pedido o el de ``AI_DEADLINE_MS``; ``None`` si ninguno (sin límite)."""
+    milisegundos = deadline_ms or settings.AI_DEADLINE_MS
+    return Plazo(milisegundos / 1000) if milisegundos and milisegundos > 0 else None
+
+
+def _terminada(tarea: asyncio.Task) -> None:
+    _en_segundo_plano.discard(tarea)
+    if tarea.cancelled():
+        return
+    error = tarea.exception()
+    if error is not None and not isinstance(error, ColaInferenciaLlena):
+        logger.warning("El trabajo de IA fuera de plazo terminó con error: %s", error)
+
+
+async def dentro_de_plazo(trabajo: Awaitable, plazo: Plazo) -> Tuple[bool, Any]:
+    """
+    ``(True, resultado)`` si ``trabajo`` termina dentro del plazo y
+    ``(False, None)`` si no (o si el ejecutor está saturado). El trabajo no
+    se cancela.
+    """
+    tarea = asyncio.ensure_future(trabajo)
+    _en_segundo_plano.add(tarea)
+    tarea.add_done_callback(_terminada)
+    try:
+        return True, await asyncio.wait_for(asyncio.shield(tarea), plazo.restante())
+    except (asyncio.TimeoutError, ColaInferenciaLlena):
+        return False, None
+
+
+def nivel_prioridad(priorizada: PrioritizedTask) -> str:
+    """Nivel de una prioridad calculada sin plazo: la del modelo o la heurística mientras carga."""
+    return NIVEL_HEURISTICA if priorizada.motivo == MOTIVO_HEURISTICA else NIVEL_MODELO
+
+
+async def priorizar_con_plazo(
+        tasks: Sequence[Task],
+        plazo: Plazo,
+        priorizar_con_modelo: Callable[[], Awaitable[List[PrioritizedTask]]],
+) -> List[PrioritizedTask]:
+    """
+    ``priorizar_con_modelo`` debe usar su propia sesión: si vence el plazo
+    sigue guardando las prioridades en segundo plano.
+    """
+    terminado, priorizadas = await dentro_de_plazo(priorizar_con_modelo(), plazo)
+    if terminado:
+        por_id = {p.id: p for p in priorizadas}
+        return [
+            por_id[task.id].model_copy(update={"nivel": nivel_prioridad(por_id[task.id])})
+            for task in tasks if task.id in por_id
+        ]
+
+    version = version_prioridad()
+    resto = [task for task in tasks if not prioridad_vigente(task, version)]
+    heuristicas = {p.id: p for p in priorizar(resto)}
+    resultado = []
+    for task in tasks:
+        if task.id in heuristicas:
+            resultado.append(heuristicas[task.id].model_copy(update={"motivo": MOTIVO_PLAZO, "nivel": NIVEL_HEURISTICA}))
+        else:
+            resultado.append(PrioritizedTask(
+                id=task.id, titulo=task.titulo, prioridad=task.prioridad, motivo=task.prioridad_motivo, nivel=NIVEL_CACHE,
+            ))
+    return resultado
+
+
+async def agrupar_con_plazo(
+        session: AsyncSession,
+        tasks: Sequence[Task],
+        plazo: Plazo,
+        agrupar_con_modelo: Callable[[], Awaitable[Tuple[Dict[str, List[UUID]], Set[UUID]]]],
+) -> Dict[str, List[GroupedTasks]]:
+    """
+    El agrupamiento es global: o termina entero a tiempo o se sirven los
+    grupos guardados y, para las tareas sin grupo, el de palabras clave.
+    ``agrupar_con_modelo`` debe usar su propia sesión y devolver también los
+    ids servidos de los grupos guardados.
+    """
+    terminado, resultado = await dentro_de_plazo(agrupar_con_modelo(), plazo)
+    por_id = {task.id: task for task in tasks}
+    if terminado:
+        grupos, guardadas = resultado
+        return {
+            nombre: [
+                GroupedTasks(
+                    id=task_id, titulo=por_id[task_id].titulo,
+                    nivel=NIVEL_CACHE if task_id in guardadas else NIVEL_MODELO,
+                )
+                for task_id in ids
+            ]
+            for nombre, ids in grupos.items()
+        }
+
+    guardados, sin_grupo = await grupos_guardados(session, tasks)
+    respuesta = {
+        nombre: [GroupedTasks(id=task.id, titulo=task.titulo, nivel=NIVEL_CACHE) for task in tareas]
+        for nombre, tareas in guardados.items()
+    }
+    for task, nombre in zip(sin_grupo, detectar_grupos([task.titulo for task in sin_grupo])):
+        respuesta.setdefault(nombre, []).append(
+            GroupedTasks(id=task.id, titulo=task.titulo, nivel=NIVEL_HEURISTICA)
+        )
+    return respuesta
+
+
+def _reescrita(task_id: UUID, titulo: str, resultado: dict, nivel: str) -> RewrittenTask:
+    return RewrittenTask(
+        id=task_id, original=titulo, reformulada=resultado["reformulada"], motivo=resultado["motivo"], nivel=nivel,
+    )
+
+
+async def reescribir_con_plazo(tareas: Sequence[Tuple[UUID, str]], plazo: Plazo) -> List[RewrittenTask]:
+    """
+    Reformula por lotes de ``AI_REWRITE_BATCH_SIZE`` mientras quede plazo;
+    un título largo sólo retrasa su lote. Al vencer, el lote en curso sigue
+    en segundo plano (llena la caché) y los siguientes no se lanzan.
+    """
+    resultados: List[Optional[RewrittenTask]] = [None] * len(tareas)
+    indices = list(range(len(tareas)))
+    for inicio in range(0, len(indices), settings.AI_REWRITE_BATCH_SIZE):
+        lote = indices[inicio:inicio + settings.AI_REWRITE_BATCH_SIZE]
+        terminado, salidas = await dentro_de_plazo(
+            ejecutar_inferencia("reformulacion", reformular_titulos, [tareas[i][1] for i in lote]), plazo,
+        )
+        if not terminado:
+            break
+        for i, salida in zip(lote, salidas):
+            resultados[i] = _reescrita(*tareas[i], salida, NIVEL_MODELO)
+
+    pendientes = [i for i, resultado in enumerate(resultados) if resultado is None]
+    if pendientes:
+        # Fuera del ejecutor de IA: no debe esperar en su cola detrás de las inferencias
+        try:
+            en_cache = await asyncio.to_thread(reformular_desde_cache, [tareas[i][1] for i in pendientes])
+        except Exception as e:  # noqa: BLE001 - sin caché se baja a la heurística
+            logger.warning("Caché de reformulaciones no disponible: %s", e)
+            en_cache = [None] * len(pendientes)
+        heuristicas = reescribir_titulos([tareas[i][1] for i in pendientes])
+        for i, salida, heuristica in zip(pendientes, en_cache, heuristicas):
+            task_id, titulo = tareas[i]
+            if salida is not None:
+                resultados[i] = _reescrita(task_id, titulo, salida, NIVEL_CACHE)
+            else:
+                resultados[i] = RewrittenTask(
+                    id=task_id, original=titulo, reformulada=heuristica["reformulada"],
+                    motivo=MOTIVO_PLAZO, nivel=NIVEL_HEURISTICA,
+                )
+    return resultados
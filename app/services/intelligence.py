@@ -1,52 +1,137 @@
-from app.schemas.task import PrioritizedTask, RewrittenTask
+"""
+Backend rápido de los endpoints de IA: reglas de palabras clave y fechas, sin
+cargar ningún modelo (microsegundos por tarea).
+
+Se elige para todo el despliegue (``AI_BACKEND=rapido``: los workers no cargan
+ni calientan modelos) o por petición (``?backend=rapido``). Es también el
+último escalón de la degradación por plazo (``app.services.degradation``).
+
+Como los modelos, trabaja por lotes: las palabras clave de prioridad y de
+grupo se buscan con una sola pasada del motor de expresiones regulares sobre
+todos los títulos (``MotorPalabrasClave.buscar_varios``).
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+from pydantic import BaseModel, Field
+
 from app.models.task import Task
-from typing import List, Dict
+from app.schemas.task import GroupedTasks, PrioritizedTask, RewrittenTask
+from app.services.AI.keywords import MotorPalabrasClave, obtener_motor_palabras_clave
+
+NIVEL_RAPIDO = "heuristica"
+
+MOTIVO_FECHA_PROXIMA = "La fecha límite está muy próxima."
+MOTIVO_CON_FECHA = "Reglas rápidas: tiene fecha límite."
+MOTIVO_SIN_INDICIOS = "Reglas rápidas: sin palabras de urgencia ni fecha límite."
+MOTIVO_NORMALIZADO = "Reglas rápidas: espacios y mayúscula inicial normalizados."
+MOTIVO_SIN_CAMBIOS = "Reglas rápidas: el título no necesita cambios."
+
+
+class GrupoPalabrasClave(BaseModel):
+    nombre: str
+    palabras: List[str] = Field(min_length=1)
+
+
+# Si un título tiene palabras de varios grupos, gana el primero de la lista
+GRUPOS_POR_DEFECTO = [
+    GrupoPalabrasClave(
+        nombre="Limpieza",
+        palabras=["limpiar", "limpieza", "lavar", "fregar", "barrer", "aspirar", "planchar", "cocina", "colada"],
+    ),
+    GrupoPalabrasClave(
+        nombre="Trabajo/Estudios",
+        palabras=["currículum", "informe", "trabajo", "prácticas", "examen", "estudiar", "reunión", "proyecto"],
+    ),
+]
+GRUPO_OTROS = "Otros"
+
+
+@lru_cache(maxsize=1)
+def obtener_motor_grupos() -> MotorPalabrasClave[GrupoPalabrasClave]:
+    return MotorPalabrasClave(GRUPOS_POR_DEFECTO)
+
+
+def _fecha_proxima(due_date: datetime, ahora: datetime) -> bool:
+    limite = due_date if due_date.tzinfo else due_date.replace(tzinfo=timezone.utc)
+    return limite - ahora <= timedelta(days=1)
+
+
+def priorizar_titulos(
+        titulos: Sequence[str], fechas: Optional[Sequence[Optional[datetime]]] = None,
+) -> List[Tuple[str, str]]:
+    """``(prioridad, motivo)`` de cada título: palabra clave, fecha límite o ``baja``."""
+    fechas = fechas if fechas is not None else [None] * len(titulos)
+    ahora = datetime.now(timezone.utc)
+    resultado = []
+    for regla, due_date in zip(obtener_motor_palabras_clave().buscar_varios(titulos), fechas):
+        if regla is not None:
+            resultado.append((regla.prioridad, regla.motivo))
+        elif due_date is not None and _fecha_proxima(due_date, ahora):
+            resultado.append(("alta", MOTIVO_FECHA_PROXIMA))
+        elif due_date is not None:
+            resultado.append(("media", MOTIVO_CON_FECHA))
+        else:
+            resultado.append(("baja", MOTIVO_SIN_INDICIOS))
+    return resultado
+
+
+def detectar_grupos(titulos: Sequence[str]) -> List[str]:
+    """Nombre del grupo de cada título (``Otros`` si no tiene ninguna palabra clave)."""
+    return [grupo.nombre if grupo else GRUPO_OTROS for grupo in obtener_motor_grupos().buscar_varios(titulos)]
 
 
-async def prioritize_tasks_mock(tasks: List[Task]) -> List[PrioritizedTask]:
-    def simple_priority_logic(task: Task) -> str:
-        if "urgente" in task.titulo.lower():
-            return "alta"
-        if task.due_date:
-            return "media"
-        return "baja"
+def _normalizar(titulo: str) -> str:
+    limpio = " ".join(titulo.split()).rstrip(" .")
+    return limpio[:1].upper() + limpio[1:]
 
+
+def reescribir_titulos(titulos: Sequence[str]) -> List[dict]:
+    """Mismo formato que ``reformular_titulos`` del reformulador."""
+    resultado = []
+    for titulo in titulos:
+        reformulada = _normalizar(titulo) or titulo
+        cambio = reformulada != titulo
+        resultado.append({
+            "reformulada": reformulada,
+            "cambio": cambio,
+            "motivo": MOTIVO_NORMALIZADO if cambio else MOTIVO_SIN_CAMBIOS,
+        })
+    return resultado
+
+
+def detect_group(task_title: str) -> str:
+    return detectar_grupos([task_title])[0]
+
+
+def rewrite_task_title(title: str) -> str:
+    return reescribir_titulos([title])[0]["reformulada"]
+
+
+# Respuestas de los endpoints con el backend rápido
+
+def priorizar(tasks: Sequence[Task]) -> List[PrioritizedTask]:
+    prioridades = priorizar_titulos([task.titulo for task in tasks], [task.due_date for task in tasks])
     return [
-        PrioritizedTask(
-            id=task.id,
-            titulo=task.titulo,
-            prioridad=simple_priority_logic(task),
-            motivo="Mock: basado en título y fecha de vencimiento"
-        )
-        for task in tasks
+        PrioritizedTask(id=task.id, titulo=task.titulo, prioridad=prioridad, motivo=motivo, nivel=NIVEL_RAPIDO)
+        for task, (prioridad, motivo) in zip(tasks, prioridades)
     ]
-def detect_group(task_title: str) -> str:
-    title = task_title.lower()
-    if any(word in title for word in ["limpiar", "lavar", "fregar", "cocina"]):
-        return "Limpieza"
-    if any(word in title for word in ["currículum", "informe", "trabajo", "prácticas"]):
-        return "Trabajo/Estudios"
-    return "Otros"
-
-async def group_tasks_mock(tasks: List[Task]) -> Dict[str, List[dict]]:
-    grupos = {}
-    for task in tasks:
-        grupo = detect_group(task.titulo)
-        grupos.setdefault(grupo, []).append({
-            "id": str(task.id),
-            "titulo": task.titulo
-        })
+
+
+def agrupar(tasks: Sequence[Task]) -> Dict[str, List[GroupedTasks]]:
+    grupos: Dict[str, List[GroupedTasks]] = {}
+    for task, nombre in zip(tasks, detectar_grupos([task.titulo for task in tasks])):
+        grupos.setdefault(nombre, []).append(GroupedTasks(id=task.id, titulo=task.titulo, nivel=NIVEL_RAPIDO))
     return grupos
 
-def rewrite_task_title(title: str) -> str:
-    return f"{title}. Por favor, realiza esta tarea lo antes posible y con atención."
 
-async def rewrite_tasks_mock(tasks: List[Task]) -> List[RewrittenTask]:
+def reescribir(tareas: Sequence[Tuple[UUID, str]]) -> List[RewrittenTask]:
     return [
         RewrittenTask(
-            id=task.id,
-            original=task.titulo,
-            reformulada=rewrite_task_title(task.titulo)
+            id=task_id, original=titulo, reformulada=resultado["reformulada"], motivo=resultado["motivo"],
+            nivel=NIVEL_RAPIDO,
         )
-        for task in tasks
+        for (task_id, titulo), resultado in zip(tareas, reescribir_titulos([titulo for _, titulo in tareas]))
     ]
@@ -0,0 +1,259 @@
+"""
+Trabajos asíncronos de IA (por ahora, reescritura de títulos).
+
+``POST /tasks/ai/rewrite?async=true`` crea un trabajo y responde al momento
+con su id; ``GET /tasks/ai/jobs/{id}`` informa del progreso y de los
+resultados parciales o finales. El backend se elige con ``JOBS_BACKEND``:
+
+- ``memory``: estado en memoria del proceso; el trabajo avanza en un hilo
+  propio y envía cada lote al ejecutor de IA por separado, de modo que las
+  peticiones interactivas consiguen hilo entre lote y lote.
+- ``filesystem``: igual, pero el estado se guarda como JSON en ``JOBS_DIR``
+  (visible desde cualquier worker de la misma máquina).
+- ``celery``: el trabajo se envía a un worker de Celery (``app.worker``) y el
+  estado se lee del result backend. Sin Redis, Celery puede usar los
+  transportes ``filesystem://`` y ``file://``.
+"""
+import json
+import os
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence
+from uuid import UUID
+
+from app.core.config import settings
+
+PENDIENTE = "pendiente"
+EN_CURSO = "en_curso"
+COMPLETADO = "completado"
+ERROR = "error"
+
+TIPO_REESCRITURA = "reescritura"
+
+# Espera antes de reintentar un lote cuando el ejecutor de IA está lleno
+ESPERA_EJECUTOR_LLENO_S = 0.5
+
+
+def _ahora() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def nuevo_trabajo(tipo: str, user_id: UUID, tareas: Sequence[dict]) -> dict:
+    return {
+        "id": uuid.uuid4().hex,
+        "tipo": tipo,
+        "user_id": str(user_id),
+        "estado": PENDIENTE,
+        "procesadas": 0,
+        "total": len(tareas),
+        "tareas": list(tareas),
+        "resultados": [],
+        "error": None,
+        "creado": _ahora(),
+        "actualizado": _ahora(),
+    }
+
+
+def procesar_reescritura(
+        trabajo: dict,
+        reformular: Callable[[List[str]], List[dict]],
+        guardar: Callable[[dict], None],
+        tamano_lote: Optional[int] = None,
+) -> dict:
+    """
+    Reescribe las tareas del trabajo lote a lote, guardando el progreso y los
+    resultados parciales tras cada lote. Se ejecuta igual en el proceso de la
+    API que en un worker de Celery.
+    """
+    tamano_lote = tamano_lote or settings.AI_REWRITE_BATCH_SIZE
+    trabajo["estado"] = EN_CURSO
+    guardar(trabajo)
+    try:
+        tareas = trabajo["tareas"]
+        for inicio in range(trabajo["procesadas"], len(tareas), tamano_lote):
+            lote = tareas[inicio:inicio + tamano_lote]
+            resultados = reformular([tarea["titulo"] for tarea in lote])
+            trabajo["resultados"].extend(
+                {
+                    "id": tarea["id"],
+                    "original": tarea["titulo"],
+                    "reformulada": resultado["reformulada"],
+                    "motivo": resultado["motivo"],
+                }
+                for tarea, resultado in zip(lote, resultados)
+            )
+            trabajo["procesadas"] += len(lote)
+            trabajo["actualizado"] = _ahora()
+            guardar(trabajo)
+        trabajo["estado"] = COMPLETADO
+    except Exception as e:  # noqa: BLE001 - el error queda registrado en el trabajo
+        trabajo["estado"] = ERROR
+        trabajo["error"] = str(e)
+    trabajo["actualizado"] = _ahora()
+    guardar(trabajo)
+    return trabajo
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Almacenes de estado
+# ─────────────────────────────────────────────────────────────────────────────
+class AlmacenTrabajos(ABC):
+    @abstractmethod
+    def guardar(self, trabajo: dict) -> None: ...
+
+    @abstractmethod
+    def obtener(self, trabajo_id: str) -> Optional[dict]: ...
+
+
+class AlmacenMemoria(AlmacenTrabajos):
+    """Guarda instantáneas de los trabajos; descarta los más antiguos al superar el límite."""
+
+    def __init__(self, max_trabajos: int = 1000):
+        self.max_trabajos = max_trabajos
+        self._trabajos: "OrderedDict[str, dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def guardar(self, trabajo: dict) -> None:
+        with self._lock:
+            self._trabajos[trabajo["id"]] = deepcopy(trabajo)
+            while len(self._trabajos) > self.max_trabajos:
+                self._trabajos.popitem(last=False)
+
+    def obtener(self, trabajo_id: str) -> Optional[dict]:
+        with self._lock:
+            trabajo = self._trabajos.get(trabajo_id)
+            return deepcopy(trabajo) if trabajo else None
+
+
+class AlmacenFicheros(AlmacenTrabajos):
+    """Un fichero JSON por trabajo, escrito de forma atómica."""
+
+    def __init__(self, directorio: str | Path):
+        self.directorio = Path(directorio)
+        self.directorio.mkdir(parents=True, exist_ok=True)
+
+    def _ruta(self, trabajo_id: str) -> Path:
+        # Los ids son hexadecimales; cualquier otra cosa no puede ser un trabajo
+        if not trabajo_id.isalnum():
+            raise ValueError("Identificador de trabajo inválido.")
+        return self.directorio / f"{trabajo_id}.json"
+
+    def guardar(self, trabajo: dict) -> None:
+        ruta = self._ruta(trabajo["id"])
+        temporal = ruta.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        temporal.write_text(json.dumps(trabajo, default=str), encoding="utf-8")
+        os.replace(temporal, ruta)
+
+    def obtener(self, trabajo_id: str) -> Optional[dict]:
+        try:
+            return json.loads(self._ruta(trabajo_id).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# Backends
+# ─────────────────────────────────────────────────────────────────────────────
+class BackendTrabajos(ABC):
+    @abstractmethod
+    def lanzar_reescritura(self, user_id: UUID, tareas: Sequence[dict]) -> dict:
+        """Crea el trabajo, lo encola y devuelve su estado inicial."""
+
+    @abstractmethod
+    def obtener(self, trabajo_id: str) -> Optional[dict]: ...
+
+
+def _reformular_en_ejecutor(titulos: List[str]) -> List[dict]:
+    """Un lote del trabajo en el ejecutor de IA; si está lleno, espera y reintenta."""
+    from app.services.AI import backend
+    from app.services.AI.executor import ColaInferenciaLlena, obtener_ejecutor
+
+    while True:
+        try:
+            return obtener_ejecutor().enviar("trabajo_reescritura", backend.reformular_titulos, titulos).result()
+        except ColaInferenciaLlena:
+            time.sleep(ESPERA_EJECUTOR_LLENO_S)
+
+
+class BackendLocal(BackendTrabajos):
+    """
+    Ejecuta los trabajos en el propio proceso. El bucle del trabajo no ocupa
+    un hilo del ejecutor de inferencia: sólo cada lote pasa por él.
+    """
+
+    def __init__(self, almacen: AlmacenTrabajos):
+        self.almacen = almacen
+
+    def lanzar_reescritura(self, user_id: UUID, tareas: Sequence[dict]) -> dict:
+        trabajo = nuevo_trabajo(TIPO_REESCRITURA, user_id, tareas)
+        self.almacen.guardar(trabajo)
+        threading.Thread(
+            target=procesar_reescritura,
+            args=(deepcopy(trabajo), _reformular_en_ejecutor, self.almacen.guardar),
+            name=f"trabajo-{trabajo['id'][:8]}",
+            daemon=True,
+        ).start()
+        return trabajo
+
+    def obtener(self, trabajo_id: str) -> Optional[dict]:
+        return self.almacen.obtener(trabajo_id)
+
+
+class BackendCelery(BackendTrabajos):
+    """Envía el trabajo a Celery; el progreso se lee del result backend."""
+
+    _ESTADOS = {
+        "PENDING": PENDIENTE,
+        "QUEUED": PENDIENTE,
+        "STARTED": EN_CURSO,
+        "PROGRESS": EN_CURSO,
+        "SUCCESS": COMPLETADO,
+        "FAILURE": ERROR,
+    }
+
+    def __init__(self, celery_app):
+        self.celery_app = celery_app
+
+    def lanzar_reescritura(self, user_id: UUID, tareas: Sequence[dict]) -> dict:
+        from app.worker import reescribir_titulos
+
+        trabajo = nuevo_trabajo(TIPO_REESCRITURA, user_id, tareas)
+        # Se registra el trabajo antes de encolarlo para poder comprobar su dueño
+        self.celery_app.backend.store_result(trabajo["id"], trabajo, "QUEUED")
+        reescribir_titulos.apply_async(args=[trabajo], task_id=trabajo["id"])
+        return trabajo
+
+    def obtener(self, trabajo_id: str) -> Optional[dict]:
+        resultado = self.celery_app.AsyncResult(trabajo_id)
+        info = resultado.info
+        # Sin metadatos no se puede comprobar el dueño: se trata como inexistente
+        if not isinstance(info, dict):
+            return None
+        trabajo = dict(info)
+        trabajo["estado"] = trabajo.get("estado") or self._ESTADOS.get(resultado.state, PENDIENTE)
+        return trabajo
+
+
+@lru_cache(maxsize=1)
+def obtener_backend_trabajos() -> BackendTrabajos:
+    if settings.JOBS_BACKEND == "celery":
+        from app.worker import celery_app
+
+        return BackendCelery(celery_app)
+    if settings.JOBS_BACKEND == "filesystem":
+        return BackendLocal(AlmacenFicheros(settings.JOBS_DIR))
+    return BackendLocal(AlmacenMemoria())
+
+
+def obtener_trabajo_de_usuario(trabajo_id: str, user_id: UUID) -> Optional[dict]:
+    trabajo = obtener_backend_trabajos().obtener(trabajo_id)
+    if not trabajo or trabajo.get("user_id") != str(user_id):
+        return None
+    return trabajo
@@ -0,0 +1,398 @@
+"""
+Grupos de tareas persistidos por usuario (tabla ``taskcluster``).
+
+Cada grupo guarda la suma de los embeddings de sus tareas y cuántas son. Al
+guardar el embedding de una tarea (``task_embeddings.guardar_embeddings``) el
+vector anterior sale de su grupo y el nuevo se compara con los k centroides
+del usuario: entra en el más similar si alcanza ``AI_GROUP_THRESHOLD`` o abre
+un grupo nuevo. Coste O(k) por tarea; ``/tasks/ai/group`` sólo lee las
+asignaciones y el número de cada grupo ("Grupo N") no cambia entre llamadas.
+
+La asignación incremental depende del orden de llegada y no retira las
+tareas borradas, así que cada cierto tiempo se reagrupa a cada usuario con
+k-means (mismo nº de grupos), conservando el número de los grupos que más
+tareas comparten con los anteriores:
+
+    python -m app.services.task_clusters
+
+La reagrupación se hace una sola vez por máquina aunque la lancen varios
+workers (``AI_RECLUSTER_INTERVAL_MINUTES``) y el comando a la vez: cada
+ejecución toma antes el cerrojo de fichero ``AI_RECLUSTER_LOCK_PATH`` y
+anota en él cuándo terminó.
+
+El número de un grupo nuevo es el mayor del usuario más uno. Dos escrituras
+simultáneas del mismo usuario pueden elegir el mismo y la segunda choca con
+``uq_taskcluster_user_numero``: toda escritura que abre grupos pasa por
+``escribir_con_reintentos``, que la repite en una sesión nueva.
+"""
+import argparse
+import asyncio
+import logging
+import time
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Set, Tuple, TypeVar
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.task import Task
+from app.models.task_cluster import TaskCluster
+from app.models.task_embedding import TaskEmbedding
+from app.services.AI.embedding_cache import clave_embedding
+from app.services.AI.executor import ejecutar_inferencia
+from app.services.AI.sentence_encoder import NOMBRE_MODELO
+from app.services.AI.similarity import agrupar_kmeans, normalizar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+REINTENTOS_ESCRITURA = 3
+
+
+async def escribir_con_reintentos(
+        escritura: Callable[[AsyncSession], Awaitable[T]],
+        session_factory=async_session,
+) -> T:
+    """
+    Ejecuta ``escritura`` en una sesión propia y la confirma. Si choca con
+    otra escritura simultánea (p. ej. dos grupos nuevos con el mismo número),
+    la repite desde cero en una sesión nueva, que ya ve los datos de la otra.
+    """
+    for intento in range(1, REINTENTOS_ESCRITURA + 1):
+        async with session_factory() as session:
+            try:
+                resultado = await escritura(session)
+                await session.commit()
+                return resultado
+            except IntegrityError:
+                await session.rollback()
+                if intento == REINTENTOS_ESCRITURA:
+                    raise
+                logger.info("Escritura de grupos en conflicto; reintento %d", intento)
+
+
+def _vector(datos: bytes) -> np.ndarray:
+    return np.frombuffer(datos, dtype=np.float32)
+
+
+def _sumar(cluster: TaskCluster, vector: np.ndarray, signo: int = 1) -> None:
+    cluster.suma = (_vector(cluster.suma) + signo * vector).astype(np.float32).tobytes()
+    cluster.n_tareas += signo
+    cluster.updated_at = datetime.now(timezone.utc)
+
+
+class _GruposUsuario:
+    """Centroides normalizados de un usuario en memoria, actualizados con cada asignación."""
+
+    def __init__(self, user_id: UUID, clusters: List[TaskCluster], siguiente_numero: int):
+        self.user_id = user_id
+        self.clusters = [cluster for cluster in clusters if cluster.n_tareas > 0]
+        self.siguiente_numero = siguiente_numero
+        self.centroides = normalizar([_vector(c.suma) for c in self.clusters]) if self.clusters else None
+
+    def asignar(self, vector: np.ndarray) -> Tuple[TaskCluster, bool]:
+        """Devuelve el grupo de ``vector`` y si es nuevo."""
+        unitario = normalizar(vector[None, :])[0]
+        if self.centroides is not None:
+            similitudes = self.centroides @ unitario
+            mejor = int(np.argmax(similitudes))
+            if similitudes[mejor] >= settings.AI_GROUP_THRESHOLD:
+                cluster = self.clusters[mejor]
+                _sumar(cluster, vector)
+                self.centroides[mejor] = normalizar(_vector(cluster.suma)[None, :])[0]
+                return cluster, False
+
+        cluster = TaskCluster(
+            user_id=self.user_id,
+            numero=self.siguiente_numero,
+            modelo=NOMBRE_MODELO,
+            dim=int(vector.shape[-1]),
+            suma=vector.astype(np.float32).tobytes(),
+            n_tareas=1,
+        )
+        self.siguiente_numero += 1
+        self.clusters.append(cluster)
+        fila = unitario[None, :]
+        self.centroides = fila if self.centroides is None else np.vstack([self.centroides, fila])
+        return cluster, True
+
+
+async def _cargar_grupos(session: AsyncSession, user_ids: Sequence[UUID]) -> Dict[UUID, _GruposUsuario]:
+    ids = list(set(user_ids))
+    numeros = dict((await session.exec(
+        select(TaskCluster.user_id, func.max(TaskCluster.numero))
+        .where(TaskCluster.user_id.in_(ids))
+        .group_by(TaskCluster.user_id)
+    )).all())
+    clusters = (await session.exec(
+        select(TaskCluster).where(TaskCluster.user_id.in_(ids), TaskCluster.modelo == NOMBRE_MODELO)
+    )).all()
+    por_usuario: Dict[UUID, List[TaskCluster]] = {user_id: [] for user_id in ids}
+    for cluster in clusters:
+        por_usuario[cluster.user_id].append(cluster)
+    return {
+        user_id: _GruposUsuario(user_id, lista, (numeros.get(user_id) or 0) + 1)
+        for user_id, lista in por_usuario.items()
+    }
+
+
+async def retirar_de_grupos(session: AsyncSession, filas: Sequence[TaskEmbedding]) -> None:
+    """Quita el vector actual de cada fila de su grupo, antes de sobrescribirlo."""
+    for fila in filas:
+        if fila.cluster_id is None:
+            continue
+        cluster = await session.get(TaskCluster, fila.cluster_id)
+        if cluster is not None and cluster.modelo == fila.modelo:
+            _sumar(cluster, _vector(fila.vector), -1)
+            session.add(cluster)
+        fila.cluster_id = None
+
+
+async def asignar_grupos(session: AsyncSession, pares: Sequence[Tuple[Task, TaskEmbedding]]) -> Dict[UUID, TaskCluster]:
+    """
+    Asigna cada fila de embedding (del modelo actual) al grupo más similar de
+    su usuario o a uno nuevo. El commit queda a cargo del llamador.
+    """
+    pares = [(task, fila) for task, fila in pares if fila.modelo == NOMBRE_MODELO]
+    if not pares:
+        return {}
+    grupos = await _cargar_grupos(session, [task.user_id for task, _ in pares])
+
+    asignados: Dict[UUID, TaskCluster] = {}
+    for task, fila in pares:
+        cluster, _ = grupos[task.user_id].asignar(_vector(fila.vector))
+        fila.cluster_id = cluster.id
+        session.add(cluster)
+        session.add(fila)
+        asignados[task.id] = cluster
+    return asignados
+
+
+async def _asignar_pendientes(session: AsyncSession, task_ids: Sequence[UUID]) -> Dict[UUID, int]:
+    pares = (await session.exec(
+        select(Task, TaskEmbedding)
+        .join(TaskEmbedding, TaskEmbedding.task_id == Task.id)
+        .where(Task.id.in_(task_ids))
+    )).all()
+    await retirar_de_grupos(session, [fila for _, fila in pares])
+    return {task_id: cluster.numero for task_id, cluster in (await asignar_grupos(session, pares)).items()}
+
+
+async def grupos_de_tareas(session: AsyncSession, tasks: Sequence[Task]) -> Tuple[Dict[str, List[Task]], Set[UUID]]:
+    """
+    Agrupa ``tasks`` según las asignaciones guardadas, por número de grupo.
+    Sus embeddings deben existir (``asegurar_embeddings``); las tareas aún
+    sin grupo vigente se asignan ahora, en una escritura aparte con
+    reintentos, y sus ids se devuelven aparte.
+    """
+    if not tasks:
+        return {}, set()
+    # Columnas y no filas: las asignaciones pueden haberse escrito en otra sesión
+    grupo_de = dict((await session.exec(
+        select(TaskEmbedding.task_id, TaskEmbedding.cluster_id)
+        .where(TaskEmbedding.task_id.in_([task.id for task in tasks]))
+    )).all())
+    numeros = dict((await session.exec(
+        select(TaskCluster.id, TaskCluster.numero).where(
+            TaskCluster.user_id.in_({task.user_id for task in tasks}),
+            TaskCluster.modelo == NOMBRE_MODELO,
+        )
+    )).all())
+
+    asignados: Dict[UUID, int] = {}
+    sin_grupo = []
+    for task in tasks:
+        if grupo_de.get(task.id) in numeros:
+            asignados[task.id] = numeros[grupo_de[task.id]]
+        else:
+            sin_grupo.append(task.id)
+    if sin_grupo:
+        asignados.update(await escribir_con_reintentos(lambda sesion: _asignar_pendientes(sesion, sin_grupo)))
+
+    por_numero: Dict[int, List[Task]] = {}
+    for task in tasks:
+        por_numero.setdefault(asignados[task.id], []).append(task)
+    return {f"Grupo {numero}": por_numero[numero] for numero in sorted(por_numero)}, set(sin_grupo)
+
+
+async def grupos_guardados(session: AsyncSession, tasks: Sequence[Task]) -> Tuple[Dict[str, List[Task]], List[Task]]:
+    """
+    Sólo lectura: agrupa las tareas que ya tienen grupo vigente y devuelve
+    aparte las que no (sin embedding, de otro modelo, con el título cambiado
+    desde que se calculó o sin asignar).
+    """
+    if not tasks:
+        return {}, []
+    asignaciones = {task_id: (clave, numero) for task_id, clave, numero in (await session.exec(
+        select(TaskEmbedding.task_id, TaskEmbedding.clave, TaskCluster.numero)
+        .join(TaskCluster, TaskCluster.id == TaskEmbedding.cluster_id)
+        .where(
+            TaskEmbedding.task_id.in_([task.id for task in tasks]),
+            TaskEmbedding.modelo == NOMBRE_MODELO,
+            TaskCluster.modelo == NOMBRE_MODELO,
+        )
+    )).all()}
+
+    por_numero: Dict[int, List[Task]] = {}
+    sin_grupo: List[Task] = []
+    for task in tasks:
+        clave, numero = asignaciones.get(task.id, (None, None))
+        # Mismo criterio que ``task_embeddings.embedding_vigente``
+        if clave is not None and clave == clave_embedding(NOMBRE_MODELO, task.titulo):
+            por_numero.setdefault(numero, []).append(task)
+        else:
+            sin_grupo.append(task)
+    return {f"Grupo {numero}": por_numero[numero] for numero in sorted(por_numero)}, sin_grupo
+
+
+async def reagrupar_usuario(session: AsyncSession, user_id: UUID) -> int:
+    """
+    Recalcula con k-means los grupos de un usuario a partir de sus embeddings
+    vigentes, con tantos grupos como tenía. Cada grupo nuevo hereda el número
+    del grupo anterior con el que más tareas comparte; los grupos sobrantes
+    se borran. Devuelve el nº de grupos. El commit queda a cargo del llamador.
+    """
+    filas = (await session.exec(
+        select(Task, TaskEmbedding)
+        .join(TaskEmbedding, TaskEmbedding.task_id == Task.id)
+        .where(Task.user_id == user_id)
+    )).all()
+    anteriores = (await session.exec(select(TaskCluster).where(TaskCluster.user_id == user_id))).all()
+
+    activas = []
+    for task, fila in filas:
+        if task.deleted_at is None and fila.modelo == NOMBRE_MODELO:
+            activas.append(fila)
+        else:
+            fila.cluster_id = None
+            session.add(fila)
+
+    vigentes = {c.id for c in anteriores if c.modelo == NOMBRE_MODELO and c.n_tareas > 0}
+    nuevos: List[List[int]] = []
+    if activas:
+        vectores = np.stack([_vector(fila.vector) for fila in activas])
+        nuevos = await ejecutar_inferencia(
+            "reagrupacion", agrupar_kmeans, vectores, len(vigentes) or None,
+        )
+
+    # Solapes (tareas compartidas, grupo nuevo, grupo anterior) de mayor a menor
+    solapes = sorted(
+        (
+            (cuenta, i, cluster_id)
+            for i, miembros in enumerate(nuevos)
+            for cluster_id, cuenta in Counter(activas[j].cluster_id for j in miembros).items()
+            if cluster_id in vigentes
+        ),
+        key=lambda solape: solape[0],
+        reverse=True,
+    )
+    por_id = {cluster.id: cluster for cluster in anteriores}
+    heredados: Dict[int, TaskCluster] = {}
+    for _, i, cluster_id in solapes:
+        if i not in heredados and cluster_id not in {c.id for c in heredados.values()}:
+            heredados[i] = por_id[cluster_id]
+
+    siguiente_numero = max((c.numero for c in anteriores), default=0) + 1
+    ahora = datetime.now(timezone.utc)
+    for i, miembros in enumerate(nuevos):
+        vectores_grupo = np.stack([_vector(activas[j].vector) for j in miembros])
+        cluster = heredados.get(i)
+        if cluster is None:
+            cluster = TaskCluster(user_id=user_id, numero=siguiente_numero, modelo=NOMBRE_MODELO, dim=0, suma=b"")
+            siguiente_numero += 1
+        cluster.modelo = NOMBRE_MODELO
+        cluster.dim = int(vectores_grupo.shape[1])
+        cluster.suma = vectores_grupo.sum(axis=0).astype(np.float32).tobytes()
+        cluster.n_tareas = len(miembros)
+        cluster.updated_at = ahora
+        session.add(cluster)
+        for j in miembros:
+            activas[j].cluster_id = cluster.id
+            session.add(activas[j])
+
+    conservados = {cluster.id for cluster in heredados.values()}
+    for cluster in anteriores:
+        if cluster.id not in conservados:
+            await session.delete(cluster)
+    return len(nuevos)
+
+
+async def reagrupar_todos(session_factory=async_session) -> int:
+    """Reagrupa a cada usuario con embeddings, cada uno en su propia sesión. Devuelve el nº de usuarios."""
+    async with session_factory() as session:
+        user_ids = (await session.exec(
+            select(Task.user_id).join(TaskEmbedding, TaskEmbedding.task_id == Task.id).distinct()
+        )).all()
+
+    for user_id in user_ids:
+        grupos = await escribir_con_reintentos(
+            lambda session: reagrupar_usuario(session, user_id), session_factory,
+        )
+        logger.info("Usuario %s reagrupado en %d grupos", user_id, grupos)
+    return len(user_ids)
+
+
+async def reagrupar_como_lider(separacion_minima_s: float = 0.0, ruta: Optional[str] = None) -> Optional[int]:
+    """
+    ``reagrupar_todos`` si este proceso obtiene el cerrojo y la última
+    reagrupación (de cualquier proceso) terminó hace al menos
+    ``separacion_minima_s``. Devuelve ``None`` si no le toca.
+    """
+    import fcntl
+
+    with open(ruta or settings.AI_RECLUSTER_LOCK_PATH, "a+") as cerrojo:
+        try:
+            fcntl.flock(cerrojo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return None
+        cerrojo.seek(0)
+        try:
+            ultima = float(cerrojo.read().strip() or 0)
+        except ValueError:
+            ultima = 0.0
+        if time.time() - ultima < separacion_minima_s:
+            return None
+        total = await reagrupar_todos()
+        cerrojo.seek(0)
+        cerrojo.truncate()
+        cerrojo.write(str(time.time()))
+        return total
+
+
+async def reagrupar_periodicamente(intervalo_minutos: Optional[float] = None) -> None:
+    """
+    Bucle lanzado desde el lifespan de cada worker; se detiene al cancelarlo.
+    En cada ciclo sólo reagrupa un proceso: los demás encuentran el cerrojo
+    ocupado o la reagrupación recién hecha.
+    """
+    intervalo = 60 * (intervalo_minutos or settings.AI_RECLUSTER_INTERVAL_MINUTES)
+    while True:
+        await asyncio.sleep(intervalo)
+        try:
+            await reagrupar_como_lider(separacion_minima_s=intervalo / 2)
+        except Exception:  # noqa: BLE001 - el siguiente ciclo lo reintenta
+            logger.exception("Error al reagrupar las tareas")
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Reagrupa con k-means las tareas de todos los usuarios.")
+    parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    total = asyncio.run(reagrupar_como_lider())
+    if total is None:
+        print("Otro proceso está reagrupando; no se hace nada.")
+        return
+    print(f"Usuarios reagrupados: {total}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""
+Embeddings de tareas persistidos junto a cada tarea (tabla ``taskembedding``).
+
+Se calculan fuera de la petición al crear una tarea o cambiar su título, de
+modo que ``/tasks/ai/group`` y el resto de funciones de similitud sólo leen
+vectores de la base de datos. Al guardar cada vector se asigna también al
+grupo de tareas similares de su usuario (``task_clusters``). Para cambios de
+modelo existe un comando de reindexado por lotes:
+
+    python -m app.services.task_embeddings --lote 256 [--todas]
+"""
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Dict, Optional, Sequence, Set
+from uuid import UUID
+
+import numpy as np
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlmodel import select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import async_session
+from app.models.task import Task
+from app.models.task_embedding import TaskEmbedding
+from app.services.AI.backend import calcular_embeddings
+from app.services.AI.embedding_cache import clave_embedding
+from app.services.AI.executor import ejecutar_inferencia
+from app.services.AI.sentence_encoder import NOMBRE_MODELO
+from app.services.task_clusters import asignar_grupos, escribir_con_reintentos, retirar_de_grupos
+
+logger = logging.getLogger(__name__)
+
+
+def _a_vector(fila: TaskEmbedding) -> np.ndarray:
+    return np.frombuffer(fila.vector, dtype=np.float32)
+
+
+def embedding_vigente(fila: Optional[TaskEmbedding], task: Task) -> bool:
+    return fila is not None and fila.clave == clave_embedding(NOMBRE_MODELO, task.titulo)
+
+
+async def guardar_embeddings(session: AsyncSession, tasks: Sequence[Task]) -> Dict[UUID, np.ndarray]:
+    """Calcula y guarda el embedding de cada tarea. El commit queda a cargo del llamador."""
+    if not tasks:
+        return {}
+
+    vectores = await ejecutar_inferencia("embeddings", calcular_embeddings, [task.titulo for task in tasks])
+    result = await session.exec(
+        select(TaskEmbedding).where(TaskEmbedding.task_id.in_([task.id for task in tasks]))
+    )
+    existentes = {fila.task_id: fila for fila in result.all()}
+    # Los vectores anteriores salen de sus grupos antes de sobrescribirlos
+    await retirar_de_grupos(session, list(existentes.values()))
+    ahora = datetime.now(timezone.utc)
+
+    calculados: Dict[UUID, np.ndarray] = {}
+    filas = []
+    for task, vector in zip(tasks, vectores):
+        vector = np.asarray(vector, dtype=np.float32)
+        fila = existentes.get(task.id) or TaskEmbedding(task_id=task.id)
+        fila.modelo = NOMBRE_MODELO
+        fila.clave = clave_embedding(NOMBRE_MODELO, task.titulo)
+        fila.dim = int(vector.shape[-1])
+        fila.vector = vector.tobytes()
+        fila.updated_at = ahora
+        session.add(fila)
+        filas.append((task, fila))
+        calculados[task.id] = vector
+    # Cada vector nuevo entra en el grupo más similar de su usuario (O(k))
+    await asignar_grupos(session, filas)
+    return calculados
+
+
+async def asegurar_embeddings(session: AsyncSession, tasks: Sequence[Task]) -> Set[UUID]:
+    """
+    Calcula y guarda sólo los embeddings ausentes u obsoletos de ``tasks``
+    (que así entran también en su grupo), sin leer los vectores vigentes.
+    Devuelve los ids recalculados.
+    """
+    claves = dict((await session.exec(
+        select(TaskEmbedding.task_id, TaskEmbedding.clave)
+        .where(TaskEmbedding.task_id.in_([task.id for task in tasks]))
+    )).all())
+    pendientes = [task.id for task in tasks if claves.get(task.id) != clave_embedding(NOMBRE_MODELO, task.titulo)]
+    if pendientes:
+        logger.info("Calculando %d embeddings ausentes u obsoletos", len(pendientes))
+        await guardar_embeddings_de(pendientes, session_factory=_fabrica_de(session))
+    return set(pendientes)
+
+
+async def obtener_embeddings(session: AsyncSession, tasks: Sequence[Task]) -> np.ndarray:
+    """
+    Devuelve los embeddings de ``tasks`` en orden, leídos de la base de datos.
+
+    Sólo se calculan (y se guardan) los que faltan o están obsoletos, por
+    ejemplo si la tarea se creó antes de existir esta tabla.
+    """
+    if not tasks:
+        return np.empty((0, 0), dtype=np.float32)
+
+    result = await session.exec(
+        select(TaskEmbedding).where(TaskEmbedding.task_id.in_([task.id for task in tasks]))
+    )
+    filas = {fila.task_id: fila for fila in result.all()}
+
+    vectores: Dict[UUID, np.ndarray] = {}
+    pendientes = []
+    for task in tasks:
+        fila = filas.get(task.id)
+        if embedding_vigente(fila, task):
+            vectores[task.id] = _a_vector(fila)
+        else:
+            pendientes.append(task)
+
+    if pendientes:
+        logger.info("Calculando %d embeddings ausentes u obsoletos", len(pendientes))
+        vectores.update(await guardar_embeddings_de(
+            [task.id for task in pendientes], session_factory=_fabrica_de(session),
+        ))
+
+    return np.stack([vectores[task.id] for task in tasks])
+
+
+def _fabrica_de(session: AsyncSession):
+    """Fábrica de sesiones sobre el mismo motor que ``session``."""
+    return async_sessionmaker(session.bind, class_=AsyncSession, expire_on_commit=False)
+
+
+async def guardar_embeddings_de(task_ids: Sequence[UUID], session_factory=async_session) -> Dict[UUID, np.ndarray]:
+    """
+    ``guardar_embeddings`` de las tareas de ``task_ids`` en una sesión
+    propia, confirmada y repetida si choca con otra escritura de grupos.
+    """
+    async def guardar(session: AsyncSession) -> Dict[UUID, np.ndarray]:
+        tasks = (await session.exec(select(Task).where(Task.id.in_(task_ids)))).all()
+        return await guardar_embeddings(session, tasks)
+
+    return await escribir_con_reintentos(guardar, session_factory)
+
+
+async def actualizar_embedding_tarea(task_id: UUID) -> None:
+    """Tarea en segundo plano tras crear/editar una tarea: usa su propia sesión."""
+    async def guardar(session: AsyncSession) -> None:
+        task = await session.get(Task, task_id)
+        if task is not None and task.deleted_at is None:
+            await guardar_embeddings(session, [task])
+
+    try:
+        await escribir_con_reintentos(guardar)
+    except Exception:  # noqa: BLE001 - nunca debe romper la petición original
+        logger.exception("No se pudo actualizar el embedding de la tarea %s", task_id)
+
+
+async def reindexar_embeddings(tamano_lote: int = 256, todas: bool = False, session_factory=async_session) -> int:
+    """
+    Recorre todas las tareas activas por lotes (paginación por id) y recalcula
+    los embeddings ausentes u obsoletos, o todos con ``todas=True``.
+    Cada lote se procesa y confirma en su propia sesión.
+    """
+    procesadas = 0
+    ultimo_id: Optional[UUID] = None
+
+    while True:
+        async with session_factory() as session:
+            stmt = (
+                select(Task, TaskEmbedding)
+                .outerjoin(TaskEmbedding, TaskEmbedding.task_id == Task.id)
+                .where(Task.deleted_at.is_(None))
+                .order_by(Task.id)
+                .limit(tamano_lote)
+            )
+            if ultimo_id is not None:
+                stmt = stmt.where(Task.id > ultimo_id)
+            filas = (await session.exec(stmt)).all()
+            if not filas:
+                break
+
+            ultimo_id = filas[-1][0].id
+            pendientes = [task.id for task, fila in filas if todas or not embedding_vigente(fila, task)]
+        if pendientes:
+            await guardar_embeddings_de(pendientes, session_factory)
+            procesadas += len(pendientes)
+            logger.info("Reindexado lote de %d tareas (total %d)", len(pendientes), procesadas)
+
+    return procesadas
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Recalcula por lotes los embeddings de las tareas.")
+    parser.add_argument("--lote", type=int, default=256, help="Tareas por lote (por defecto 256).")
+    parser.add_argument("--todas", action="store_true", help="Recalcular también los embeddings vigentes.")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    total = asyncio.run(reindexar_embeddings(args.lote, args.todas))
+    print(f"Embeddings recalculados: {total}")
+
+
+if __name__ == "__main__":
+    main()
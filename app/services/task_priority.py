@@ -0,0 +1,154 @@
+"""
+Prioridad de tareas calculada por IA y persistida en la propia tarea.
+
+Se calcula en segundo plano al crear una tarea o cambiar su título, y
+``/tasks/ai/prioritize`` sólo recalcula las filas obsoletas: sin prioridad o
+calculada con otro modelo u otras reglas de palabras clave. Las prioridades
+estimadas por heurística mientras el modelo carga no se guardan, para que se
+recalculen en cuanto el modelo esté listo.
+"""
+import hashlib
+import json
+import logging
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence, Tuple
+from uuid import UUID
+
+import numpy as np
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.session import async_session
+from app.models.task import Task
+from app.schemas.task import PrioritizedTask
+from app.services.AI.executor import ejecutar_inferencia
+from app.services.AI.keywords import obtener_motor_palabras_clave
+from app.services.AI.backend import clasificar_embeddings, clasificar_prioridad_many, modelo_listo
+from app.services.AI.sentence_encoder import NOMBRE_MODELO
+from app.services.task_embeddings import obtener_embeddings
+
+logger = logging.getLogger(__name__)
+
+ORIGEN_REGLA = "regla"
+ORIGEN_MODELO = "modelo"
+ORIGEN_HEURISTICA = "heuristica"
+
+MOTIVO_MODELO = "IA personalizada basada en entrenamiento en tareas reales."
+MOTIVO_HEURISTICA = "Modelo de IA aún cargando: prioridad estimada por heurística."
+
+
+def prioridad_heuristica(due_date: Optional[datetime] = None) -> str:
+    """Prioridad de respaldo mientras el modelo no está listo (sin palabra clave)."""
+    if due_date is None:
+        return "media"
+    limite = due_date if due_date.tzinfo else due_date.replace(tzinfo=timezone.utc)
+    if limite - datetime.now(timezone.utc) <= timedelta(days=1):
+        return "alta"
+    return "media"
+
+
+def version_prioridad() -> str:
+    """Identifica el modelo y las reglas: si cambia alguno, las prioridades guardadas quedan obsoletas."""
+    reglas = [regla.model_dump() for regla in obtener_motor_palabras_clave().reglas]
+    huella = hashlib.sha256(json.dumps(reglas, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+    return f"{NOMBRE_MODELO}+reglas-{huella[:12]}"
+
+
+def prioridad_vigente(task: Task, version: str) -> bool:
+    return task.prioridad is not None and task.prioridad_modelo == version
+
+
+def invalidar_prioridad(task: Task) -> None:
+    """Tras cambiar el título la prioridad guardada deja de valer."""
+    task.prioridad = None
+    task.prioridad_motivo = None
+    task.prioridad_modelo = None
+    task.prioridad_calculada_at = None
+
+
+def clasificar_tareas(tasks: Sequence[Task], embeddings: Optional[np.ndarray] = None) -> List[Tuple[str, str, str]]:
+    """
+    Devuelve ``(prioridad, motivo, origen)`` por tarea. Las reglas de palabras
+    clave se aplican primero; el resto pasa por el modelo en una sola llamada
+    (sólo la cabeza si se dan ``embeddings`` alineados con ``tasks``) o por la
+    heurística si el modelo aún no está listo.
+    """
+    resultados: List[Optional[Tuple[str, str, str]]] = [None] * len(tasks)
+    pendientes: List[int] = []
+    usar_modelo = modelo_listo()
+    # Las reglas de palabras clave se evalúan sobre todos los títulos a la vez
+    reglas = obtener_motor_palabras_clave().buscar_varios([task.titulo for task in tasks])
+
+    for i, (task, regla) in enumerate(zip(tasks, reglas)):
+        if regla is not None:
+            resultados[i] = (regla.prioridad, regla.motivo, ORIGEN_REGLA)
+        elif not usar_modelo:
+            resultados[i] = (prioridad_heuristica(task.due_date), MOTIVO_HEURISTICA, ORIGEN_HEURISTICA)
+        else:
+            pendientes.append(i)
+
+    if pendientes:
+        if embeddings is not None:
+            etiquetas = clasificar_embeddings(embeddings[pendientes])
+        else:
+            etiquetas = clasificar_prioridad_many([tasks[i].titulo for i in pendientes])
+        for i, etiqueta in zip(pendientes, etiquetas):
+            resultados[i] = (etiqueta, MOTIVO_MODELO, ORIGEN_MODELO)
+
+    if logger.isEnabledFor(logging.DEBUG):
+        for task, (prioridad, _, origen) in zip(tasks, resultados):
+            logger.debug("Prioridad de la tarea %s: %s (%s)", task.id, prioridad, origen)
+    return resultados
+
+
+async def calcular_prioridades(session: AsyncSession, tasks: Sequence[Task]) -> Dict[UUID, Tuple[str, str]]:
+    """
+    Recalcula la prioridad de las tareas obsoletas y la guarda en cada tarea
+    (el commit queda a cargo del llamador). Devuelve las prioridades
+    heurísticas, que no se guardan, por id de tarea.
+    """
+    version = version_prioridad()
+    obsoletas = [task for task in tasks if not prioridad_vigente(task, version)]
+    if not obsoletas:
+        return {}
+
+    embeddings = await obtener_embeddings(session, obsoletas) if modelo_listo() else None
+    resultados = await ejecutar_inferencia("prioridad", clasificar_tareas, obsoletas, embeddings)
+
+    ahora = datetime.now(timezone.utc)
+    provisionales: Dict[UUID, Tuple[str, str]] = {}
+    for task, (prioridad, motivo, origen) in zip(obsoletas, resultados):
+        if origen == ORIGEN_HEURISTICA:
+            provisionales[task.id] = (prioridad, motivo)
+            continue
+        task.prioridad = prioridad
+        task.prioridad_motivo = motivo
+        task.prioridad_modelo = version
+        task.prioridad_calculada_at = ahora
+        session.add(task)
+    return provisionales
+
+
+async def priorizar_tareas(session: AsyncSession, tasks: Sequence[Task]) -> List[PrioritizedTask]:
+    """Prioridades de ``tasks`` en orden: las guardadas y, si hace falta, recién calculadas."""
+    provisionales = await calcular_prioridades(session, tasks)
+    if session.dirty:
+        await session.commit()
+
+    resultado = []
+    for task in tasks:
+        prioridad, motivo = provisionales.get(task.id, (task.prioridad, task.prioridad_motivo))
+        resultado.append(PrioritizedTask(id=task.id, titulo=task.titulo, prioridad=prioridad, motivo=motivo))
+    return resultado
+
+
+async def actualizar_prioridad_tarea(task_id: UUID) -> None:
+    """Tarea en segundo plano tras crear/editar una tarea: usa su propia sesión."""
+    try:
+        async with async_session() as session:
+            task = await session.get(Task, task_id)
+            if task is None or task.deleted_at is not None:
+                return
+            await calcular_prioridades(session, [task])
+            await session.commit()
+    except Exception:  # noqa: BLE001 - nunca debe romper la petición original
+        logger.exception("No se pudo actualizar la prioridad de la tarea %s", task_id)
@@ -0,0 +1,20 @@
+"""
+Reformulaciones que el usuario acepta al editar una tarea.
+
+Si el nuevo título es la sugerencia de ``/tasks/ai/rewrite`` para el anterior,
+el reformulador lo marca como aceptado y no vuelve a reformularlo
+(``rewrite_gate``). Se comprueba en segundo plano tras cambiar el título.
+"""
+import logging
+
+from app.services.AI.backend import registrar_aceptadas
+
+logger = logging.getLogger(__name__)
+
+
+def registrar_titulo_aceptado(titulo_anterior: str, titulo_nuevo: str) -> None:
+    """Tarea en segundo plano tras cambiar el título de una tarea."""
+    try:
+        registrar_aceptadas([(titulo_anterior, titulo_nuevo)])
+    except Exception:  # noqa: BLE001 - nunca debe romper la petición original
+        logger.exception("No se pudo comprobar si %r es una reformulación aceptada", titulo_nuevo)
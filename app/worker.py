@@ -0,0 +1,44 @@
+"""
+Worker de Celery para los trabajos asíncronos de IA.
+
+    celery -A app.worker worker --loglevel=info
+
+Con ``JOBS_BACKEND=celery`` la API encola aquí los trabajos. Sin Redis se
+puede usar ``CELERY_BROKER_URL=filesystem://`` y
+``CELERY_RESULT_BACKEND=file:///ruta/a/resultados``.
+"""
+from pathlib import Path
+
+from celery import Celery
+
+from app.core.config import settings
+from app.services.jobs import procesar_reescritura
+
+celery_app = Celery(
+    "prioritask",
+    broker=settings.CELERY_BROKER_URL,
+    backend=settings.CELERY_RESULT_BACKEND,
+)
+celery_app.conf.update(
+    task_serializer="json",
+    result_serializer="json",
+    accept_content=["json"],
+)
+
+if settings.CELERY_BROKER_URL.startswith("filesystem://"):
+    carpeta = Path(settings.JOBS_DIR) / "broker"
+    carpeta.mkdir(parents=True, exist_ok=True)
+    celery_app.conf.broker_transport_options = {
+        "data_folder_in": str(carpeta),
+        "data_folder_out": str(carpeta),
+    }
+
+
+@celery_app.task(bind=True, name="prioritask.reescribir_titulos")
+def reescribir_titulos(self, trabajo: dict) -> dict:
+    from app.services.AI.backend import reformular_titulos
+
+    def guardar(estado: dict) -> None:
+        self.update_state(state="PROGRESS", meta=estado)
+
+    return procesar_reescritura(trabajo, reformular_titulos, guardar)
@@ -0,0 +1,215 @@
+"""
+Latencia, rendimiento y memoria de los endpoints de IA con modelos sustitutos.
+
+    python -m benchmarks.ai_endpoints [--tareas 10 100 1000 10000] [--repeticiones 5]
+                                      [--endpoints prioritize group rewrite suggest]
+                                      [--concurrencia 16] [--backend modelo rapido]
+                                      [--salida informe.json]
+
+Cada combinación (endpoint, nº de tareas) se mide en un subproceso propio con
+su base de datos y su caché de embeddings temporales, para que el pico de RSS
+refleje sólo esa medición. Los modelos son los de ``benchmarks.sustitutos``:
+las cifras sirven para comparar versiones del código, no para estimar la
+latencia con los modelos reales.
+
+- ``prioritize``, ``group`` y ``rewrite``: la primera llamada (``primera_ms``)
+  calcula y guarda embeddings, prioridades y reformulaciones; los percentiles
+  son de las ``--repeticiones`` siguientes.
+- ``suggest``: ``--tareas`` peticiones de un título, ``--concurrencia`` a la vez.
+
+Con ``--backend rapido`` se mide el backend de reglas (``AI_BACKEND=rapido``),
+que no carga modelos; pasando los dos se comparan en el mismo informe.
+
+El informe es un único JSON en ``--salida`` o en la salida estándar.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List
+
+from benchmarks.comun import percentil, rss_max_mb, titulos
+
+ENDPOINTS = ["prioritize", "group", "rewrite", "suggest"]
+BACKENDS = ["modelo", "rapido"]
+
+
+def _configurar_entorno(directorio: Path, backend: str) -> None:
+    # Antes de importar la aplicación: la configuración se lee al importarla
+    os.environ["AI_BACKEND"] = backend
+    os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{directorio / 'benchmark.db'}"
+    os.environ["AI_EMBEDDING_CACHE_PATH"] = str(directorio / "embeddings.sqlite3")
+    os.environ["JOBS_BACKEND"] = "memory"
+
+
+async def _sembrar(n_tareas: int):
+    from sqlmodel import SQLModel
+
+    from app.db.session import async_session, engine
+    from app.models.enums import CategoriaTarea
+    from app.models.room import Room
+    from app.models.task import Task
+    from app.models.user import Usuario
+
+    async with engine.begin() as conn:
+        await conn.run_sync(SQLModel.metadata.create_all)
+
+    usuario = Usuario(email="benchmark@example.com", hashed_password="-")
+    room = Room(nombre="Benchmark", owner_id=usuario.id)
+    categorias = list(CategoriaTarea)
+    tareas = [
+        Task(titulo=titulo, descripcion=None, categoria=categorias[i % len(categorias)], user_id=usuario.id, room_id=room.id)
+        for i, titulo in enumerate(titulos(n_tareas))
+    ]
+    async with async_session() as session:
+        session.add_all([usuario, room, *tareas])
+        await session.commit()
+    return usuario.id
+
+
+async def _medir_lista(cliente, ruta: str, n_tareas: int, repeticiones: int) -> dict:
+    inicio = time.perf_counter()
+    respuesta = await cliente.post(ruta, json={})
+    respuesta.raise_for_status()
+    primera = 1000 * (time.perf_counter() - inicio)
+
+    latencias = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        (await cliente.post(ruta, json={})).raise_for_status()
+        latencias.append(1000 * (time.perf_counter() - inicio))
+    return {
+        "primera_ms": round(primera, 2),
+        "repeticiones": repeticiones,
+        "latencias": latencias,
+        "tareas_por_s": round(n_tareas * repeticiones / (sum(latencias) / 1000), 1),
+    }
+
+
+async def _medir_sugerencias(cliente, n_peticiones: int, concurrencia: int) -> dict:
+    textos = titulos(n_peticiones)
+    semaforo = asyncio.Semaphore(concurrencia)
+    latencias: List[float] = []
+
+    async def sugerir(titulo: str) -> None:
+        async with semaforo:
+            inicio = time.perf_counter()
+            (await cliente.post("/api/v1/tasks/ai/suggest", json={"titulo": titulo})).raise_for_status()
+            latencias.append(1000 * (time.perf_counter() - inicio))
+
+    await sugerir("calentamiento")
+    latencias.clear()
+    inicio = time.perf_counter()
+    await asyncio.gather(*(sugerir(titulo) for titulo in textos))
+    total = time.perf_counter() - inicio
+    return {
+        "concurrencia": concurrencia,
+        "latencias": latencias,
+        "peticiones_por_s": round(n_peticiones / total, 1),
+    }
+
+
+async def medir(endpoint: str, n_tareas: int, repeticiones: int, concurrencia: int) -> dict:
+    from httpx import ASGITransport, AsyncClient
+
+    from app.core.config import settings
+    from app.main import app
+    from app.services.AI.backend import usa_modelos
+    from app.services.AI.preload import precargar_modelos
+    from app.services.auth import SECRET_KEY, create_access_token
+    from benchmarks.sustitutos import instalar_sustitutos
+
+    carga = 0.0
+    if usa_modelos():
+        instalar_sustitutos()
+        inicio = time.perf_counter()
+        precargar_modelos(congelar_gc=False)
+        carga = time.perf_counter() - inicio
+
+    user_id = await _sembrar(n_tareas)
+    rss_inicial = rss_max_mb()
+    cabeceras = {"Authorization": f"Bearer {create_access_token(sub=str(user_id), secret=SECRET_KEY)}"}
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://benchmark", headers=cabeceras) as cliente:
+        if endpoint == "suggest":
+            resultado = await _medir_sugerencias(cliente, n_tareas, concurrencia)
+        else:
+            resultado = await _medir_lista(cliente, f"/api/v1/tasks/ai/{endpoint}", n_tareas, repeticiones)
+
+    latencias = resultado.pop("latencias")
+    return {
+        "endpoint": endpoint,
+        "backend": settings.AI_BACKEND,
+        "tareas": n_tareas,
+        "carga_modelos_s": round(carga, 2),
+        **resultado,
+        "p50_ms": round(percentil(latencias, 50), 2),
+        "p95_ms": round(percentil(latencias, 95), 2),
+        "p99_ms": round(percentil(latencias, 99), 2),
+        "rss_inicial_mb": rss_inicial,
+        "rss_max_mb": rss_max_mb(),
+    }
+
+
+def _en_subproceso(backend: str, endpoint: str, n_tareas: int, args: argparse.Namespace) -> dict:
+    with tempfile.TemporaryDirectory(prefix="prioritask-benchmark-") as directorio:
+        proceso = subprocess.run(
+            [sys.executable, "-m", "benchmarks.ai_endpoints", "--repeticiones", str(args.repeticiones),
+             "--concurrencia", str(args.concurrencia), "--backend", backend,
+             "--medir", endpoint, str(n_tareas), directorio],
+            capture_output=True, text=True,
+        )
+    if proceso.returncode:
+        return {"endpoint": endpoint, "backend": backend, "tareas": n_tareas,
+                "error": proceso.stderr.strip().splitlines()[-1:]}
+    return json.loads(proceso.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tareas", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--concurrencia", type=int, default=16)
+    parser.add_argument("--backend", nargs="+", choices=BACKENDS, default=["modelo"])
+    parser.add_argument("--salida", type=Path)
+    parser.add_argument("--medir", nargs=3, metavar=("ENDPOINT", "TAREAS", "DIRECTORIO"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        endpoint, n_tareas, directorio = args.medir
+        _configurar_entorno(Path(directorio), args.backend[0])
+        print(json.dumps(asyncio.run(medir(endpoint, int(n_tareas), args.repeticiones, args.concurrencia))))
+        return
+
+    informe = {
+        "entorno": {
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "parametros": {
+            "repeticiones": args.repeticiones,
+            "concurrencia": args.concurrencia,
+        },
+        "resultados": [
+            _en_subproceso(backend, endpoint, n_tareas, args)
+            for backend in args.backend
+            for endpoint in args.endpoints
+            for n_tareas in args.tareas
+        ],
+    }
+    texto = json.dumps(informe, indent=2, ensure_ascii=False)
+    if args.salida:
+        args.salida.write_text(texto + "\n", encoding="utf-8")
+    else:
+        print(texto)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,26 @@
+"""Utilidades compartidas por los benchmarks."""
+import resource
+from typing import List
+
+PALABRAS = [
+    "comprar", "pagar", "llamar", "revisar", "enviar", "preparar", "limpiar",
+    "factura", "informe", "cocina", "dentista", "presentación", "correo", "pan",
+]
+
+
+def titulos(n: int) -> List[str]:
+    """Títulos sintéticos, distintos entre sí y de longitud variable."""
+    return [
+        " ".join(PALABRAS[(i * 7 + j * 3) % len(PALABRAS)] for j in range(3 + i % 5)) + f" {i}"
+        for i in range(n)
+    ]
+
+
+def percentil(valores: List[float], p: float) -> float:
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(p / 100 * len(ordenados)))]
+
+
+def rss_max_mb() -> float:
+    # ru_maxrss está en KiB en Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
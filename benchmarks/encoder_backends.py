@@ -0,0 +1,79 @@
+"""
+Compara latencia y memoria del codificador con cada backend.
+
+    python -m benchmarks.encoder_backends [--titulos 512] [--lote 64]
+
+Cada configuración se mide en un subproceso propio para que el pico de RSS
+refleje sólo ese backend. Imprime un JSON por configuración.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from benchmarks.comun import percentil, rss_max_mb, titulos
+
+CONFIGURACIONES = [
+    ("torch", "none"),
+    ("onnx", "none"),
+    ("onnx", "avx2"),
+]
+
+
+def medir(backend: str, cuantizacion: str, n_titulos: int, lote: int) -> dict:
+    os.environ["AI_ENCODER_BACKEND"] = backend
+    os.environ["AI_ONNX_QUANTIZATION"] = cuantizacion
+    from app.services.AI.encoders import cargar_encoder
+
+    inicio = time.perf_counter()
+    modelo = cargar_encoder("paraphrase-multilingual-MiniLM-L12-v2")
+    carga = time.perf_counter() - inicio
+
+    textos = titulos(n_titulos)
+    modelo.encode(textos[:lote], batch_size=lote)  # calentamiento
+    latencias = []
+    for i in range(0, len(textos), lote):
+        inicio = time.perf_counter()
+        modelo.encode(textos[i:i + lote], batch_size=lote, normalize_embeddings=True)
+        latencias.append(1000 * (time.perf_counter() - inicio))
+
+    return {
+        "backend": backend,
+        "cuantizacion": cuantizacion,
+        "carga_s": round(carga, 2),
+        "lote": lote,
+        "lote_p50_ms": round(percentil(latencias, 50), 2),
+        "lote_p95_ms": round(percentil(latencias, 95), 2),
+        "titulos_por_s": round(n_titulos / (sum(latencias) / 1000), 1),
+        "rss_max_mb": rss_max_mb(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--titulos", type=int, default=512)
+    parser.add_argument("--lote", type=int, default=64)
+    parser.add_argument("--medir", nargs=2, metavar=("BACKEND", "CUANTIZACION"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.medir:
+        print(json.dumps(medir(*args.medir, args.titulos, args.lote)))
+        return
+
+    for backend, cuantizacion in CONFIGURACIONES:
+        proceso = subprocess.run(
+            [sys.executable, "-m", "benchmarks.encoder_backends", "--titulos", str(args.titulos),
+             "--lote", str(args.lote), "--medir", backend, cuantizacion],
+            capture_output=True, text=True,
+        )
+        if proceso.returncode:
+            print(json.dumps({"backend": backend, "cuantizacion": cuantizacion,
+                              "error": proceso.stderr.strip().splitlines()[-1:]}))
+        else:
+            print(proceso.stdout.strip().splitlines()[-1])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Modelos sustitutos pequeños para medir los endpoints de IA sin descargas.
+
+Igual que ``tests/conftest.py`` evita cargar los modelos reales, pero aquí los
+sustitutos hacen trabajo tensorial de verdad con las mismas dimensiones que
+los modelos de producción (384 de MiniLM) y se enganchan en los cargadores
+del registro de modelos, no en los módulos: la caché de embeddings, los lotes,
+el ejecutor de inferencia y la caché de reformulaciones son los reales.
+"""
+import zlib
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+DIMENSION = 384
+ETIQUETAS = np.array(["alta", "media", "baja"])
+
+
+def _ids(texto: str, vocabulario: int) -> List[int]:
+    relleno = f" {texto.lower()} "
+    return [zlib.crc32(relleno[i:i + 3].encode("utf-8")) % vocabulario for i in range(len(relleno) - 2)]
+
+
+class EncoderSustituto:
+    """Trigramas de caracteres → tabla de embeddings → media → MLP residual, como ``SentenceTransformer.encode``."""
+
+    def __init__(self, vocabulario: int = 1 << 15, oculta: int = 1536, semilla: int = 0):
+        rng = np.random.default_rng(semilla)
+        self.vocabulario = vocabulario
+        self.tabla = rng.standard_normal((vocabulario, DIMENSION), dtype=np.float32)
+        self.w1 = rng.standard_normal((DIMENSION, oculta), dtype=np.float32) / np.sqrt(DIMENSION)
+        self.w2 = rng.standard_normal((oculta, DIMENSION), dtype=np.float32) / np.sqrt(oculta)
+
+    def encode(self, textos: Sequence[str], batch_size: int = 32, normalize_embeddings: bool = False, **kwargs) -> np.ndarray:
+        lotes = []
+        for inicio in range(0, len(textos), batch_size):
+            x = np.stack([self.tabla[_ids(texto, self.vocabulario)].mean(axis=0) for texto in textos[inicio:inicio + batch_size]])
+            lotes.append(x + np.tanh(x @ self.w1) @ self.w2)
+        embeddings = np.concatenate(lotes) if lotes else np.empty((0, DIMENSION), dtype=np.float32)
+        if normalize_embeddings:
+            embeddings /= np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        return embeddings.astype(np.float32)
+
+
+class CabezaSustituta:
+    """Cabeza lineal con la interfaz ``predict`` de scikit-learn."""
+
+    def __init__(self, semilla: int = 1):
+        rng = np.random.default_rng(semilla)
+        self.pesos = rng.standard_normal((DIMENSION, len(ETIQUETAS)), dtype=np.float32)
+        self.n_features_in_ = DIMENSION
+
+    def predict(self, embeddings: np.ndarray) -> np.ndarray:
+        return ETIQUETAS[np.argmax(embeddings @ self.pesos, axis=1)]
+
+
+class PipelineSustituto:
+    """
+    Generación autorregresiva simulada con la interfaz de un pipeline de
+    ``transformers``: un paso recurrente por token de salida y por haz, con
+    proyección sobre un vocabulario, sobre todo el lote a la vez.
+    """
+
+    def __init__(self, clave: str, transformar: Callable[[str], str], oculta: int = 256, vocabulario: int = 512, semilla: int = 2):
+        rng = np.random.default_rng(semilla)
+        self.clave = clave
+        self.transformar = transformar
+        self.vocabulario = vocabulario
+        self.entrada = rng.standard_normal((vocabulario, oculta), dtype=np.float32)
+        self.recurrente = rng.standard_normal((oculta, oculta), dtype=np.float32) / np.sqrt(oculta)
+        self.salida = rng.standard_normal((oculta, vocabulario), dtype=np.float32) / np.sqrt(oculta)
+
+    def __call__(self, textos: Sequence[str], batch_size: int = 1, max_length: int = 100, num_beams: int = 1, **kwargs) -> List[dict]:
+        for inicio in range(0, len(textos), batch_size):
+            tokens = [[zlib.crc32(p.encode("utf-8")) % self.vocabulario for p in texto.split()] or [0] for texto in textos[inicio:inicio + batch_size]]
+            pasos = min(max_length, max(map(len, tokens)) + 2)
+            estado = np.zeros((len(tokens) * num_beams, self.recurrente.shape[0]), dtype=np.float32)
+            siguiente = np.repeat([t[0] for t in tokens], num_beams)
+            for _ in range(pasos):
+                estado = np.tanh(estado @ self.recurrente + self.entrada[siguiente])
+                siguiente = np.argmax(estado @ self.salida, axis=1)
+        return [{self.clave: self.transformar(texto)} for texto in textos]
+
+
+def pipelines_sustitutos() -> Dict[str, PipelineSustituto]:
+    """Mismas etapas que ``reformulator.cargar_pipelines``: la salida final es el título con mayúscula inicial."""
+    return {
+        "es_en": PipelineSustituto("translation_text", lambda texto: texto),
+        "parafraseo": PipelineSustituto("generated_text", lambda texto: texto.removeprefix("paraphrase: ")),
+        "en_es": PipelineSustituto("translation_text", lambda texto: texto[:1].upper() + texto[1:]),
+    }
+
+
+CARGADORES = {
+    "encoder": EncoderSustituto,
+    "prioridad": CabezaSustituta,
+    "reformulador": pipelines_sustitutos,
+}
+
+
+def instalar_sustitutos() -> None:
+    """Sustituye los cargadores de los modelos registrados; debe llamarse antes de cargarlos."""
+    # Importar los servicios registra sus gestores
+    import app.services.AI.priority_classifier  # noqa: F401
+    import app.services.AI.reformulator  # noqa: F401
+    from app.services.AI.model_manager import GestorModelo, obtener_gestores
+
+    gestores = obtener_gestores()
+    for nombre, cargador in CARGADORES.items():
+        gestor = gestores[nombre]
+        if gestor.estado != GestorModelo.PENDIENTE:
+            raise RuntimeError(f"El modelo '{nombre}' ya empezó a cargarse.")
+        gestor._cargador = cargador
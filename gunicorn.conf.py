@@ -0,0 +1,44 @@
+"""
+Despliegue con varios workers y modelos compartidos entre ellos.
+
+    gunicorn -c gunicorn.conf.py app.main:app
+
+La aplicación y los modelos de IA se cargan una sola vez en el proceso
+maestro; los workers se crean después con fork y comparten los pesos en
+memoria copy-on-write. Ver la sección "Despliegue con varios workers" del
+README.
+"""
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", "4"))
+worker_class = "uvicorn_worker.UvicornWorker"
+# Importar la app en el maestro antes del fork es lo que permite compartir los modelos
+preload_app = True
+# La primera carga de los modelos puede tardar (descarga, exportación ONNX...)
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+
+
+def on_starting(server):
+    from app.core.config import settings
+    from app.services.AI.backend import modelos_en_proceso
+    from app.services.AI.preload import precargar_modelos
+
+    # Cada worker tendría sus propios trabajos: GET /tasks/ai/jobs/{id} daría
+    # 404 si lo atiende otro worker que el que recibió el POST
+    if settings.JOBS_BACKEND == "memory" and server.cfg.workers > 1:
+        server.log.warning(
+            "JOBS_BACKEND=memory con %s workers: los trabajos asíncronos sólo se ven desde "
+            "el worker que los creó. Usa JOBS_BACKEND=filesystem o celery.", server.cfg.workers,
+        )
+
+    # Con AI_INFERENCE_MODE=remote los modelos los carga el servidor de
+    # inferencia; con AI_BACKEND=rapido no se usan
+    if modelos_en_proceso():
+        precargar_modelos()
+
+
+def post_fork(server, worker):
+    from app.services.AI.preload import reiniciar_tras_fork
+
+    reiniciar_tras_fork()
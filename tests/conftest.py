@@ -1,7 +1,9 @@
 import os
 import asyncio
 import sys
+import zlib
 from types import ModuleType
+import numpy as np
 import pytest_asyncio
 from sqlmodel import SQLModel
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
@@ -17,6 +19,9 @@ def _fake_priority(title: str) -> str:
     return "alta" if "urgente" in title.lower() else "media"
 
 priority_mock.clasificar_prioridad = _fake_priority
+priority_mock.clasificar_prioridad_many = lambda titles, batch_size=None: [_fake_priority(t) for t in titles]
+priority_mock.clasificar_embeddings = lambda embeddings: ["media"] * len(embeddings)
+priority_mock.modelo_listo = lambda: True
 sys.modules.setdefault("app.services.AI.priority_classifier", priority_mock)
 
 reform_mock = ModuleType("app.services.AI.reformulator")
@@ -25,17 +30,35 @@ def _fake_reform(title: str) -> dict:
     return {"reformulada": f"{title} (mock)", "cambio": True, "motivo": "mock"}
 
 reform_mock.reformular_titulo_con_traduccion = _fake_reform
+reform_mock.reformular_titulos = lambda titles, batch_size=None: [_fake_reform(t) for t in titles]
+reform_mock.reformular_desde_cache = lambda titles: [None] * len(titles)
+reform_mock.registrar_aceptadas = lambda cambios: [False] * len(cambios)
 sys.modules.setdefault("app.services.AI.reformulator", reform_mock)
 
+encoder_mock = ModuleType("app.services.AI.sentence_encoder")
 organizer_mock = ModuleType("app.services.AI.task_organizer")
 
-def _fake_group(tasks, umbral: float = 0.4):
+def _fake_group(tasks, umbral: float = 0.4, modo: str = "voraz", embeddings=None, max_tamano=None, n_grupos=None):
     grupos = {}
     for task in tasks:
         grupo = getattr(task, "categoria", "General")
         grupos.setdefault(grupo, []).append(task)
     return grupos
 
+def _fake_embeddings(titles, batch_size=None):
+    # Vectores deterministas por título, sin cargar ningún modelo
+    return np.stack([
+        np.random.default_rng(zlib.crc32(t.encode("utf-8"))).normal(size=8).astype(np.float32)
+        for t in titles
+    ]) if titles else np.empty((0, 8), dtype=np.float32)
+
+encoder_mock.NOMBRE_MODELO = "mock-encoder"
+encoder_mock.calcular_embeddings = _fake_embeddings
+encoder_mock.encoder_listo = lambda: True
+sys.modules.setdefault("app.services.AI.sentence_encoder", encoder_mock)
+
+organizer_mock.NOMBRE_MODELO = "mock-encoder"
+organizer_mock.calcular_embeddings = _fake_embeddings
 organizer_mock.agrupar_tareas_por_similitud = _fake_group
 organizer_mock.agrupar_por_categoria = _fake_group
 sys.modules.setdefault("app.services.AI.task_organizer", organizer_mock)
@@ -0,0 +1,36 @@
+from app.services.AI.batching import ejecutar_por_lotes
+
+
+def test_lotes_agrupan_por_longitud_y_conservan_el_orden():
+    lotes = []
+
+    def modelo(lote):
+        lotes.append(lote)
+        return [texto.upper() for texto in lote]
+
+    textos = ["ccc", "a", "dddd", "bb", "eeeee"]
+    assert ejecutar_por_lotes(modelo, textos, tamano_lote=2) == ["CCC", "A", "DDDD", "BB", "EEEEE"]
+    assert lotes == [["a", "bb"], ["ccc", "dddd"], ["eeeee"]]
+
+
+def test_un_error_no_afecta_al_resto_del_lote():
+    llamadas = []
+
+    def modelo(lote):
+        llamadas.append(len(lote))
+        if "roto" in lote:
+            raise RuntimeError("entrada inválida")
+        return [texto[::-1] for texto in lote]
+
+    resultados = ejecutar_por_lotes(modelo, ["hola", "roto", "adios"], tamano_lote=8)
+    assert resultados[0] == "aloh"
+    assert isinstance(resultados[1], RuntimeError)
+    assert resultados[2] == "soida"
+    assert llamadas == [3, 1, 1, 1]
+
+
+def test_numero_de_salidas_incorrecto_se_reintenta_uno_a_uno():
+    def modelo(lote):
+        return lote[:1]
+
+    assert ejecutar_por_lotes(modelo, ["x", "yy"], tamano_lote=2) == ["x", "yy"]
@@ -0,0 +1,38 @@
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+from benchmarks.sustitutos import DIMENSION, CabezaSustituta, EncoderSustituto, pipelines_sustitutos
+
+
+def test_sustitutos_tienen_la_interfaz_de_los_modelos_reales():
+    embeddings = EncoderSustituto().encode(["Comprar pan", "Pagar el alquiler"], batch_size=1, normalize_embeddings=True)
+    assert embeddings.shape == (2, DIMENSION)
+    assert embeddings.dtype == np.float32
+    assert np.allclose(np.linalg.norm(embeddings, axis=1), 1.0, atol=1e-5)
+
+    assert set(CabezaSustituta().predict(embeddings)) <= {"alta", "media", "baja"}
+
+    salida = pipelines_sustitutos()["parafraseo"](["paraphrase: comprar pan"], batch_size=1, num_beams=2)
+    assert salida == [{"generated_text": "comprar pan"}]
+
+
+def test_informe_json_de_los_endpoints(tmp_path):
+    salida = tmp_path / "informe.json"
+    subprocess.run(
+        [sys.executable, "-m", "benchmarks.ai_endpoints", "--tareas", "10", "--repeticiones", "2", "--salida", str(salida)],
+        check=True, capture_output=True, timeout=300,
+    )
+    informe = json.loads(salida.read_text(encoding="utf-8"))
+
+    resultados = {r["endpoint"]: r for r in informe["resultados"]}
+    assert set(resultados) == {"prioritize", "group", "rewrite", "suggest"}
+    for resultado in resultados.values():
+        assert "error" not in resultado, resultado
+        assert resultado["tareas"] == 10
+        assert resultado["p50_ms"] <= resultado["p95_ms"] <= resultado["p99_ms"]
+        assert resultado["rss_max_mb"] >= resultado["rss_inicial_mb"] > 0
+    assert resultados["prioritize"]["tareas_por_s"] > 0
+    assert resultados["suggest"]["peticiones_por_s"] > 0
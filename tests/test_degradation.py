@@ -0,0 +1,142 @@
+import asyncio
+import time
+from uuid import UUID
+
+from httpx import AsyncClient
+from sqlmodel import delete, select
+
+from app.api.v1.endpoints import tasks_ai
+from app.core.config import settings
+from app.db.session import async_session as app_session
+from app.models.task import Task
+from app.models.task_embedding import TaskEmbedding
+from app.services import degradation
+from app.services.intelligence import detect_group, rewrite_task_title
+from tests.utils import create_user_and_token, create_task
+
+
+async def _lento(*args, **kwargs):
+    # Sigue en segundo plano cuando la respuesta ya se envió
+    await asyncio.sleep(2)
+    return {}
+
+
+async def test_sin_plazo_todo_lo_sirve_el_modelo(async_client: AsyncClient):
+    _, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Regar las plantas", "categoria": "OTRO"})
+
+    response = await async_client.post("/api/v1/tasks/ai/rewrite", headers=headers, json={})
+    assert [t["nivel"] for t in response.json()] == ["modelo"]
+    # El modo incremental sirve el grupo asignado al crear la tarea
+    response = await async_client.post("/api/v1/tasks/ai/group", headers=headers, json={})
+    assert [t["nivel"] for tareas in response.json()["grupos"].values() for t in tareas] == ["cache"]
+    response = await async_client.post("/api/v1/tasks/ai/group", headers=headers, json={"modo": "voraz"})
+    assert [t["nivel"] for tareas in response.json()["grupos"].values() for t in tareas] == ["modelo"]
+
+
+async def test_rewrite_degrada_lo_que_no_termina_a_tiempo(async_client: AsyncClient, monkeypatch):
+    def reformular(titulos, batch_size=None):
+        if any("lento" in titulo for titulo in titulos):
+            time.sleep(1)
+        return [{"reformulada": f"{t} (modelo)", "cambio": True, "motivo": "modelo"} for t in titulos]
+
+    def desde_cache(titulos):
+        return [{"reformulada": f"{t} (caché)", "cambio": True, "motivo": "caché"} if "guardado" in t else None
+                for t in titulos]
+
+    monkeypatch.setattr(degradation, "reformular_titulos", reformular)
+    monkeypatch.setattr(degradation, "reformular_desde_cache", desde_cache)
+    monkeypatch.setattr(settings, "AI_REWRITE_BATCH_SIZE", 1)
+
+    _, token = await create_user_and_token(async_client)
+    for titulo in ("Regar las plantas", "Un título lento de parafrasear", "Título guardado", "Otro pendiente"):
+        await create_task(async_client, token, {"titulo": titulo, "categoria": "OTRO"})
+
+    inicio = time.monotonic()
+    response = await async_client.post(
+        "/api/v1/tasks/ai/rewrite?deadline_ms=300", headers={"Authorization": f"Bearer {token}"}, json={},
+    )
+    assert time.monotonic() - inicio < 1
+    assert response.status_code == 200
+    por_titulo = {t["original"]: t for t in response.json()}
+    assert por_titulo["Regar las plantas"]["nivel"] == "modelo"
+    assert por_titulo["Título guardado"]["nivel"] == "cache"
+    assert por_titulo["Título guardado"]["reformulada"] == "Título guardado (caché)"
+    for titulo in ("Un título lento de parafrasear", "Otro pendiente"):
+        assert por_titulo[titulo]["nivel"] == "heuristica"
+        assert por_titulo[titulo]["reformulada"] == rewrite_task_title(titulo)
+        assert por_titulo[titulo]["motivo"] == degradation.MOTIVO_PLAZO
+
+
+async def test_group_usa_los_grupos_guardados_y_luego_palabras_clave(async_client: AsyncClient, monkeypatch):
+    user, token = await create_user_and_token(async_client)
+    await create_task(async_client, token, {"titulo": "Limpiar cocina", "categoria": "LIMPIEZA"})
+    sin_embedding = await create_task(async_client, token, {"titulo": "Fregar los platos", "categoria": "LIMPIEZA"})
+    async with app_session() as session:
+        await session.exec(delete(TaskEmbedding).where(TaskEmbedding.task_id == UUID(sin_embedding["id"])))
+        await session.commit()
+
+    monkeypatch.setattr(tasks_ai, "_agrupar_en_sesion", _lento)
+    response = await async_client.post(
+        "/api/v1/tasks/ai/group", headers={"Authorization": f"Bearer {token}", "X-Deadline-Ms": "100"}, json={},
+    )
+    assert response.status_code == 200
+    grupos = response.json()["grupos"]
+    assert [(t["titulo"], t["nivel"]) for t in grupos["Grupo 1"]] == [("Limpiar cocina", "cache")]
+    assert [(t["titulo"], t["nivel"]) for t in grupos[detect_group("Fregar los platos")]] == [
+        ("Fregar los platos", "heuristica")
+    ]
+
+
+async def test_group_no_sirve_el_grupo_guardado_de_un_titulo_cambiado(async_client: AsyncClient, monkeypatch):
+    user, token = await create_user_and_token(async_client)
+    await create_task(async_client, token, {"titulo": "Limpiar cocina", "categoria": "LIMPIEZA"})
+    cambiada = await create_task(async_client, token, {"titulo": "Fregar los platos", "categoria": "LIMPIEZA"})
+    # El título cambia y su embedding (y su grupo) aún no se han recalculado
+    async with app_session() as session:
+        task = (await session.exec(select(Task).where(Task.id == UUID(cambiada["id"])))).one()
+        task.titulo = "Preparar el examen"
+        session.add(task)
+        await session.commit()
+
+    monkeypatch.setattr(tasks_ai, "_agrupar_en_sesion", _lento)
+    response = await async_client.post(
+        "/api/v1/tasks/ai/group", headers={"Authorization": f"Bearer {token}", "X-Deadline-Ms": "100"}, json={},
+    )
+    assert response.status_code == 200
+    grupos = response.json()["grupos"]
+    assert [(t["titulo"], t["nivel"]) for t in grupos["Grupo 1"]] == [("Limpiar cocina", "cache")]
+    assert [(t["titulo"], t["nivel"]) for t in grupos[detect_group("Preparar el examen")]] == [
+        ("Preparar el examen", "heuristica")
+    ]
+
+
+async def test_prioritize_sirve_prioridades_guardadas_al_vencer_el_plazo(async_client: AsyncClient, monkeypatch):
+    user, token = await create_user_and_token(async_client)
+    await create_task(async_client, token, {"titulo": "Pagar el alquiler", "categoria": "OTRO"})
+    sin_prioridad = await create_task(async_client, token, {"titulo": "Entregar informe urgente", "categoria": "OTRO"})
+    async with app_session() as session:
+        task = (await session.exec(select(Task).where(Task.id == UUID(sin_prioridad["id"])))).one()
+        task.prioridad = None
+        session.add(task)
+        await session.commit()
+
+    async def priorizar_lento(task_ids):
+        await asyncio.sleep(2)
+        yield
+
+    monkeypatch.setattr(tasks_ai, "_priorizar_por_lotes", priorizar_lento)
+    response = await async_client.post(
+        "/api/v1/tasks/ai/prioritize?deadline_ms=100", headers={"Authorization": f"Bearer {token}"}, json={},
+    )
+    assert response.status_code == 200
+    por_titulo = {t["titulo"]: t for t in response.json()}
+    assert por_titulo["Pagar el alquiler"]["nivel"] == "cache"
+    assert por_titulo["Entregar informe urgente"] == {
+        "id": sin_prioridad["id"],
+        "titulo": "Entregar informe urgente",
+        "prioridad": "alta",
+        "motivo": degradation.MOTIVO_PLAZO,
+        "nivel": "heuristica",
+    }
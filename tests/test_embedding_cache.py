@@ -0,0 +1,84 @@
+import numpy as np
+
+from app.services.AI.embedding_cache import (
+    AlmacenEmbeddingsSQLite,
+    CacheEmbeddings,
+    CacheLRU,
+    clave_embedding,
+)
+
+
+class CodificadorFalso:
+    def __init__(self):
+        self.llamadas = []
+
+    def __call__(self, titulos):
+        self.llamadas.append(list(titulos))
+        return np.array([[len(t), t.count("a"), 1.0] for t in titulos], dtype=np.float32)
+
+
+def test_clave_depende_del_modelo_y_normaliza_espacios():
+    assert clave_embedding("m1", "Limpiar  cocina ") == clave_embedding("m1", "Limpiar cocina")
+    assert clave_embedding("m1", "Limpiar cocina") != clave_embedding("m2", "Limpiar cocina")
+
+
+def test_lru_expulsa_el_menos_usado():
+    cache = CacheLRU(2)
+    cache.guardar("a", 1)
+    cache.guardar("b", 2)
+    assert cache.obtener("a") == 1
+    cache.guardar("c", 3)
+    assert cache.obtener("b") is None
+    assert cache.obtener("c") == 3
+    assert (cache.aciertos, cache.fallos, cache.expulsiones) == (2, 1, 1)
+
+
+def test_solo_los_titulos_nuevos_llegan_al_codificador(tmp_path):
+    codificar = CodificadorFalso()
+    cache = CacheEmbeddings(CacheLRU(100), AlmacenEmbeddingsSQLite(tmp_path / "emb.sqlite3", 100))
+
+    primera = cache.obtener_o_calcular("m", ["Lavar ropa", "Comprar pan", "Lavar ropa"], codificar)
+    segunda = cache.obtener_o_calcular("m", ["Comprar pan", "Pagar agua", "Lavar ropa"], codificar)
+
+    assert codificar.llamadas == [["Lavar ropa", "Comprar pan"], ["Pagar agua"]]
+    assert primera.shape == (3, 3)
+    np.testing.assert_array_equal(primera[0], primera[2])
+    np.testing.assert_array_equal(segunda[0], primera[1])
+    assert cache.estadisticas()["codificados"] == 3
+
+
+def test_nivel_en_disco_sobrevive_al_proceso(tmp_path):
+    ruta = tmp_path / "emb.sqlite3"
+    codificar = CodificadorFalso()
+    CacheEmbeddings(CacheLRU(10), AlmacenEmbeddingsSQLite(ruta, 10)).obtener_o_calcular("m", ["Sacar basura"], codificar)
+
+    nueva = CacheEmbeddings(CacheLRU(10), AlmacenEmbeddingsSQLite(ruta, 10))
+    nueva.obtener_o_calcular("m", ["Sacar basura"], codificar)
+
+    assert len(codificar.llamadas) == 1
+    assert nueva.estadisticas()["disco_aciertos"] == 1
+
+
+def test_disco_acotado_y_float16(tmp_path):
+    almacen = AlmacenEmbeddingsSQLite(tmp_path / "emb.sqlite3", max_filas=10, dtype="float16")
+    almacen.guardar_varios({f"k{i}": np.full(4, i, dtype=np.float32) for i in range(15)})
+    assert len(almacen) <= 10
+    assert almacen.expulsiones > 0
+    recuperados = almacen.obtener_varios(["k14"])
+    assert recuperados["k14"].dtype == np.float32
+    np.testing.assert_allclose(recuperados["k14"], 14)
+
+
+def test_cambiar_de_dtype_invalida_el_disco(tmp_path):
+    ruta = tmp_path / "emb.sqlite3"
+    codificar = CodificadorFalso()
+    CacheEmbeddings(CacheLRU(10), AlmacenEmbeddingsSQLite(ruta, 10)).obtener_o_calcular("m", ["Sacar basura"], codificar)
+
+    nueva = CacheEmbeddings(CacheLRU(10), AlmacenEmbeddingsSQLite(ruta, 10, dtype="float16"))
+    vector = nueva.obtener_o_calcular("m", ["Sacar basura"], codificar)
+
+    assert len(codificar.llamadas) == 2
+    assert nueva.estadisticas()["disco_fallos"] == 1
+    np.testing.assert_allclose(vector[0], [12, 4, 1])
+    # La fila se sobrescribe con el dtype nuevo
+    assert len(AlmacenEmbeddingsSQLite(ruta, 10, dtype="float16").obtener_varios([clave_embedding("m", "Sacar basura")])) == 1
@@ -0,0 +1,74 @@
+import asyncio
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.AI.executor import ColaInferenciaLlena, EjecutorInferencia
+from tests.utils import create_user_and_token
+
+
+@pytest.mark.asyncio
+async def test_la_inferencia_no_bloquea_el_bucle_de_eventos():
+    ejecutor = EjecutorInferencia(max_workers=1, max_cola=4)
+    liberar = threading.Event()
+    tarea = asyncio.create_task(ejecutor.ejecutar("lenta", liberar.wait, 5))
+
+    # El bucle sigue atendiendo otras corrutinas mientras la inferencia corre
+    await asyncio.sleep(0.05)
+    assert not tarea.done()
+    liberar.set()
+    assert await tarea is True
+
+    metricas = ejecutor.metricas()
+    assert metricas["pendientes"] == 0
+    assert metricas["operaciones"]["lenta"]["llamadas"] == 1
+    assert metricas["operaciones"]["lenta"]["computo_medio_ms"] >= 40
+    ejecutor.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_cola_acotada_rechaza_el_exceso():
+    ejecutor = EjecutorInferencia(max_workers=1, max_cola=1)
+    liberar = threading.Event()
+    en_curso = [asyncio.create_task(ejecutor.ejecutar("op", liberar.wait, 5)) for _ in range(2)]
+    await asyncio.sleep(0)
+
+    with pytest.raises(ColaInferenciaLlena):
+        await ejecutor.ejecutar("op", lambda: None)
+    assert ejecutor.metricas()["rechazadas"] == 1
+
+    liberar.set()
+    await asyncio.gather(*en_curso)
+    # La segunda llamada esperó en cola a que terminara la primera
+    assert ejecutor.metricas()["operaciones"]["op"]["espera_max_ms"] > 0
+    ejecutor.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_errores_se_propagan_y_se_cuentan():
+    ejecutor = EjecutorInferencia(max_workers=1, max_cola=1)
+
+    def falla():
+        raise ValueError("modelo roto")
+
+    with pytest.raises(ValueError):
+        await ejecutor.ejecutar("falla", falla)
+    assert ejecutor.metricas()["operaciones"]["falla"]["errores"] == 1
+    assert ejecutor.pendientes == 0
+    ejecutor.cerrar()
+
+
+@pytest.mark.asyncio
+async def test_endpoint_de_metricas(async_client: AsyncClient):
+    user, token = await create_user_and_token(async_client)
+    await async_client.post("/api/v1/tasks/ai/suggest", json={"titulo": "Ordenar el garaje"})
+    response = await async_client.get("/api/v1/tasks/ai/metrics", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert "sugerencia" in response.json()["operaciones"]
+
+
+@pytest.mark.asyncio
+async def test_endpoint_de_metricas_requiere_autenticacion(async_client: AsyncClient):
+    response = await async_client.get("/api/v1/tasks/ai/metrics")
+    assert response.status_code == 401
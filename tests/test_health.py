@@ -0,0 +1,88 @@
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.AI import model_manager
+from app.services.AI.model_manager import GestorModelo, calentar_modelos, registrar_gestor
+
+
+@pytest.fixture
+def gestor_lento():
+    liberar = threading.Event()
+    calentamientos = []
+
+    def cargador():
+        liberar.wait(5)
+        return "modelo"
+
+    gestor = registrar_gestor(GestorModelo("lento", cargador, calentamientos.append))
+    yield gestor, liberar, calentamientos
+    liberar.set()
+    model_manager._gestores.pop("lento", None)
+
+
+@pytest.mark.asyncio
+async def test_live_responde_siempre(async_client: AsyncClient):
+    response = await async_client.get("/health/live")
+    assert response.status_code == 200
+    assert response.json() == {"estado": "vivo"}
+
+
+@pytest.mark.asyncio
+async def test_ready_espera_a_que_los_modelos_esten_calientes(async_client: AsyncClient, gestor_lento):
+    gestor, liberar, calentamientos = gestor_lento
+    gestor.iniciar()
+
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
+    cuerpo = response.json()
+    assert cuerpo["listo"] is False
+    assert cuerpo["modelos"]["lento"]["estado"] == "cargando"
+    assert cuerpo["base_datos"] == {"ok": True, "error": None}
+    assert cuerpo["ejecutor"]["ok"] is True
+
+    liberar.set()
+    await calentar_modelos()
+    assert calentamientos == ["modelo"]
+
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+    resumen = response.json()["modelos"]["lento"]
+    assert resumen["caliente"] is True
+    assert resumen["calentamiento_ms"] is not None
+
+
+def test_calentamiento_fallido_se_reintenta():
+    fallos = []
+
+    def calentar(modelo):
+        if not fallos:
+            fallos.append(modelo)
+            raise RuntimeError("sin memoria")
+
+    gestor = GestorModelo("fragil", lambda: "modelo", calentar)
+    assert not gestor.calentar()  # aún no cargado
+    gestor.iniciar()
+    assert gestor.esperar(5)
+
+    assert not gestor.calentar()
+    assert not gestor.caliente
+    assert "sin memoria" in gestor.resumen()["error"]
+
+    assert gestor.calentar()
+    assert gestor.caliente
+    assert gestor.resumen()["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_ready_con_backend_rapido_no_espera_modelos(async_client: AsyncClient, gestor_lento, monkeypatch):
+    from app.core.config import settings
+
+    monkeypatch.setattr(settings, "AI_BACKEND", "rapido")
+    gestor_lento[0].iniciar()
+
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 200
+    assert response.json()["backend"] == "rapido"
+    assert response.json()["modelos"] == {}
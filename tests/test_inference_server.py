@@ -0,0 +1,145 @@
+import asyncio
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+
+from app.api.v1.endpoints import health, tasks_ai
+from app.services.AI import inference_client, inference_server
+from app.services.AI.inference_client import ClienteInferencia, ServidorInferenciaNoDisponible
+from app.services.AI.inference_server import ServidorInferencia
+from app.services.AI.protocol import (
+    ESTADO_OK,
+    OP_EMBEDDINGS,
+    codificar_peticion,
+    codificar_respuesta,
+    decodificar_peticion,
+    decodificar_respuesta,
+)
+from app.services.AI.sentence_encoder import calcular_embeddings
+from tests.utils import create_user_and_token
+
+
+@pytest.fixture
+async def servidor(tmp_path):
+    ruta = str(tmp_path / "inferencia.sock")
+    instancia = ServidorInferencia(ventana_ms=50, max_lote=64)
+    await instancia.servir(ruta)
+    yield instancia, ClienteInferencia(ruta, timeout=5)
+    await instancia.cerrar()
+
+
+def test_protocolo_ida_y_vuelta():
+    matriz = np.arange(6, dtype=np.float32).reshape(2, 3)
+    operacion, peticion_id, valor = decodificar_peticion(codificar_peticion(OP_EMBEDDINGS, 7, matriz)[4:])
+    assert (operacion, peticion_id) == (OP_EMBEDDINGS, 7)
+    np.testing.assert_array_equal(valor, matriz)
+
+    textos = ["Regar las plantas", "Pagar el alquiler ñ€", ""]
+    assert decodificar_respuesta(codificar_respuesta(3, ESTADO_OK, textos)[4:]) == (3, ESTADO_OK, textos)
+
+    dicts = [{"reformulada": "Regar", "cambio": True, "motivo": "mock"}]
+    assert decodificar_respuesta(codificar_respuesta(4, ESTADO_OK, dicts)[4:])[2] == dicts
+
+
+async def test_cliente_obtiene_los_mismos_resultados_que_en_proceso(servidor):
+    _, cliente = servidor
+    titulos = ["Entregar informe urgente", "Regar las plantas"]
+
+    embeddings = await asyncio.to_thread(cliente.llamar, inference_server.OP_EMBEDDINGS, titulos)
+    np.testing.assert_array_equal(embeddings, calcular_embeddings(titulos))
+    assert await asyncio.to_thread(cliente.llamar, inference_server.OP_PRIORIDAD, titulos) == ["alta", "media"]
+    assert await asyncio.to_thread(cliente.llamar, inference_server.OP_PRIORIDAD_EMBEDDINGS, embeddings) == ["media", "media"]
+    reformuladas = await asyncio.to_thread(cliente.llamar, inference_server.OP_REFORMULAR, titulos)
+    assert [r["reformulada"] for r in reformuladas] == [f"{t} (mock)" for t in titulos]
+
+    estado = await asyncio.to_thread(cliente.actualizar_estado)
+    assert estado["modelo_listo"] is True
+    assert "error" not in estado
+
+
+async def test_peticiones_concurrentes_se_agrupan_en_un_lote(servidor):
+    instancia, cliente = servidor
+    titulos = [f"Tarea {i}" for i in range(8)]
+
+    resultados = await asyncio.gather(*(
+        asyncio.to_thread(cliente.llamar, inference_server.OP_EMBEDDINGS, [titulo]) for titulo in titulos
+    ))
+
+    assert [r.shape for r in resultados] == [(1, 8)] * len(titulos)
+    lotes = instancia.lotes[inference_server.OP_EMBEDDINGS]
+    assert lotes.elementos == len(titulos)
+    assert lotes.lotes < len(titulos)
+
+
+async def test_errores_del_servidor_llegan_al_cliente(tmp_path, monkeypatch):
+    def fallar(titulos):
+        raise ValueError("modelo roto")
+
+    monkeypatch.setitem(inference_server.OPERACIONES, inference_server.OP_PRIORIDAD, ("prioridad", fallar))
+    ruta = str(tmp_path / "inferencia.sock")
+    instancia = ServidorInferencia(ventana_ms=0)
+    await instancia.servir(ruta)
+    try:
+        cliente = ClienteInferencia(ruta, timeout=5)
+        with pytest.raises(RuntimeError, match="modelo roto"):
+            await asyncio.to_thread(cliente.llamar, inference_server.OP_PRIORIDAD, ["Regar"])
+        # La conexión sigue sirviendo otras peticiones
+        assert len(await asyncio.to_thread(cliente.llamar, inference_server.OP_EMBEDDINGS, ["Regar"])) == 1
+    finally:
+        await instancia.cerrar()
+
+
+def test_sin_servidor_responde_como_ia_saturada(tmp_path):
+    cliente = ClienteInferencia(str(tmp_path / "no-existe.sock"), timeout=1)
+    with pytest.raises(ServidorInferenciaNoDisponible):
+        cliente.llamar(inference_server.OP_PRIORIDAD, ["Regar"])
+    assert cliente.actualizar_estado()["modelo_listo"] is False
+
+
+async def test_endpoints_en_modo_remoto(async_client: AsyncClient, servidor, monkeypatch):
+    instancia, cliente = servidor
+    monkeypatch.setattr(inference_client, "obtener_cliente", lambda: cliente)
+    monkeypatch.setattr(tasks_ai, "clasificar_prioridad_many", inference_client.clasificar_prioridad_many)
+    monkeypatch.setattr(tasks_ai, "modelo_listo", inference_client.modelo_listo)
+    monkeypatch.setattr(health, "estado_modelos", inference_client.estado_modelos)
+    tasks_ai._lotes_sugerencia.cache_clear()
+    await asyncio.to_thread(cliente.actualizar_estado)
+
+    _, token = await create_user_and_token(async_client)
+    response = await async_client.post(
+        "/api/v1/tasks/ai/suggest",
+        headers={"Authorization": f"Bearer {token}"},
+        json={"titulo": "Regar las plantas"},
+    )
+    tasks_ai._lotes_sugerencia.cache_clear()
+    assert response.status_code == 200
+    assert response.json()["prioridad"] == "media"
+    assert instancia.lotes[inference_server.OP_PRIORIDAD].elementos == 1
+
+    response = await async_client.get("/health/ready")
+    assert "servidor_inferencia" not in response.json()["modelos"]
+
+    # Sin servidor el worker deja de estar listo
+    await instancia.cerrar()
+    await asyncio.to_thread(cliente.actualizar_estado)
+    response = await async_client.get("/health/ready")
+    assert response.status_code == 503
+    assert response.json()["modelos"]["servidor_inferencia"]["estado"] == "error"
+
+
+async def test_metricas_del_reformulador_en_modo_remoto(async_client: AsyncClient, servidor, monkeypatch):
+    instancia, cliente = servidor
+    monkeypatch.setattr(inference_client, "obtener_cliente", lambda: cliente)
+    monkeypatch.setattr(tasks_ai, "metricas_reformulacion", inference_client.metricas_reformulacion)
+    # La puerta corre en el servidor: sus contadores, no los del worker
+    monkeypatch.setattr(inference_server, "metricas_reformulacion", lambda: {"titulos": 7})
+
+    _, token = await create_user_and_token(async_client)
+    response = await async_client.get("/api/v1/tasks/ai/metrics", headers={"Authorization": f"Bearer {token}"})
+    assert response.status_code == 200
+    assert response.json()["reformulador"] == {"titulos": 7}
+
+    await instancia.cerrar()
+    response = await async_client.get("/api/v1/tasks/ai/metrics", headers={"Authorization": f"Bearer {token}"})
+    assert "error" in response.json()["reformulador"]
@@ -0,0 +1,109 @@
+import asyncio
+from uuid import uuid4
+
+import pytest
+from httpx import AsyncClient
+
+from app.services.jobs import AlmacenFicheros, COMPLETADO, ERROR, nuevo_trabajo, procesar_reescritura
+from tests.utils import create_user_and_token, create_task
+
+
+async def _esperar_trabajo(client, headers, job_id):
+    for _ in range(100):
+        response = await client.get(f"/api/v1/tasks/ai/jobs/{job_id}", headers=headers)
+        assert response.status_code == 200
+        if response.json()["estado"] in (COMPLETADO, ERROR):
+            return response.json()
+        await asyncio.sleep(0.02)
+    pytest.fail("El trabajo no terminó a tiempo")
+
+
+@pytest.mark.asyncio
+async def test_rewrite_async_devuelve_id_y_resultados(async_client: AsyncClient):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Hacer la compra", "categoria": "COMPRA"})
+    await create_task(async_client, token, {"titulo": "Tender la ropa", "categoria": "LIMPIEZA"})
+
+    response = await async_client.post("/api/v1/tasks/ai/rewrite?async=true", headers=headers, json={})
+    assert response.status_code == 202
+    inicial = response.json()
+    assert inicial["total"] == 2
+    assert "user_id" not in inicial and "tareas" not in inicial
+
+    final = await _esperar_trabajo(async_client, headers, inicial["id"])
+    assert final["estado"] == COMPLETADO
+    assert final["procesadas"] == 2
+    assert sorted(r["original"] for r in final["resultados"]) == ["Hacer la compra", "Tender la ropa"]
+
+
+@pytest.mark.asyncio
+async def test_trabajo_de_otro_usuario_no_es_visible(async_client: AsyncClient):
+    _, token = await create_user_and_token(async_client)
+    await create_task(async_client, token, {"titulo": "Limpiar ventanas", "categoria": "LIMPIEZA"})
+    response = await async_client.post(
+        "/api/v1/tasks/ai/rewrite?async=true", headers={"Authorization": f"Bearer {token}"}, json={}
+    )
+    job_id = response.json()["id"]
+
+    _, otro_token = await create_user_and_token(async_client)
+    response = await async_client.get(f"/api/v1/tasks/ai/jobs/{job_id}", headers={"Authorization": f"Bearer {otro_token}"})
+    assert response.status_code == 404
+
+
+def test_progreso_parcial_en_almacen_de_ficheros(tmp_path):
+    almacen = AlmacenFicheros(tmp_path)
+    tareas = [{"id": str(uuid4()), "titulo": f"Tarea {i}"} for i in range(5)]
+    trabajo = nuevo_trabajo("reescritura", uuid4(), tareas)
+    instantaneas = []
+
+    def guardar(estado):
+        almacen.guardar(estado)
+        instantaneas.append((estado["estado"], estado["procesadas"]))
+
+    procesar_reescritura(trabajo, lambda titulos: [{"reformulada": t, "motivo": "ok"} for t in titulos], guardar, tamano_lote=2)
+
+    assert instantaneas == [("en_curso", 0), ("en_curso", 2), ("en_curso", 4), ("en_curso", 5), ("completado", 5)]
+    guardado = almacen.obtener(trabajo["id"])
+    assert guardado["estado"] == COMPLETADO
+    assert len(guardado["resultados"]) == 5
+    assert almacen.obtener("../etc") is None
+
+
+def test_error_del_modelo_queda_registrado():
+    trabajo = nuevo_trabajo("reescritura", uuid4(), [{"id": "1", "titulo": "x"}])
+
+    def falla(titulos):
+        raise RuntimeError("sin memoria")
+
+    resultado = procesar_reescritura(trabajo, falla, lambda estado: None)
+    assert resultado["estado"] == ERROR
+    assert "sin memoria" in resultado["error"]
+
+
+def test_trabajo_local_envia_cada_lote_al_ejecutor(monkeypatch):
+    import threading
+
+    from app.core.config import settings
+    from app.services.AI import backend
+    from app.services.jobs import AlmacenMemoria, BackendLocal
+
+    hilos = []
+
+    def reformular(titulos, batch_size=None):
+        hilos.append(threading.current_thread().name)
+        return [{"reformulada": t, "motivo": "ok"} for t in titulos]
+
+    monkeypatch.setattr(backend, "reformular_titulos", reformular)
+    monkeypatch.setattr(settings, "AI_REWRITE_BATCH_SIZE", 2)
+    almacen = AlmacenMemoria()
+    tareas = [{"id": str(uuid4()), "titulo": f"Tarea {i}"} for i in range(5)]
+    trabajo = BackendLocal(almacen).lanzar_reescritura(uuid4(), tareas)
+
+    for _ in range(100):
+        if almacen.obtener(trabajo["id"])["estado"] == COMPLETADO:
+            break
+        threading.Event().wait(0.02)
+    assert almacen.obtener(trabajo["id"])["procesadas"] == 5
+    # Tres lotes, cada uno una llamada propia al ejecutor (el hilo se libera entre lotes)
+    assert len(hilos) == 3 and all(nombre.startswith("inferencia") for nombre in hilos)
@@ -0,0 +1,61 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from app.services.AI.keywords import MotorPalabrasClave, ReglaPalabraClave, cargar_reglas, plegar
+
+REGLAS = [
+    ReglaPalabraClave(nombre="urgencia", palabras=["urgente", "última hora"], prioridad="alta", motivo="urgente"),
+    ReglaPalabraClave(nombre="aplazable", palabras=["cuando pueda", "algún día"], prioridad="baja", motivo="aplazable"),
+]
+
+
+def test_plegar_quita_tildes_y_mayusculas():
+    assert plegar("ÚLTIMA Hora, mañana") == "ultima hora, manana"
+
+
+def test_busca_sin_tildes_y_con_limites_de_palabra():
+    motor = MotorPalabrasClave(REGLAS)
+    assert motor.buscar("Informe de ULTIMA  hora").nombre == "urgencia"
+    assert motor.buscar("Ordenar fotos algun dia").prioridad == "baja"
+    assert motor.buscar("Urgentemente no cuenta") is None
+    assert motor.buscar("Regar plantas") is None
+
+
+def test_gana_la_primera_regla_que_coincide():
+    motor = MotorPalabrasClave(REGLAS)
+    assert motor.buscar("Cuando pueda, revisar algo urgente").nombre == "urgencia"
+
+
+def test_buscar_varios_equivale_a_buscar_uno_a_uno():
+    motor = MotorPalabrasClave(REGLAS)
+    textos = ["Algo urgente", "Regar", "", "cuando pueda", "última\nhora", "hora"]
+    assert motor.buscar_varios(textos) == [motor.buscar(t) for t in textos]
+
+
+def test_frases_no_cruzan_de_un_texto_a_otro():
+    motor = MotorPalabrasClave(REGLAS)
+    assert motor.buscar_varios(["Cuando", "pueda"]) == [None, None]
+
+
+def test_reglas_desde_json(tmp_path):
+    ruta = tmp_path / "reglas.json"
+    ruta.write_text(json.dumps([
+        {"nombre": "examen", "palabras": ["examen"], "prioridad": "alta", "motivo": "Hay un examen."},
+    ]), encoding="utf-8")
+
+    reglas = cargar_reglas(str(ruta))
+    assert MotorPalabrasClave(reglas).buscar("Estudiar para el EXAMEN").motivo == "Hay un examen."
+
+
+def test_reglas_invalidas_fallan_al_cargar(tmp_path):
+    ruta = tmp_path / "reglas.json"
+    ruta.write_text(json.dumps([{"nombre": "x", "palabras": ["y"], "prioridad": "maxima", "motivo": "z"}]))
+    with pytest.raises(ValidationError):
+        cargar_reglas(str(ruta))
+
+
+def test_reglas_por_defecto_sin_configuracion():
+    motor = MotorPalabrasClave(cargar_reglas(""))
+    assert motor.buscar("Pagar el alquiler MANANA").prioridad == "alta"
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.services.AI.microbatch import MicroLotes
+from tests.utils import create_user_and_token
+
+
+def _procesador(llamadas):
+    async def procesar(titulos):
+        llamadas.append(list(titulos))
+        return [titulo.upper() for titulo in titulos]
+
+    return procesar
+
+
+@pytest.mark.asyncio
+async def test_peticiones_concurrentes_comparten_lote():
+    llamadas = []
+    lotes = MicroLotes(_procesador(llamadas), ventana_ms=20, max_lote=10)
+
+    resultados = await asyncio.gather(*(lotes.enviar(t) for t in ["a", "b", "c"]))
+
+    assert resultados == ["A", "B", "C"]
+    assert llamadas == [["a", "b", "c"]]
+    assert lotes.metricas()["tasa_llenado"] == pytest.approx(0.3)
+
+
+@pytest.mark.asyncio
+async def test_lote_lleno_se_procesa_sin_esperar_la_ventana():
+    llamadas = []
+    lotes = MicroLotes(_procesador(llamadas), ventana_ms=10_000, max_lote=2)
+
+    resultados = await asyncio.wait_for(asyncio.gather(*(lotes.enviar(t) for t in "abcd")), timeout=1)
+
+    assert resultados == ["A", "B", "C", "D"]
+    assert llamadas == [["a", "b"], ["c", "d"]]
+    metricas = lotes.metricas()
+    assert metricas["lotes_llenos"] == 2
+    assert metricas["tasa_llenado"] == 1.0
+
+
+@pytest.mark.asyncio
+async def test_error_del_lote_llega_a_cada_llamador():
+    async def falla(titulos):
+        raise ValueError("modelo roto")
+
+    lotes = MicroLotes(falla, ventana_ms=5, max_lote=10)
+    resultados = await asyncio.gather(lotes.enviar("a"), lotes.enviar("b"), return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in resultados)
+    assert lotes.metricas()["errores"] == 1
+
+
+@pytest.mark.asyncio
+async def test_suggest_agrupa_peticiones_concurrentes(async_client: AsyncClient, monkeypatch):
+    from app.api.v1.endpoints import tasks_ai
+
+    llamadas = []
+
+    def fake_many(titulos):
+        llamadas.append(list(titulos))
+        return ["baja"] * len(titulos)
+
+    monkeypatch.setattr(tasks_ai, "clasificar_prioridad_many", fake_many)
+    monkeypatch.setattr(settings, "AI_SUGGEST_BATCH_WINDOW_MS", 200)
+    monkeypatch.setattr(settings, "AI_SUGGEST_MAX_BATCH", 4)
+    tasks_ai._lotes_sugerencia.cache_clear()
+    try:
+        titulos = ["Regar plantas", "Ordenar armario", "Sacar al perro", "Lavar el coche"]
+        respuestas = await asyncio.gather(*(
+            async_client.post("/api/v1/tasks/ai/suggest", json={"titulo": titulo}) for titulo in titulos
+        ))
+        assert all(r.status_code == 200 and r.json()["prioridad"] == "baja" for r in respuestas)
+        assert len(llamadas) == 1
+        assert sorted(llamadas[0]) == sorted(titulos)
+
+        user, token = await create_user_and_token(async_client)
+        metricas = (await async_client.get(
+            "/api/v1/tasks/ai/metrics", headers={"Authorization": f"Bearer {token}"},
+        )).json()
+        assert metricas["microlotes"]["sugerencia"]["lotes_llenos"] == 1
+    finally:
+        tasks_ai._lotes_sugerencia.cache_clear()
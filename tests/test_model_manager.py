@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+from httpx import AsyncClient
+
+from app.api.v1.endpoints import tasks_ai
+from app.services import task_priority
+from app.services.AI.model_manager import GestorModelo, ModeloNoDisponible
+from tests.utils import create_user_and_token, create_task
+
+
+def test_gestor_carga_en_segundo_plano():
+    liberar = threading.Event()
+
+    def cargador():
+        liberar.wait(5)
+        return "modelo"
+
+    gestor = GestorModelo("prueba", cargador)
+    assert gestor.estado == GestorModelo.PENDIENTE
+
+    gestor.iniciar()
+    assert gestor.estado == GestorModelo.CARGANDO
+    assert not gestor.listo
+    with pytest.raises(ModeloNoDisponible):
+        gestor.obtener()
+
+    liberar.set()
+    assert gestor.esperar(5)
+    assert gestor.obtener() == "modelo"
+    assert gestor.resumen() == {"estado": "listo", "caliente": True, "calentamiento_ms": None, "error": None}
+
+
+def test_gestor_expone_error_de_carga():
+    def cargador():
+        raise OSError("sin red")
+
+    gestor = GestorModelo("roto", cargador)
+    gestor.iniciar()
+    assert not gestor.esperar(5)
+    assert gestor.estado == GestorModelo.ERROR
+    assert "sin red" in gestor.resumen()["error"]
+    with pytest.raises(ModeloNoDisponible):
+        gestor.obtener()
+
+
+def test_gestor_obtener_con_espera_inicia_la_carga():
+    llamadas = []
+    gestor = GestorModelo("perezoso", lambda: llamadas.append(1) or "ok")
+    assert gestor.obtener(esperar=True) == "ok"
+    gestor.iniciar()
+    assert llamadas == [1]
+
+
+async def test_prioritize_usa_heuristica_mientras_carga(async_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(tasks_ai, "modelo_listo", lambda: False)
+    monkeypatch.setattr(task_priority, "modelo_listo", lambda: False)
+    monkeypatch.setattr(tasks_ai, "clasificar_prioridad_many", lambda titulos: pytest.fail("no debe usar el modelo"))
+
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Entregar informe urgente", "categoria": "OTRO"})
+    await create_task(async_client, token, {"titulo": "Regar las plantas", "categoria": "OTRO"})
+
+    response = await async_client.post("/api/v1/tasks/ai/prioritize", headers=headers, json={})
+    assert response.status_code == 200
+    data = {t["titulo"]: t for t in response.json()}
+    assert data["Entregar informe urgente"]["prioridad"] == "alta"
+    assert data["Regar las plantas"]["prioridad"] == "media"
+    assert data["Regar las plantas"]["motivo"] == tasks_ai.MOTIVO_HEURISTICA
+
+    response = await async_client.post("/api/v1/tasks/ai/suggest", headers=headers, json={"titulo": "Regar las plantas"})
+    assert response.status_code == 200
+    assert response.json()["motivo"] == tasks_ai.MOTIVO_HEURISTICA
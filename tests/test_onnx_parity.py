@@ -0,0 +1,64 @@
+"""
+Paridad entre los backends del codificador. Necesita los modelos reales y
+``sentence-transformers[onnx]``; sin ellos se omite.
+"""
+import numpy as np
+import pytest
+
+pytest.importorskip("sentence_transformers")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("optimum")
+LogisticRegression = pytest.importorskip("sklearn.linear_model").LogisticRegression
+
+from app.core.config import settings
+from app.services.AI.encoders import cargar_encoder
+from app.services.AI.similarity import agrupar_indices
+
+MODELO = "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2"
+
+ENTRENAMIENTO = [
+    ("Enviar informe urgente", "alta"),
+    ("Comprar pan", "baja"),
+    ("Estudiar para el examen de mañana", "alta"),
+    ("Llamar a mamá", "media"),
+    ("Revisar correo electrónico", "media"),
+    ("Pagar el alquiler hoy", "alta"),
+    ("Sacar la basura", "baja"),
+]
+
+TITULOS = [
+    "Pagar la factura de la luz",
+    "Pagar el recibo del agua",
+    "Comprar leche",
+    "Comprar fruta en el mercado",
+    "Preparar la presentación del lunes",
+    "Terminar el informe trimestral",
+    "Llamar al fontanero",
+    "Pedir cita con el dentista",
+]
+
+
+def _codificar(backend, cuantizacion, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AI_ENCODER_BACKEND", backend)
+    monkeypatch.setattr(settings, "AI_ONNX_QUANTIZATION", cuantizacion)
+    monkeypatch.setattr(settings, "AI_ONNX_DIR", str(tmp_path))
+    modelo = cargar_encoder(MODELO)
+    return lambda textos: modelo.encode(textos, convert_to_numpy=True, normalize_embeddings=True)
+
+
+@pytest.mark.parametrize("cuantizacion, similitud_minima", [("none", 0.999), ("avx2", 0.97)])
+def test_onnx_mantiene_grupos_y_prioridades(cuantizacion, similitud_minima, tmp_path_factory, monkeypatch):
+    directorio = tmp_path_factory.mktemp("onnx")
+    referencia = _codificar("torch", "none", directorio, monkeypatch)
+    onnx = _codificar("onnx", cuantizacion, directorio, monkeypatch)
+
+    esperados, obtenidos = referencia(TITULOS), onnx(TITULOS)
+    similitudes = np.sum(esperados * obtenidos, axis=1)
+    assert similitudes.min() >= similitud_minima
+
+    assert agrupar_indices(obtenidos, umbral=0.4) == agrupar_indices(esperados, umbral=0.4)
+
+    # La misma cabeza, entrenada sobre PyTorch, debe dar las mismas etiquetas
+    textos, etiquetas = zip(*ENTRENAMIENTO)
+    cabeza = LogisticRegression(max_iter=1000).fit(referencia(list(textos)), etiquetas)
+    assert list(cabeza.predict(obtenidos)) == list(cabeza.predict(esperados))
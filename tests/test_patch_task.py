@@ -92,4 +92,24 @@ async def test_patch_task_update_fields(async_client: AsyncClient):
     assert patch_response.status_code == 200
     updated_task = patch_response.json()
     assert updated_task["titulo"] == "Tarea actualizada"
-    assert updated_task["estado"] == "DONE"
\ No newline at end of file
+    assert updated_task["estado"] == "DONE"
+
+@pytest.mark.asyncio
+async def test_patch_titulo_con_servidor_de_inferencia_caido(async_client: AsyncClient, monkeypatch, caplog):
+    from app.services import task_rewrites
+
+    def servidor_caido(cambios):
+        raise ConnectionRefusedError("socket de inferencia no disponible")
+
+    monkeypatch.setattr(task_rewrites, "registrar_aceptadas", servidor_caido)
+    user, token = await create_user_and_token(async_client)
+    task = await create_task(async_client, token, {"titulo": "Tarea de prueba", "categoria": "OTRO"})
+
+    patch_response = await async_client.patch(
+        f"/api/v1/tasks/{task['id']}",
+        json={"titulo": "Tarea de prueba renombrada"},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+    assert patch_response.status_code == 200
+    assert patch_response.json()["titulo"] == "Tarea de prueba renombrada"
+    assert "reformulación aceptada" in caplog.text
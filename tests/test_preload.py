@@ -0,0 +1,89 @@
+"""
+Los modelos precargados en el maestro no se duplican en los workers.
+
+Se mide la memoria única (USS: páginas privadas de cada proceso, según
+/proc/<pid>/smaps_rollup) de procesos hijos creados con fork, igual que
+hace gunicorn con ``preload_app``.
+"""
+import gc
+import os
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from app.services.AI import model_manager
+from app.services.AI.model_manager import GestorModelo, registrar_gestor
+from app.services.AI.preload import precargar_modelos
+
+pytestmark = pytest.mark.skipif(
+    not sys.platform.startswith("linux") or not Path("/proc/self/smaps_rollup").exists(),
+    reason="USS medido con /proc/<pid>/smaps_rollup (sólo Linux)",
+)
+
+TAMANO_MB = 64
+
+
+def _uss_kib() -> int:
+    total = 0
+    for linea in Path("/proc/self/smaps_rollup").read_text().splitlines():
+        if linea.startswith(("Private_Clean:", "Private_Dirty:")):
+            total += int(linea.split()[1])
+    return total
+
+
+def _cargar_pesos() -> np.ndarray:
+    # Pesos "reales": páginas escritas, no memoria reservada sin tocar
+    return np.full(TAMANO_MB * 1024 * 1024 // 4, 0.5, dtype=np.float32)
+
+
+def _uss_en_worker(obtener_pesos) -> int:
+    """USS de un hijo (tras fork) que obtiene los pesos y hace una "inferencia" de sólo lectura."""
+    lectura, escritura = os.pipe()
+    pid = os.fork()
+    if pid == 0:  # pragma: no cover - proceso hijo
+        try:
+            pesos = obtener_pesos()
+            float(pesos.sum())
+            os.write(escritura, str(_uss_kib()).encode())
+        finally:
+            os._exit(0)
+    os.close(escritura)
+    with os.fdopen(lectura) as f:
+        uss = int(f.read())
+    os.waitpid(pid, 0)
+    return uss
+
+
+@pytest.fixture
+def gestor_lastre():
+    gestor = registrar_gestor(GestorModelo("lastre", _cargar_pesos))
+    yield gestor
+    model_manager._gestores.pop("lastre", None)
+    gc.unfreeze()
+
+
+def test_workers_comparten_los_pesos_precargados(gestor_lastre):
+    precargar_modelos(["lastre"])
+    assert gestor_lastre.listo
+
+    compartido = _uss_en_worker(gestor_lastre.obtener)
+    propio = _uss_en_worker(_cargar_pesos)
+
+    tamano_kib = TAMANO_MB * 1024
+    # Cargando en cada worker, los pesos cuentan enteros en su USS
+    assert propio - compartido > 0.8 * tamano_kib
+    assert compartido < tamano_kib / 2
+
+
+def test_precarga_falla_si_un_modelo_no_carga():
+    def roto():
+        raise RuntimeError("sin pesos")
+
+    registrar_gestor(GestorModelo("roto", roto))
+    try:
+        with pytest.raises(model_manager.ModeloNoDisponible):
+            precargar_modelos(["roto"], congelar_gc=False)
+    finally:
+        model_manager._gestores.pop("roto", None)
@@ -0,0 +1,200 @@
+import importlib.util
+from pathlib import Path
+
+import pytest
+
+from app.core.config import settings
+from app.services.AI import model_manager, rewrite_gate
+from app.services.AI.cache import CacheLRU
+
+RUTA = Path(__file__).resolve().parents[1] / "app" / "services" / "AI" / "reformulator.py"
+
+
+class PipelineFalso:
+    def __init__(self, clave, sufijo):
+        self.clave = clave
+        self.sufijo = sufijo
+        self.llamadas = []
+
+    def __call__(self, textos, batch_size=None, **kwargs):
+        self.llamadas.append((list(textos), kwargs))
+        return [{self.clave: f"{texto} {self.sufijo}"} for texto in textos]
+
+
+class GestorFalso:
+    def __init__(self, modelos):
+        self.modelos = modelos
+        self.cargas = 0
+
+    def obtener(self, esperar=False):
+        self.cargas += 1
+        return self.modelos
+
+
+@pytest.fixture
+def reformulador(monkeypatch):
+    # conftest sustituye el módulo real por un mock: se carga aparte
+    spec = importlib.util.spec_from_file_location("reformulador_real", RUTA)
+    modulo = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(modulo)
+    model_manager._gestores.pop("reformulador", None)
+
+    modelos = {
+        "es_en": PipelineFalso("translation_text", "[en]"),
+        "parafraseo": PipelineFalso("generated_text", "[p]"),
+        "en_es": PipelineFalso("translation_text", "[es]"),
+    }
+    monkeypatch.setattr(modulo, "gestor_reformulador", GestorFalso(modelos))
+    # Estas pruebas usan títulos cortos para ejercitar el pipeline: la puerta
+    # se prueba aparte con ``puerta``
+    monkeypatch.setattr(settings, "AI_REWRITE_GATE", False)
+    modulo.obtener_cache_reformulaciones.cache_clear()
+    rewrite_gate.obtener_reformulaciones_aceptadas.cache_clear()
+    rewrite_gate.contadores_reformulacion.reiniciar()
+    yield modulo
+    modulo.obtener_cache_reformulaciones.cache_clear()
+    rewrite_gate.obtener_reformulaciones_aceptadas.cache_clear()
+
+
+@pytest.fixture
+def puerta(reformulador, monkeypatch):
+    monkeypatch.setattr(settings, "AI_REWRITE_GATE", True)
+    monkeypatch.setattr(settings, "AI_REWRITE_MIN_WORDS", 3)
+    return reformulador
+
+
+def test_decodificacion_determinista(reformulador, monkeypatch):
+    monkeypatch.setattr(settings, "AI_REWRITE_DECODING", "greedy")
+    assert reformulador.parametros_decodificacion() == {"do_sample": False, "num_beams": 1}
+
+    monkeypatch.setattr(settings, "AI_REWRITE_DECODING", "beam")
+    monkeypatch.setattr(settings, "AI_REWRITE_NUM_BEAMS", 3)
+    reformulador.reformular_titulos(["Limpiar cocina"])
+    _, kwargs = reformulador.gestor_reformulador.modelos["parafraseo"].llamadas[0]
+    assert kwargs["do_sample"] is False
+    assert kwargs["num_beams"] == 3
+
+
+def test_repetir_no_ejecuta_modelos(reformulador):
+    gestor = reformulador.gestor_reformulador
+    primero = reformulador.reformular_titulos(["Limpiar cocina", "Sacar basura"])
+    segundo = reformulador.reformular_titulos(["Sacar  basura ", "Limpiar cocina"])
+
+    assert gestor.cargas == 1
+    assert len(gestor.modelos["es_en"].llamadas) == 1
+    assert segundo[0]["reformulada"] == primero[1]["reformulada"]
+    assert segundo[1] == primero[0]
+    assert reformulador.obtener_cache_reformulaciones().aciertos == 2
+
+
+def test_titulos_repetidos_se_reformulan_una_vez(reformulador):
+    resultados = reformulador.reformular_titulos(["Regar plantas", "Regar  plantas", "Regar plantas"])
+
+    textos, _ = reformulador.gestor_reformulador.modelos["es_en"].llamadas[0]
+    assert textos == ["Regar plantas"]
+    assert len({r["reformulada"] for r in resultados}) == 1
+
+
+def test_clave_depende_de_la_decodificacion(reformulador):
+    greedy = {"do_sample": False, "num_beams": 1}
+    beam = {"do_sample": False, "num_beams": 4, "early_stopping": True}
+    assert reformulador.clave_reformulacion("Limpiar cocina", greedy) != reformulador.clave_reformulacion(
+        "Limpiar cocina", beam
+    )
+
+
+def test_errores_no_se_cachean(reformulador):
+    modelos = reformulador.gestor_reformulador.modelos
+    original = modelos["parafraseo"]
+
+    def falla(textos, batch_size=None, **kwargs):
+        raise RuntimeError("sin memoria")
+
+    modelos["parafraseo"] = falla
+    resultado = reformulador.reformular_titulos(["Limpiar cocina"])[0]
+    assert resultado["cambio"] is False
+    assert "sin memoria" in resultado["motivo"]
+    assert len(reformulador.obtener_cache_reformulaciones()) == 0
+
+    modelos["parafraseo"] = original
+    assert reformulador.reformular_titulos(["Limpiar cocina"])[0]["cambio"] is True
+
+
+def test_lru_con_ttl_caduca_entradas(monkeypatch):
+    from app.services.AI import cache as modulo_cache
+
+    ahora = [100.0]
+    monkeypatch.setattr(modulo_cache.time, "monotonic", lambda: ahora[0])
+    cache = CacheLRU(10, ttl=5)
+    cache.guardar("a", 1)
+    assert cache.obtener("a") == 1
+    ahora[0] = 106.0
+    assert cache.obtener("a") is None
+    assert cache.caducadas == 1
+    assert len(cache) == 0
+
+
+@pytest.mark.parametrize("titulo, idioma", [
+    ("Comprar pan para la cena", "es"),
+    ("Llamar al fontanero mañana", "es"),
+    ("Buy groceries for the week", "en"),
+    ("Finish the quarterly report", "en"),
+    ("Limpiar cocina", None),
+])
+def test_detectar_idioma(titulo, idioma):
+    assert rewrite_gate.detectar_idioma(titulo) == idioma
+
+
+def test_titulos_cortos_no_pasan_por_los_modelos(puerta):
+    resultados = puerta.reformular_titulos(["Comprar pan", "  ", "Comprar pan para la cena"])
+
+    assert resultados[0] == {"reformulada": "Comprar pan", "cambio": False, "motivo": puerta.MOTIVOS_PUERTA["corto"]}
+    assert resultados[1]["cambio"] is False
+    textos, _ = puerta.gestor_reformulador.modelos["es_en"].llamadas[0]
+    assert textos == ["Comprar pan para la cena"]
+
+
+def test_titulos_en_ingles_se_saltan_la_traduccion(puerta):
+    modelos = puerta.gestor_reformulador.modelos
+    resultado = puerta.reformular_titulos(["Buy groceries for the week"])[0]
+
+    assert modelos["es_en"].llamadas == []
+    assert modelos["parafraseo"].llamadas[0][0] == ["paraphrase: Buy groceries for the week"]
+    assert resultado["reformulada"] == "paraphrase: Buy groceries for the week [p] [es]"
+    assert "sin traducción" in resultado["motivo"]
+
+
+def test_reformulacion_aceptada_no_se_reformula_otra_vez(puerta):
+    original = "Sacar la basura del portal"
+    sugerida = puerta.reformular_titulos([original])[0]["reformulada"]
+    llamadas = len(puerta.gestor_reformulador.modelos["es_en"].llamadas)
+
+    # El usuario guarda la sugerencia como título y vuelve a pedir la reformulación
+    assert puerta.registrar_aceptadas([(original, sugerida)]) == [True]
+    resultado = puerta.reformular_titulos([sugerida])[0]
+    assert resultado["cambio"] is False
+    assert resultado["motivo"] == puerta.MOTIVOS_PUERTA["ya_reformulado"]
+    assert len(puerta.gestor_reformulador.modelos["es_en"].llamadas) == llamadas
+
+
+def test_sugerencia_no_guardada_se_reformula(puerta):
+    original = "Sacar la basura del portal"
+    sugerida = puerta.reformular_titulos([original])[0]["reformulada"]
+    # El usuario guarda otro título: ni éste ni la sugerencia cuentan como aceptados
+    assert puerta.registrar_aceptadas([(original, "Bajar la basura al portal")]) == [False]
+
+    resultado = puerta.reformular_titulos([sugerida])[0]
+    assert resultado["motivo"] != puerta.MOTIVOS_PUERTA["ya_reformulado"]
+    assert rewrite_gate.metricas_reformulacion()["decisiones"]["ya_reformulado"] == 0
+
+
+def test_contadores_por_etapa(puerta):
+    puerta.reformular_titulos(["Comprar pan", "Buy groceries for the week", "Comprar pan para la cena"])
+    puerta.reformular_titulos(["Comprar pan para la cena"])
+
+    metricas = rewrite_gate.metricas_reformulacion()
+    assert metricas["titulos"] == 4
+    assert metricas["cache"] == 1
+    assert metricas["decisiones"] == {"corto": 1, "ya_reformulado": 0, "sin_traduccion": 1, "completo": 2}
+    assert metricas["etapas"] == {"es_en": 1, "parafraseo": 2, "en_es": 2}
+    assert metricas["etapas_evitadas"] == 4 * 3 - 5
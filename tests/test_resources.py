@@ -0,0 +1,73 @@
+import fcntl
+import sys
+import types
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from app.services.AI import resources
+
+
+@pytest.fixture
+def cuatro_nucleos(monkeypatch, tmp_path):
+    fijados = []
+    monkeypatch.setattr(resources.os, "sched_getaffinity", lambda pid: {0, 1, 2, 3}, raising=False)
+    monkeypatch.setattr(resources.os, "sched_setaffinity", lambda pid, cpus: fijados.append(list(cpus)), raising=False)
+    monkeypatch.setattr(resources.tempfile, "gettempdir", lambda: str(tmp_path))
+    monkeypatch.setattr(resources, "_cerrojo", None)
+    for variable in ("TOKENIZERS_PARALLELISM", "OMP_NUM_THREADS", "MKL_NUM_THREADS"):
+        monkeypatch.delenv(variable, raising=False)
+    yield fijados
+    if resources._cerrojo is not None:
+        resources._cerrojo.close()
+
+
+def test_sin_presupuesto_no_toca_nada(cuatro_nucleos, monkeypatch):
+    monkeypatch.setattr(settings, "AI_CPU_CORES_PER_WORKER", 0)
+    configuracion = resources.configurar_recursos()
+    assert configuracion["nucleos_por_worker"] is None
+    assert configuracion["hilos_ejecutor"] == settings.AI_EXECUTOR_WORKERS
+    assert configuracion["omp_num_threads"] is None
+    assert cuatro_nucleos == []
+
+
+def test_presupuesto_reparte_hilos_y_configura_torch(cuatro_nucleos, monkeypatch):
+    llamadas = {}
+    torch = types.SimpleNamespace(
+        set_num_threads=lambda n: llamadas.__setitem__("intra", n),
+        set_num_interop_threads=lambda n: llamadas.__setitem__("inter", n),
+        get_num_threads=lambda: llamadas["intra"],
+        get_num_interop_threads=lambda: llamadas["inter"],
+    )
+    monkeypatch.setitem(sys.modules, "torch", torch)
+    monkeypatch.setattr(settings, "AI_CPU_CORES_PER_WORKER", 2)
+    monkeypatch.setattr(settings, "AI_EXECUTOR_WORKERS", 4)
+
+    configuracion = resources.configurar_recursos()
+    # Un hilo de ejecutor por núcleo y un hilo intra-op por inferencia
+    assert configuracion["hilos_ejecutor"] == 2
+    assert llamadas == {"intra": 1, "inter": 1}
+    assert configuracion["hilos_intra_op"] == 1
+    assert configuracion["tokenizers_parallelism"] == "false"
+    assert configuracion["omp_num_threads"] == "1"
+    assert configuracion["fijado"] is False
+
+
+def test_cada_worker_se_fija_al_primer_bloque_libre(cuatro_nucleos, monkeypatch, tmp_path):
+    monkeypatch.setattr(settings, "AI_CPU_CORES_PER_WORKER", 2)
+    monkeypatch.setattr(settings, "AI_CPU_PINNING", True)
+    # Otro worker tiene ya el primer bloque
+    with open(tmp_path / "prioritask-cpu-0.lock", "w") as otro:
+        fcntl.flock(otro, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        configuracion = resources.configurar_recursos(usar_torch=False)
+    assert cuatro_nucleos == [[2, 3]]
+    assert configuracion["fijado"] is True
+
+
+@pytest.mark.asyncio
+async def test_ready_informa_de_los_recursos(async_client: AsyncClient):
+    response = await async_client.get("/health/ready")
+    recursos = response.json()["recursos"]
+    assert recursos["hilos_ejecutor"] == settings.AI_EXECUTOR_WORKERS
+    assert recursos["cpus"]
@@ -0,0 +1,99 @@
+import numpy as np
+import pytest
+
+from app.services.AI.similarity import agrupar_componentes, agrupar_indices, agrupar_kmeans, agrupar_voraz, limitar_tamano
+
+
+def _voraz_referencia(embeddings, umbral):
+    """Implementación original (doble bucle) usada como referencia."""
+    normas = embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+    usados, grupos = set(), []
+    for i in range(len(embeddings)):
+        if i in usados:
+            continue
+        grupo = [i]
+        usados.add(i)
+        for j in range(i + 1, len(embeddings)):
+            if j not in usados and float(normas[i] @ normas[j]) >= umbral:
+                grupo.append(j)
+                usados.add(j)
+        grupos.append(grupo)
+    return grupos
+
+
+@pytest.mark.parametrize("umbral", [0.1, 0.4, 0.7])
+def test_voraz_equivale_al_doble_bucle(umbral):
+    rng = np.random.default_rng(0)
+    embeddings = rng.normal(size=(120, 16)).astype(np.float32)
+    assert agrupar_voraz(embeddings, umbral) == _voraz_referencia(embeddings, umbral)
+
+
+def test_voraz_por_bloques_da_los_mismos_grupos():
+    rng = np.random.default_rng(1)
+    embeddings = rng.normal(size=(90, 8)).astype(np.float32)
+    completo = agrupar_voraz(embeddings, 0.3)
+    assert agrupar_voraz(embeddings, 0.3, max_elementos_bloque=90 * 7) == completo
+    assert agrupar_voraz(embeddings, 0.3, max_elementos_bloque=1) == completo
+
+
+def test_componentes_une_cadenas_de_similitud():
+    # a ~ b y b ~ c, pero a y c no son similares entre sí
+    embeddings = np.array([
+        [1.0, 0.0],
+        [np.cos(0.6), np.sin(0.6)],
+        [np.cos(1.2), np.sin(1.2)],
+        [-1.0, 0.0],
+    ])
+    umbral = float(np.cos(0.7))
+    assert agrupar_voraz(embeddings, umbral) == [[0, 1], [2], [3]]
+    assert agrupar_componentes(embeddings, umbral) == [[0, 1, 2], [3]]
+    assert agrupar_componentes(embeddings, umbral, max_elementos_bloque=1) == [[0, 1, 2], [3]]
+
+
+def test_agrupar_indices_valida_modo_y_vacio():
+    assert agrupar_indices(np.empty((0, 4))) == []
+    with pytest.raises(ValueError):
+        agrupar_indices(np.eye(3), modo="otro")
+
+
+def _nubes(n_por_nube: int, n_nubes: int, dim: int = 16, semilla: int = 0):
+    rng = np.random.default_rng(semilla)
+    centros = rng.normal(size=(n_nubes, dim)) * 5
+    embeddings = np.concatenate([c + rng.normal(scale=0.3, size=(n_por_nube, dim)) for c in centros])
+    return embeddings.astype(np.float32), np.repeat(np.arange(n_nubes), n_por_nube)
+
+
+def _como_particion(grupos):
+    return sorted(tuple(sorted(grupo)) for grupo in grupos)
+
+
+def test_kmeans_separa_nubes_sin_depender_del_orden():
+    embeddings, nube = _nubes(50, 4)
+    grupos = agrupar_kmeans(embeddings, n_grupos=4)
+    assert _como_particion(grupos) == _como_particion([np.flatnonzero(nube == i).tolist() for i in range(4)])
+
+    orden = np.random.default_rng(3).permutation(len(embeddings))
+    permutados = agrupar_kmeans(embeddings[orden], n_grupos=4)
+    assert _como_particion([orden[g].tolist() for g in permutados]) == _como_particion(grupos)
+
+
+def test_kmeans_por_bloques_y_con_lotes_pequenos():
+    embeddings, _ = _nubes(40, 3, semilla=1)
+    completo = agrupar_kmeans(embeddings, n_grupos=3)
+    assert agrupar_kmeans(embeddings, n_grupos=3, max_elementos_bloque=1) == completo
+    assert _como_particion(agrupar_kmeans(embeddings, n_grupos=3, tamano_lote=16)) == _como_particion(completo)
+
+
+def test_max_tamano_divide_los_grupos_grandes():
+    embeddings, _ = _nubes(60, 2, semilla=2)
+    for modo in ("voraz", "componentes", "kmeans"):
+        grupos = agrupar_indices(embeddings, umbral=0.2, modo=modo, max_tamano=25)
+        assert max(map(len, grupos)) <= 25
+        assert sorted(i for grupo in grupos for i in grupo) == list(range(120))
+
+
+def test_limitar_tamano_reparte_tareas_identicas():
+    embeddings = np.ones((7, 4), dtype=np.float32)
+    assert limitar_tamano(embeddings, [list(range(7))], 3) == [[0, 1, 2], [3, 4, 5], [6]]
+    with pytest.raises(ValueError):
+        limitar_tamano(embeddings, [[0]], 0)
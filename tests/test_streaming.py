@@ -0,0 +1,72 @@
+import json
+
+import pytest
+from httpx import AsyncClient
+
+from app.core.config import settings
+from tests.utils import create_user_and_token, create_task
+
+
+async def _usuario_con_tareas(async_client: AsyncClient, titulos):
+    user, token = await create_user_and_token(async_client)
+    for titulo in titulos:
+        await create_task(async_client, token, {"titulo": titulo, "categoria": "OTRO"})
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.asyncio
+async def test_rewrite_ndjson_emite_por_lotes(async_client: AsyncClient, monkeypatch):
+    from app.api.v1.endpoints import tasks_ai
+
+    lotes = []
+
+    def fake_reformular(titulos):
+        lotes.append(list(titulos))
+        return [{"reformulada": f"{t} (mock)", "cambio": True, "motivo": "mock"} for t in titulos]
+
+    monkeypatch.setattr(tasks_ai, "reformular_titulos", fake_reformular)
+    monkeypatch.setattr(settings, "AI_REWRITE_BATCH_SIZE", 2)
+    headers = await _usuario_con_tareas(async_client, ["Regar", "Barrer", "Fregar"])
+
+    response = await async_client.post("/api/v1/tasks/ai/rewrite?stream=ndjson", headers=headers, json={})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    filas = [json.loads(linea) for linea in response.text.splitlines()]
+    assert [f["reformulada"] for f in filas] == [f"{f['original']} (mock)" for f in filas]
+    assert sorted(f["original"] for f in filas) == ["Barrer", "Fregar", "Regar"]
+    assert [len(lote) for lote in lotes] == [2, 1]
+
+
+@pytest.mark.asyncio
+async def test_prioritize_sse(async_client: AsyncClient):
+    headers = await _usuario_con_tareas(async_client, ["Urgente: pagar luz", "Lavar ropa"])
+
+    response = await async_client.post("/api/v1/tasks/ai/prioritize?stream=sse", headers=headers, json={})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    eventos = [json.loads(bloque.removeprefix("data: ")) for bloque in response.text.strip().split("\n\n")]
+    prioridades = {e["titulo"]: e["prioridad"] for e in eventos}
+    assert prioridades == {"Urgente: pagar luz": "alta", "Lavar ropa": "media"}
+
+
+@pytest.mark.asyncio
+async def test_error_a_mitad_de_stream_se_emite_al_final(async_client: AsyncClient, monkeypatch):
+    from app.api.v1.endpoints import tasks_ai
+
+    def falla(titulos):
+        raise RuntimeError("modelo roto")
+
+    monkeypatch.setattr(tasks_ai, "reformular_titulos", falla)
+    headers = await _usuario_con_tareas(async_client, ["Regar"])
+
+    response = await async_client.post("/api/v1/tasks/ai/rewrite?stream=sse", headers=headers, json={})
+    assert response.status_code == 200
+    assert response.text.startswith("event: error\ndata: ")
+    assert "modelo roto" in response.text
+
+
+@pytest.mark.asyncio
+async def test_formato_de_stream_desconocido(async_client: AsyncClient):
+    headers = await _usuario_con_tareas(async_client, ["Regar"])
+    response = await async_client.post("/api/v1/tasks/ai/prioritize?stream=xml", headers=headers, json={})
+    assert response.status_code == 422
@@ -0,0 +1,179 @@
+from uuid import UUID
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlmodel import select
+
+from app.db.session import async_session as app_session
+from app.models.task import Task
+from app.models.task_cluster import TaskCluster
+from app.services import task_clusters, task_embeddings
+from app.services.task_clusters import reagrupar_usuario
+from tests.utils import create_user_and_token, create_task
+
+TEMAS = {"cocina": 0, "factura": 1, "jardín": 2}
+
+
+def _embeddings_por_tema(titulos, batch_size=None):
+    # Un eje por tema y algo de ruido determinista: temas distintos son ortogonales
+    vectores = []
+    for i, titulo in enumerate(titulos):
+        vector = np.random.default_rng(len(titulo) + i).normal(scale=0.05, size=8).astype(np.float32)
+        for tema, eje in TEMAS.items():
+            if tema in titulo.lower():
+                vector[eje] += 1.0
+        vectores.append(vector)
+    return np.stack(vectores)
+
+
+@pytest.fixture(autouse=True)
+def _temas(monkeypatch):
+    monkeypatch.setattr(task_embeddings, "calcular_embeddings", _embeddings_por_tema)
+
+
+async def _agrupar(client: AsyncClient, token: str) -> dict:
+    response = await client.post("/api/v1/tasks/ai/group", headers={"Authorization": f"Bearer {token}"}, json={})
+    assert response.status_code == 200
+    return {nombre: sorted(t["titulo"] for t in tareas) for nombre, tareas in response.json()["grupos"].items()}
+
+
+async def _clusters(session, user_id):
+    session.expire_all()
+    return (await session.execute(select(TaskCluster).where(TaskCluster.user_id == UUID(user_id)))).scalars().all()
+
+
+@pytest.mark.asyncio
+async def test_las_tareas_nuevas_entran_en_el_grupo_mas_similar(async_client: AsyncClient, session, monkeypatch):
+    user, token = await create_user_and_token(async_client)
+    await create_task(async_client, token, {"titulo": "Limpiar cocina", "categoria": "LIMPIEZA"})
+    await create_task(async_client, token, {"titulo": "Pagar factura luz", "categoria": "MANTENIMIENTO"})
+    await create_task(async_client, token, {"titulo": "Ordenar cocina", "categoria": "LIMPIEZA"})
+
+    assert await _agrupar(async_client, token) == {
+        "Grupo 1": ["Limpiar cocina", "Ordenar cocina"],
+        "Grupo 2": ["Pagar factura luz"],
+    }
+
+    # Sin reagrupar: /group sólo lee las asignaciones guardadas
+    monkeypatch.setattr(task_clusters, "agrupar_kmeans", lambda *a, **k: pytest.fail("no debe reagrupar"))
+    await create_task(async_client, token, {"titulo": "Regar jardín", "categoria": "OTRO"})
+    await create_task(async_client, token, {"titulo": "Factura del agua", "categoria": "MANTENIMIENTO"})
+    assert await _agrupar(async_client, token) == {
+        "Grupo 1": ["Limpiar cocina", "Ordenar cocina"],
+        "Grupo 2": ["Factura del agua", "Pagar factura luz"],
+        "Grupo 3": ["Regar jardín"],
+    }
+    assert sorted(c.n_tareas for c in await _clusters(session, user["id"])) == [1, 2, 2]
+
+
+@pytest.mark.asyncio
+async def test_cambiar_el_titulo_mueve_la_tarea_de_grupo(async_client: AsyncClient, session):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Limpiar cocina", "categoria": "LIMPIEZA"})
+    task = await create_task(async_client, token, {"titulo": "Fregar cocina", "categoria": "LIMPIEZA"})
+    await create_task(async_client, token, {"titulo": "Pagar factura", "categoria": "MANTENIMIENTO"})
+
+    response = await async_client.patch(f"/api/v1/tasks/{task['id']}", headers=headers, json={"titulo": "Revisar factura"})
+    assert response.status_code == 200
+
+    assert await _agrupar(async_client, token) == {
+        "Grupo 1": ["Limpiar cocina"],
+        "Grupo 2": ["Pagar factura", "Revisar factura"],
+    }
+    # La suma del grupo anterior ya no incluye el vector viejo
+    por_numero = {c.numero: c for c in await _clusters(session, user["id"])}
+    assert por_numero[1].n_tareas == 1
+    np.testing.assert_allclose(
+        np.frombuffer(por_numero[1].suma, dtype=np.float32),
+        _embeddings_por_tema(["Limpiar cocina"])[0],
+        atol=1e-5,
+    )
+
+
+@pytest.mark.asyncio
+async def test_reagrupar_conserva_los_numeros_y_retira_las_borradas(async_client: AsyncClient, session):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Limpiar cocina", "categoria": "LIMPIEZA"})
+    await create_task(async_client, token, {"titulo": "Pagar factura", "categoria": "MANTENIMIENTO"})
+    borrada = await create_task(async_client, token, {"titulo": "Ordenar cocina", "categoria": "LIMPIEZA"})
+    await create_task(async_client, token, {"titulo": "Factura gas", "categoria": "MANTENIMIENTO"})
+    antes = await _agrupar(async_client, token)
+
+    response = await async_client.delete(f"/api/v1/tasks/{borrada['id']}", headers=headers)
+    assert response.status_code in (200, 204)
+
+    async with app_session() as app:
+        assert await reagrupar_usuario(app, UUID(user["id"])) == 2
+        await app.commit()
+
+    assert {c.numero: c.n_tareas for c in await _clusters(session, user["id"])} == {1: 1, 2: 2}
+    despues = await _agrupar(async_client, token)
+    assert despues["Grupo 2"] == antes["Grupo 2"]
+    assert despues["Grupo 1"] == ["Limpiar cocina"]
+
+
+@pytest.mark.asyncio
+async def test_solo_reagrupa_quien_tiene_el_cerrojo(tmp_path, monkeypatch):
+    import fcntl
+
+    llamadas = []
+
+    async def reagrupar_todos():
+        llamadas.append(1)
+        return 3
+
+    monkeypatch.setattr(task_clusters, "reagrupar_todos", reagrupar_todos)
+    ruta = str(tmp_path / "reagrupacion.lock")
+
+    with open(ruta, "a+") as otro_worker:
+        fcntl.flock(otro_worker, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        assert await task_clusters.reagrupar_como_lider(ruta=ruta) is None
+    assert await task_clusters.reagrupar_como_lider(ruta=ruta) == 3
+    # Otro worker en el mismo ciclo: la reagrupación es reciente, no la repite
+    assert await task_clusters.reagrupar_como_lider(separacion_minima_s=60, ruta=ruta) is None
+    assert llamadas == [1]
+
+
+@pytest.mark.asyncio
+async def test_numero_de_grupo_en_conflicto_se_reintenta(async_client: AsyncClient):
+    user, token = await create_user_and_token(async_client)
+    user_id = UUID(user["id"])
+    async with app_session() as otra:
+        otra.add(TaskCluster(user_id=user_id, numero=1, modelo="m", dim=0, suma=b""))
+        await otra.commit()
+
+    intentos = []
+
+    async def abrir_grupo(session):
+        # El primer intento leyó el máximo antes de que el otro proceso confirmara
+        intentos.append(1)
+        numero = 1 if len(intentos) == 1 else 2
+        session.add(TaskCluster(user_id=user_id, numero=numero, modelo="m", dim=0, suma=b""))
+        return numero
+
+    assert await task_clusters.escribir_con_reintentos(abrir_grupo) == 2
+    assert len(intentos) == 2
+
+
+@pytest.mark.asyncio
+async def test_incremental_rechaza_opciones_de_agrupar_al_vuelo_e_informa_del_nivel(async_client: AsyncClient):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    guardada = await create_task(async_client, token, {"titulo": "Limpiar cocina", "categoria": "LIMPIEZA"})
+    editada = await create_task(async_client, token, {"titulo": "Pagar factura luz", "categoria": "MANTENIMIENTO"})
+    async with app_session() as session:
+        task = await session.get(Task, UUID(editada["id"]))
+        # Título cambiado sin que el embedding se haya recalculado todavía
+        task.titulo = "Fregar la cocina"
+        session.add(task)
+        await session.commit()
+
+    response = await async_client.post("/api/v1/tasks/ai/group", headers=headers, json={"max_tamano_grupo": 1})
+    assert response.status_code == 422
+
+    response = await async_client.post("/api/v1/tasks/ai/group", headers=headers, json={})
+    niveles = {t["id"]: t["nivel"] for tareas in response.json()["grupos"].values() for t in tareas}
+    assert niveles == {guardada["id"]: "cache", editada["id"]: "modelo"}
@@ -0,0 +1,87 @@
+from uuid import UUID
+
+import numpy as np
+import pytest
+from httpx import AsyncClient
+from sqlmodel import select
+
+from app.db.session import async_session as app_session
+from app.models.task_embedding import TaskEmbedding
+from app.services import task_embeddings
+from app.services.task_embeddings import obtener_embeddings, reindexar_embeddings
+from tests.utils import create_user_and_token, create_task
+
+
+async def _embedding(session, task_id):
+    result = await session.execute(select(TaskEmbedding).where(TaskEmbedding.task_id == UUID(task_id)))
+    return result.scalars().one_or_none()
+
+
+@pytest.mark.asyncio
+async def test_embedding_se_guarda_al_crear_y_al_cambiar_titulo(async_client: AsyncClient, session):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    task = await create_task(async_client, token, {"titulo": "Limpiar el horno", "categoria": "LIMPIEZA"})
+
+    fila = await _embedding(session, task["id"])
+    assert fila is not None
+    assert fila.modelo == task_embeddings.NOMBRE_MODELO
+    clave_inicial = fila.clave
+
+    response = await async_client.patch(f"/api/v1/tasks/{task['id']}", headers=headers, json={"titulo": "Limpiar la nevera"})
+    assert response.status_code == 200
+
+    session.expire_all()
+    fila = await _embedding(session, task["id"])
+    assert fila.clave != clave_inicial
+    np.testing.assert_allclose(
+        np.frombuffer(fila.vector, dtype=np.float32),
+        task_embeddings.calcular_embeddings(["Limpiar la nevera"])[0],
+    )
+
+
+@pytest.mark.asyncio
+async def test_group_lee_los_vectores_guardados(async_client: AsyncClient, monkeypatch):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Fregar platos", "categoria": "LIMPIEZA"})
+    await create_task(async_client, token, {"titulo": "Comprar leche", "categoria": "COMPRA"})
+
+    monkeypatch.setattr(task_embeddings, "calcular_embeddings", lambda titulos: pytest.fail("no debe recodificar"))
+    response = await async_client.post("/api/v1/tasks/ai/group", headers=headers, json={})
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_reindexar_procesa_obsoletos_por_lotes(async_client: AsyncClient, session, monkeypatch):
+    user, token = await create_user_and_token(async_client)
+    creadas = [
+        await create_task(async_client, token, {"titulo": f"Tarea de reindexado {i}", "categoria": "OTRO"})
+        for i in range(3)
+    ]
+    # Simula un cambio de versión del modelo
+    monkeypatch.setattr(task_embeddings, "NOMBRE_MODELO", "mock-encoder-v2")
+
+    lotes = []
+    original = task_embeddings.guardar_embeddings
+
+    async def espia(session, tasks):
+        lotes.append(len(tasks))
+        return await original(session, tasks)
+
+    monkeypatch.setattr(task_embeddings, "guardar_embeddings", espia)
+    total = await reindexar_embeddings(tamano_lote=2, session_factory=app_session)
+
+    assert total >= 3
+    assert max(lotes) <= 2
+    assert await reindexar_embeddings(tamano_lote=2, session_factory=app_session) == 0
+
+    session.expire_all()
+    for task in creadas:
+        assert (await _embedding(session, task["id"])).modelo == "mock-encoder-v2"
+
+
+@pytest.mark.asyncio
+async def test_obtener_embeddings_vacio():
+    async with app_session() as session:
+        assert (await obtener_embeddings(session, [])).size == 0
@@ -40,3 +40,123 @@ def test_rewrite_tasks_mock():
     assert resultado["reformulada"].lower() != original.lower()
     assert resultado["cambio"] is True
 
+
+@pytest.mark.asyncio
+async def test_prioritize_classifies_in_a_single_batch(async_client: AsyncClient, monkeypatch):
+    from app.services import task_priority
+
+    llamadas = []
+
+    def fake_embeddings(embeddings):
+        llamadas.append(embeddings)
+        return ["baja"] * len(embeddings)
+
+    def no_codificar(titles, batch_size=None):
+        raise AssertionError("/prioritize debe reutilizar los embeddings guardados")
+
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for titulo in ["Regar plantas", "Urgente: pagar luz", "Ordenar armario", "Sacar al perro"]:
+        await create_task(async_client, token, {"titulo": titulo, "categoria": "OTRO"})
+
+    # Otra versión del modelo deja obsoletas todas las prioridades guardadas
+    monkeypatch.setattr(task_priority, "version_prioridad", lambda: "otro-modelo")
+    monkeypatch.setattr(task_priority, "clasificar_embeddings", fake_embeddings)
+    monkeypatch.setattr(task_priority, "clasificar_prioridad_many", no_codificar)
+
+    response = await async_client.post("/api/v1/tasks/ai/prioritize", headers=headers, json={})
+    assert response.status_code == 200
+    # Una sola llamada a la cabeza con las tres tareas sin palabra clave
+    assert len(llamadas) == 1
+    assert llamadas[0].shape == (3, 8)
+    prioridades = {t["titulo"]: t["prioridad"] for t in response.json()}
+    assert prioridades["Urgente: pagar luz"] == "alta"
+    assert prioridades["Regar plantas"] == "baja"
+
+
+def test_backend_rapido_por_lotes():
+    from datetime import datetime, timedelta, timezone
+
+    from app.services import intelligence
+
+    manana = datetime.now(timezone.utc) + timedelta(hours=12)
+    assert intelligence.priorizar_titulos(
+        ["Entregar informe", "Regar plantas", "Regar plantas", "Regar plantas"],
+        [None, manana, manana + timedelta(days=7), None],
+    ) == [
+        ("alta", "Palabra clave de urgencia detectada en el título."),
+        ("alta", intelligence.MOTIVO_FECHA_PROXIMA),
+        ("media", intelligence.MOTIVO_CON_FECHA),
+        ("baja", intelligence.MOTIVO_SIN_INDICIOS),
+    ]
+    # Sin tildes ni mayúsculas, con límites de palabra; gana el primer grupo
+    assert intelligence.detectar_grupos(
+        ["LIMPIAR la cocina", "Enviar curriculum", "Informe de limpieza", "Cocinar pasta"]
+    ) == ["Limpieza", "Trabajo/Estudios", "Limpieza", "Otros"]
+    assert intelligence.reescribir_titulos(["  sacar   la basura.", "Sacar la basura"]) == [
+        {"reformulada": "Sacar la basura", "cambio": True, "motivo": intelligence.MOTIVO_NORMALIZADO},
+        {"reformulada": "Sacar la basura", "cambio": False, "motivo": intelligence.MOTIVO_SIN_CAMBIOS},
+    ]
+
+
+@pytest.mark.asyncio
+async def test_backend_rapido_por_peticion_no_usa_modelos(async_client: AsyncClient, monkeypatch):
+    from app.api.v1.endpoints import tasks_ai
+
+    def sin_modelo(*args, **kwargs):
+        raise AssertionError("El backend rápido no debe llamar a ningún modelo")
+
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Fregar los platos", "categoria": "LIMPIEZA"})
+    await create_task(async_client, token, {"titulo": "informe urgente", "categoria": "OTRO"})
+
+    monkeypatch.setattr(tasks_ai, "priorizar_tareas", sin_modelo)
+    monkeypatch.setattr(tasks_ai, "reformular_titulos", sin_modelo)
+    monkeypatch.setattr(tasks_ai, "agrupar_tareas_por_similitud", sin_modelo)
+    monkeypatch.setattr(tasks_ai, "clasificar_prioridad_many", sin_modelo)
+
+    response = await async_client.post("/api/v1/tasks/ai/prioritize?backend=rapido", headers=headers, json={})
+    assert {t["titulo"]: (t["prioridad"], t["nivel"]) for t in response.json()} == {
+        "Fregar los platos": ("baja", "heuristica"),
+        "informe urgente": ("alta", "heuristica"),
+    }
+
+    response = await async_client.post("/api/v1/tasks/ai/group?backend=rapido", headers=headers, json={})
+    grupos = response.json()["grupos"]
+    assert {nombre: [t["titulo"] for t in tareas] for nombre, tareas in grupos.items()} == {
+        "Limpieza": ["Fregar los platos"],
+        "Trabajo/Estudios": ["informe urgente"],
+    }
+
+    # Inmediato: sin trabajo en cola aunque se pida async
+    response = await async_client.post("/api/v1/tasks/ai/rewrite?backend=rapido&async=true", headers=headers, json={})
+    assert response.status_code == 200
+    assert {t["original"]: t["reformulada"] for t in response.json()}["informe urgente"] == "Informe urgente"
+
+    response = await async_client.post("/api/v1/tasks/ai/rewrite?backend=rapido&stream=ndjson", headers=headers, json={})
+    assert len(response.text.splitlines()) == 2
+
+    response = await async_client.post("/api/v1/tasks/ai/suggest?backend=rapido", json={"titulo": "Regar plantas"})
+    assert response.json() == {"prioridad": "baja", "motivo": "Reglas rápidas: sin palabras de urgencia ni fecha límite."}
+
+
+@pytest.mark.asyncio
+async def test_despliegue_rapido_ignora_backend_modelo(async_client: AsyncClient, monkeypatch):
+    from app.api.v1.endpoints import tasks, tasks_ai
+    from app.core.config import settings
+
+    def sin_modelo(*args, **kwargs):
+        raise AssertionError("Con AI_BACKEND=rapido no se usa ningún modelo")
+
+    monkeypatch.setattr(settings, "AI_BACKEND", "rapido")
+    monkeypatch.setattr(tasks, "actualizar_embedding_tarea", sin_modelo)
+    monkeypatch.setattr(tasks, "actualizar_prioridad_tarea", sin_modelo)
+    monkeypatch.setattr(tasks_ai, "priorizar_tareas", sin_modelo)
+
+    user, token = await create_user_and_token(async_client)
+    await create_task(async_client, token, {"titulo": "Lavar ropa", "categoria": "OTRO"})
+    response = await async_client.post(
+        "/api/v1/tasks/ai/prioritize?backend=modelo", headers={"Authorization": f"Bearer {token}"}, json={},
+    )
+    assert [t["nivel"] for t in response.json()] == ["heuristica"]
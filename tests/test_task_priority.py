@@ -0,0 +1,112 @@
+from datetime import datetime, timezone
+from uuid import UUID
+
+import pytest
+from httpx import AsyncClient
+
+from app.db.session import async_session
+from app.models.task import Task
+from app.services import task_priority
+from tests.utils import create_user_and_token, create_task
+
+
+def _contar_llamadas(monkeypatch):
+    llamadas = []
+
+    def fake_embeddings(embeddings):
+        llamadas.append(len(embeddings))
+        return ["baja"] * len(embeddings)
+
+    monkeypatch.setattr(task_priority, "clasificar_embeddings", fake_embeddings)
+    return llamadas
+
+
+@pytest.mark.asyncio
+async def test_prioridad_se_guarda_al_crear_la_tarea(async_client: AsyncClient, monkeypatch):
+    llamadas = _contar_llamadas(monkeypatch)
+    user, token = await create_user_and_token(async_client)
+    tarea = await create_task(async_client, token, {"titulo": "Ordenar el trastero", "categoria": "OTRO"})
+
+    async with async_session() as session:
+        task = await session.get(Task, UUID(tarea["id"]))
+    assert task.prioridad == "baja"
+    assert task.prioridad_motivo == task_priority.MOTIVO_MODELO
+    assert task.prioridad_modelo == task_priority.version_prioridad()
+    assert task.prioridad_calculada_at is not None
+    assert llamadas == [1]
+
+
+@pytest.mark.asyncio
+async def test_prioritize_no_recalcula_filas_vigentes(async_client: AsyncClient, monkeypatch):
+    llamadas = _contar_llamadas(monkeypatch)
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    for titulo in ["Regar plantas", "Ordenar armario"]:
+        await create_task(async_client, token, {"titulo": titulo, "categoria": "OTRO"})
+    llamadas.clear()
+
+    for _ in range(2):
+        response = await async_client.post("/api/v1/tasks/ai/prioritize", headers=headers, json={})
+        assert response.status_code == 200
+        assert {t["prioridad"] for t in response.json()} == {"baja"}
+    assert llamadas == []
+
+
+@pytest.mark.asyncio
+async def test_cambiar_titulo_recalcula_solo_esa_tarea(async_client: AsyncClient, monkeypatch):
+    llamadas = _contar_llamadas(monkeypatch)
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    tarea = await create_task(async_client, token, {"titulo": "Regar plantas", "categoria": "OTRO"})
+    await create_task(async_client, token, {"titulo": "Ordenar armario", "categoria": "OTRO"})
+    llamadas.clear()
+
+    response = await async_client.patch(
+        f"/api/v1/tasks/{tarea['id']}", headers=headers, json={"titulo": "Regar plantas urgente"}
+    )
+    assert response.status_code == 200
+
+    response = await async_client.post("/api/v1/tasks/ai/prioritize", headers=headers, json={})
+    prioridades = {t["titulo"]: t["prioridad"] for t in response.json()}
+    assert prioridades == {"Regar plantas urgente": "alta", "Ordenar armario": "baja"}
+    # La tarea editada la resuelve una regla; la otra seguía vigente
+    assert llamadas == []
+
+
+@pytest.mark.asyncio
+async def test_prioritize_excluye_tareas_borradas(async_client: AsyncClient):
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    tarea = await create_task(async_client, token, {"titulo": "Tarea archivada", "categoria": "OTRO"})
+    await create_task(async_client, token, {"titulo": "Tarea activa", "categoria": "OTRO"})
+
+    async with async_session() as session:
+        fila = await session.get(Task, UUID(tarea["id"]))
+        fila.deleted_at = datetime.now(timezone.utc)
+        session.add(fila)
+        await session.commit()
+
+    response = await async_client.post("/api/v1/tasks/ai/prioritize", headers=headers, json={})
+    assert [t["titulo"] for t in response.json()] == ["Tarea activa"]
+
+
+@pytest.mark.asyncio
+async def test_listado_ordenado_por_prioridad(async_client: AsyncClient, monkeypatch):
+    monkeypatch.setattr(task_priority, "clasificar_embeddings", lambda embeddings: ["baja"] * len(embeddings))
+    user, token = await create_user_and_token(async_client)
+    headers = {"Authorization": f"Bearer {token}"}
+    await create_task(async_client, token, {"titulo": "Ordenar armario", "categoria": "OTRO"})
+    await create_task(async_client, token, {"titulo": "Pagar luz hoy", "categoria": "OTRO"})
+    monkeypatch.setattr(task_priority, "modelo_listo", lambda: False)
+    # Con el modelo cargando no se guarda prioridad: queda al final
+    await create_task(async_client, token, {"titulo": "Regar plantas", "categoria": "OTRO"})
+
+    response = await async_client.get("/api/v1/tasks?order_by=prioridad", headers=headers)
+    assert [(t["titulo"], t["prioridad"]) for t in response.json()] == [
+        ("Pagar luz hoy", "alta"),
+        ("Ordenar armario", "baja"),
+        ("Regar plantas", None),
+    ]
+
+    response = await async_client.get("/api/v1/tasks?order_by=prioridad&is_descending=true", headers=headers)
+    assert [t["titulo"] for t in response.json()] == ["Ordenar armario", "Pagar luz hoy", "Regar plantas"]